@@ -0,0 +1,22 @@
+"""Index proposals.updated_at for collection versioning
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_proposals_updated_at', 'proposals', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proposals_updated_at', table_name='proposals')
@@ -0,0 +1,25 @@
+"""Add precomputed summary preview and source hash to proposals
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('proposals', sa.Column('summary_preview', sa.String(length=300), nullable=True))
+    op.add_column('proposals', sa.Column('summary_source_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('proposals', 'summary_source_hash')
+    op.drop_column('proposals', 'summary_preview')
@@ -0,0 +1,50 @@
+"""Add search analytics event log and daily rollup
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('search_events',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column('search_type', sa.String(length=20), nullable=False),
+        sa.Column('filters', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('result_count', sa.Integer(), nullable=False),
+        sa.Column('latency_ms', sa.Float(), nullable=False),
+        sa.Column('zero_result', sa.Boolean(), nullable=False),
+        sa.Column('degraded', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_search_events_created_at', 'search_events', ['created_at'], unique=False)
+    
+    op.create_table('search_query_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column('search_type', sa.String(length=20), nullable=False),
+        sa.Column('searches', sa.Integer(), nullable=False),
+        sa.Column('zero_results', sa.Integer(), nullable=False),
+        sa.Column('avg_latency_ms', sa.Float(), nullable=False),
+        sa.Column('max_latency_ms', sa.Float(), nullable=False),
+        sa.Column('avg_result_count', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'query', 'search_type')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('search_query_daily')
+    op.drop_index('ix_search_events_created_at', table_name='search_events')
+    op.drop_table('search_events')
@@ -0,0 +1,113 @@
+"""Split proposals into narrow, content and vector tables
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 15:00:00.000000
+
+Dropped columns keep their space until the table is rewritten; run
+``VACUUM FULL proposals`` (outside a transaction) after upgrading.
+
+Revision 001 only created part of the original proposals table (databases
+bootstrapped with ``create_all`` have all of it); the missing columns and
+their indexes are added first, so upgrading a fresh database works.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+# Columns of the original proposals table missing from revision 001
+BASELINE_COLUMNS = (
+    ('proposal_type', 'VARCHAR(100)'),
+    ('meeting_name', 'VARCHAR(200)'),
+    ('meeting_date', 'TIMESTAMP WITH TIME ZONE'),
+    ('submitted_date', 'TIMESTAMP WITH TIME ZONE'),
+    ('decided_date', 'TIMESTAMP WITH TIME ZONE'),
+    ('status', 'VARCHAR(50)'),
+    ('votes_for', 'DOUBLE PRECISION'),
+    ('votes_against', 'DOUBLE PRECISION'),
+    ('votes_abstention', 'DOUBLE PRECISION'),
+    ('tags', 'VARCHAR[]'),
+    ('category', 'VARCHAR(100)'),
+    ('submitting_organization', 'VARCHAR(200)'),
+    ('source_document_path', 'VARCHAR(500)'),
+    ('source_document_page', 'DOUBLE PRECISION'),
+    ('embedding', f'vector({int(settings.EMBEDDING_DIMENSION)})'),
+    ('search_vector', 'TEXT'),
+    ('processing_status', 'VARCHAR(50)'),
+    ('processing_error', 'TEXT'),
+)
+BASELINE_INDEXES = ('proposal_type', 'submitted_date', 'status', 'category', 'submitting_organization')
+
+CONTENT_COLUMNS = (
+    'full_content_text', 'full_explanation_text', 'summary',
+    'summary_source_hash', 'search_vector', 'processing_error',
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    for column, column_type in BASELINE_COLUMNS:
+        op.execute(f"ALTER TABLE proposals ADD COLUMN IF NOT EXISTS {column} {column_type}")
+    for column in BASELINE_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_proposals_{column} ON proposals ({column})")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_proposals_proposal_number ON proposals (proposal_number)")
+    
+    op.create_table('proposal_contents',
+        sa.Column('proposal_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('full_content_text', sa.Text(), nullable=False),
+        sa.Column('full_explanation_text', sa.Text(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('summary_source_hash', sa.String(length=64), nullable=True),
+        sa.Column('search_vector', sa.Text(), nullable=True),
+        sa.Column('processing_error', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('proposal_id')
+    )
+    op.create_table('proposal_vectors',
+        sa.Column('proposal_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('embedding', Vector(settings.EMBEDDING_DIMENSION), nullable=True),
+        sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('proposal_id')
+    )
+    
+    columns = ', '.join(CONTENT_COLUMNS)
+    op.execute(f"INSERT INTO proposal_contents (proposal_id, {columns}) SELECT id, {columns} FROM proposals")
+    op.execute("INSERT INTO proposal_vectors (proposal_id, embedding) SELECT id, embedding FROM proposals")
+    
+    for column in CONTENT_COLUMNS + ('embedding',):
+        op.drop_column('proposals', column)
+    
+    # Titles are matched with ILIKE/full-text, never through a btree
+    op.execute("DROP INDEX IF EXISTS ix_proposals_title")
+    op.create_index('ix_proposals_created_at', 'proposals', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proposals_created_at', table_name='proposals')
+    op.create_index('ix_proposals_title', 'proposals', ['title'], unique=False)
+    
+    op.add_column('proposals', sa.Column('full_content_text', sa.Text(), nullable=True))
+    op.add_column('proposals', sa.Column('full_explanation_text', sa.Text(), nullable=True))
+    op.add_column('proposals', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('proposals', sa.Column('summary_source_hash', sa.String(length=64), nullable=True))
+    op.add_column('proposals', sa.Column('search_vector', sa.Text(), nullable=True))
+    op.add_column('proposals', sa.Column('processing_error', sa.Text(), nullable=True))
+    op.add_column('proposals', sa.Column('embedding', Vector(settings.EMBEDDING_DIMENSION), nullable=True))
+    
+    assignments = ', '.join(f"{column} = c.{column}" for column in CONTENT_COLUMNS)
+    op.execute(f"UPDATE proposals p SET {assignments} FROM proposal_contents c WHERE c.proposal_id = p.id")
+    op.execute("UPDATE proposals p SET embedding = v.embedding FROM proposal_vectors v WHERE v.proposal_id = p.id")
+    op.alter_column('proposals', 'full_content_text', nullable=False)
+    
+    op.drop_table('proposal_vectors')
+    op.drop_table('proposal_contents')
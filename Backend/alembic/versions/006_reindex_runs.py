@@ -0,0 +1,62 @@
+"""Add reindex runs, partition checkpoints and shadow values
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('reindex_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('target', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('options', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('rows_total', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('swapped_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reindex_runs_target', 'reindex_runs', ['target'], unique=False)
+    
+    op.create_table('reindex_partitions',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('partition', sa.Integer(), nullable=False),
+        sa.Column('lower_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('upper_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('last_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('rows_done', sa.BigInteger(), nullable=False),
+        sa.Column('done', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['reindex_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id', 'partition')
+    )
+    
+    op.create_table('reindex_shadow',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('proposal_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('embedding', Vector(), nullable=True),
+        sa.Column('search_vector', sa.Text(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['reindex_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('run_id', 'proposal_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reindex_shadow')
+    op.drop_table('reindex_partitions')
+    op.drop_index('ix_reindex_runs_target', table_name='reindex_runs')
+    op.drop_table('reindex_runs')
@@ -0,0 +1,53 @@
+"""Add MinHash signatures, LSH buckets and proposal version links
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('proposals', sa.Column('version_of_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('proposals', sa.Column('version_similarity', sa.Float(), nullable=True))
+    op.create_foreign_key(
+        'proposals_version_of_id_fkey', 'proposals', 'proposals', ['version_of_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_proposals_version_of_id', 'proposals', ['version_of_id'], unique=False)
+    
+    op.create_table('proposal_signatures',
+        sa.Column('proposal_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('shingle_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('proposal_id')
+    )
+    
+    op.create_table('proposal_lsh_buckets',
+        sa.Column('band', sa.SmallInteger(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('proposal_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('band', 'bucket', 'proposal_id')
+    )
+    op.create_index('ix_proposal_lsh_buckets_proposal_id', 'proposal_lsh_buckets', ['proposal_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proposal_lsh_buckets_proposal_id', table_name='proposal_lsh_buckets')
+    op.drop_table('proposal_lsh_buckets')
+    op.drop_table('proposal_signatures')
+    op.drop_index('ix_proposals_version_of_id', table_name='proposals')
+    op.drop_constraint('proposals_version_of_id_fkey', 'proposals', type_='foreignkey')
+    op.drop_column('proposals', 'version_similarity')
+    op.drop_column('proposals', 'version_of_id')
@@ -0,0 +1,75 @@
+"""Add normalized tag keys with a GIN index and the tag dictionary
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from collections import Counter
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(tag: str) -> str:
+    # Same folding as app.models.tag.normalize_tag at the time of writing
+    decomposed = unicodedata.normalize("NFKD", tag)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", stripped).strip().casefold()
+
+
+def upgrade() -> None:
+    op.add_column('proposals', sa.Column('tag_keys', postgresql.ARRAY(sa.String()), nullable=True))
+    
+    op.create_table('tag_dictionary',
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('label', sa.Text(), nullable=False),
+        sa.Column('usage_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(
+        'ix_tag_dictionary_key_pattern', 'tag_dictionary', ['key'],
+        unique=False, postgresql_ops={'key': 'text_pattern_ops'},
+    )
+    
+    # Backfill keys and counts
+    connection = op.get_bind()
+    counts = Counter()
+    labels = {}
+    rows = connection.execute(sa.text("SELECT id, tags FROM proposals WHERE tags IS NOT NULL")).all()
+    for proposal_id, tags in rows:
+        keys = []
+        for tag in tags:
+            key = _normalize(tag)
+            if key and key not in keys:
+                keys.append(key)
+                labels.setdefault(key, tag.strip())
+        counts.update(keys)
+        connection.execute(
+            sa.text("UPDATE proposals SET tag_keys = :keys WHERE id = :id"),
+            {"keys": keys, "id": proposal_id},
+        )
+    if counts:
+        connection.execute(
+            sa.text("INSERT INTO tag_dictionary (key, label, usage_count) VALUES (:key, :label, :count)"),
+            [{"key": key, "label": labels[key], "count": count} for key, count in counts.items()],
+        )
+    
+    op.create_index('ix_proposals_tag_keys', 'proposals', ['tag_keys'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proposals_tag_keys', table_name='proposals')
+    op.drop_index('ix_tag_dictionary_key_pattern', table_name='tag_dictionary')
+    op.drop_table('tag_dictionary')
+    op.drop_column('proposals', 'tag_keys')
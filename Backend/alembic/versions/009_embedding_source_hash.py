@@ -0,0 +1,24 @@
+"""Add embedding source hash to proposal vectors
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL for existing embeddings: the next generate_embeddings run recomputes once
+    op.add_column('proposal_vectors', sa.Column('embedding_source_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('proposal_vectors', 'embedding_source_hash')
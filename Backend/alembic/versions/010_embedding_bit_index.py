@@ -0,0 +1,40 @@
+"""Add an HNSW index over binary-quantized embeddings
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # binary_quantize() and bit_hamming_ops need pgvector 0.7; older
+    # installations keep exact search only (VECTOR_SEARCH_MODE=exact)
+    version = op.get_bind().execute(
+        sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    ).scalar()
+    if version is None or tuple(int(part) for part in version.split(".")[:2]) < (0, 7):
+        logger.warning(f"pgvector {version} does not support binary quantization; skipping ix_proposal_vectors_embedding_bit")
+        return
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_proposal_vectors_embedding_bit ON proposal_vectors "
+        f"USING hnsw ((binary_quantize(embedding)::bit({int(settings.EMBEDDING_DIMENSION)})) bit_hamming_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_proposal_vectors_embedding_bit")
@@ -0,0 +1,31 @@
+"""Add a GIN expression index for full-text search
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same expression as query_parser.fulltext_condition, so the planner uses
+    # the index instead of recomputing tsvectors per row
+    op.create_index(
+        'ix_proposal_contents_fulltext',
+        'proposal_contents',
+        [sa.text("to_tsvector('german'::regconfig, full_content_text)")],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_proposal_contents_fulltext', table_name='proposal_contents')
@@ -0,0 +1,24 @@
+"""Drop MinHash signatures computed with the old hash arithmetic
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Signatures are not comparable across hash functions; the
+    # index-near-duplicates beat task recomputes them
+    op.execute("TRUNCATE proposal_lsh_buckets, proposal_signatures")
+
+
+def downgrade() -> None:
+    op.execute("TRUNCATE proposal_lsh_buckets, proposal_signatures")
@@ -0,0 +1,25 @@
+"""Record failed summary attempts
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('proposal_contents', sa.Column('summary_attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('proposal_contents', sa.Column('summary_retry_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('proposal_contents', 'summary_retry_at')
+    op.drop_column('proposal_contents', 'summary_attempts')
@@ -3,7 +3,7 @@ API v1 router.
 """
 from fastapi import APIRouter
 
-from .endpoints import proposals, search
+from .endpoints import analytics, ingest, profiles, proposals, search, tags
 
 api_router = APIRouter()
 
@@ -18,4 +18,29 @@ api_router.include_router(
     search.router,
     prefix="/search",
     tags=["search"]
+)
+
+api_router.include_router(
+    tags.router,
+    prefix="/tags",
+    tags=["tags"]
+)
+
+api_router.include_router(
+    analytics.router,
+    prefix="/analytics",
+    tags=["analytics"]
+)
+
+api_router.include_router(
+    ingest.router,
+    prefix="/ingest",
+    tags=["ingest"]
+)
+
+api_router.include_router(
+    profiles.router,
+    prefix="/profiles",
+    tags=["profiles"],
+    include_in_schema=False
 )
\ No newline at end of file
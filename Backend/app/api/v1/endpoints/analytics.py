@@ -0,0 +1,90 @@
+"""
+Analytics endpoints (data quality dashboard).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from datetime import date, timedelta
+import logging
+
+from ....database import get_db
+from ....models.analytics import SearchQueryDaily
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/search")
+async def get_search_analytics(
+    days: int = Query(7, ge=1, le=90, description="Number of days to include"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum queries per list"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get search query analytics from the daily rollups.
+
+    Returns daily volume, the most frequent queries and the most frequent
+    queries without results. Data is as fresh as the last rollup run.
+    """
+    try:
+        since = date.today() - timedelta(days=days - 1)
+        searches = func.sum(SearchQueryDaily.searches)
+        zero_results = func.sum(SearchQueryDaily.zero_results)
+
+        daily_result = await db.execute(
+            select(
+                SearchQueryDaily.day,
+                searches,
+                zero_results,
+                func.sum(SearchQueryDaily.avg_latency_ms * SearchQueryDaily.searches) / searches,
+            )
+            .where(SearchQueryDaily.day >= since)
+            .group_by(SearchQueryDaily.day)
+            .order_by(SearchQueryDaily.day)
+        )
+        daily = [
+            {
+                "day": day,
+                "searches": count,
+                "zero_results": zero,
+                "avg_latency_ms": round(latency or 0.0, 1),
+            }
+            for day, count, zero, latency in daily_result.all()
+        ]
+
+        top_result = await db.execute(
+            select(SearchQueryDaily.query, searches, zero_results)
+            .where(SearchQueryDaily.day >= since)
+            .group_by(SearchQueryDaily.query)
+            .order_by(searches.desc())
+            .limit(limit)
+        )
+        top_queries = [
+            {"query": query, "searches": count, "zero_results": zero}
+            for query, count, zero in top_result.all()
+        ]
+
+        zero_result = await db.execute(
+            select(SearchQueryDaily.query, zero_results)
+            .where(SearchQueryDaily.day >= since)
+            .group_by(SearchQueryDaily.query)
+            .having(zero_results > 0)
+            .order_by(zero_results.desc())
+            .limit(limit)
+        )
+        zero_result_queries = [
+            {"query": query, "zero_results": zero}
+            for query, zero in zero_result.all()
+        ]
+
+        return {
+            "since": since,
+            "total_searches": sum(entry["searches"] for entry in daily),
+            "daily": daily,
+            "top_queries": top_queries,
+            "zero_result_queries": zero_result_queries,
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting search analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve search analytics")
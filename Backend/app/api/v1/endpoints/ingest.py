@@ -0,0 +1,280 @@
+"""
+Ingestion endpoints.
+"""
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from multipart.multipart import MultipartParser, parse_options_header
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime
+import asyncio
+import logging
+import os
+
+from ....config import settings
+from ....core.queueing import enqueue_or_429
+from ....services.uploads import (
+    StreamingUpload,
+    append_chunk,
+    check_extension,
+    claim_processing,
+    create_session,
+    finish_session,
+    load_session,
+    release_processing,
+    store_upload,
+    temp_path,
+)
+from ....tasks import process_pdf
+from ....schemas.proposal import FileUploadResponse, UploadSessionCreate, UploadSessionResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MEETING_FIELDS = ("meeting_name", "meeting_date", "organization")
+
+# Limits for the non-file parts of a multipart upload
+MAX_FIELD_SIZE = 1024
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _meeting_info(meeting_name: Optional[str], meeting_date, organization: Optional[str]) -> dict:
+    if isinstance(meeting_date, str) and meeting_date:
+        try:
+            meeting_date = datetime.fromisoformat(meeting_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="meeting_date must be an ISO 8601 date")
+    return {
+        "meeting_name": meeting_name or None,
+        "meeting_date": meeting_date.isoformat() if meeting_date else None,
+        "organization": organization or None,
+    }
+
+
+async def _stream_multipart(request: Request, upload: StreamingUpload) -> Tuple[str, Dict[str, str]]:
+    """
+    Stream a multipart/form-data body, writing the ``file`` part to ``upload``.
+
+    The parser works incrementally on the request stream, so no part is ever
+    spooled in memory; form fields are limited to ``MAX_FIELD_SIZE``.
+    """
+    _, params = parse_options_header(request.headers["content-type"])
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing multipart boundary")
+
+    state = {"header_field": b"", "header_value": b"", "disposition": b"", "name": None, "is_file": False}
+    fields: Dict[str, bytearray] = {}
+    file_data: List[bytes] = []
+    filename: List[str] = []
+
+    def on_part_begin():
+        state.update(header_field=b"", header_value=b"", disposition=b"", name=None, is_file=False)
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        if state["header_field"].lower() == b"content-disposition":
+            state["disposition"] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["disposition"])
+        state["name"] = options.get(b"name", b"").decode("latin-1")
+        if b"filename" in options:
+            if state["name"] != "file" or filename:
+                raise HTTPException(status_code=400, detail="Exactly one file part named 'file' is expected")
+            filename.append(options[b"filename"].decode("utf-8", "replace"))
+            check_extension(filename[0])
+            state["is_file"] = True
+        else:
+            fields[state["name"]] = bytearray()
+
+    def on_part_data(data, start, end):
+        if state["is_file"]:
+            file_data.append(data[start:end])
+            return
+        value = fields[state["name"]]
+        value += data[start:end]
+        if len(value) > MAX_FIELD_SIZE:
+            raise HTTPException(status_code=400, detail=f"Form field '{state['name']}' is too large")
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for data in file_data:
+            await upload.write(data)
+        file_data.clear()
+    parser.finalize()
+
+    if not filename:
+        raise HTTPException(status_code=400, detail="Missing file part")
+    return filename[0], {name: value.decode("utf-8", "replace") for name, value in fields.items()}
+
+
+async def _stored_upload_response(
+    filename: str,
+    size: int,
+    path: str,
+    sha256: str,
+    meeting_info: dict,
+) -> FileUploadResponse:
+    """
+    Queue a stored upload for processing, unless the same file is already queued or processed.
+
+    A file whose enqueue failed (429) or whose processing failed for good
+    is queued again when uploaded again.
+    """
+    if not await claim_processing(path):
+        # Already queued or processed; use app.reprocess to run it again
+        return FileUploadResponse(
+            filename=filename,
+            file_size=size,
+            upload_path=path,
+            processing_status="duplicate",
+            message="Identical file already uploaded, not queued again",
+            sha256=sha256,
+            duplicate=True,
+        )
+
+    try:
+        task = await enqueue_or_429(process_pdf, path, meeting_info)
+    except BaseException:
+        await release_processing(path)
+        raise
+    return FileUploadResponse(
+        filename=filename,
+        file_size=size,
+        upload_path=path,
+        processing_status="queued",
+        message="Upload complete, processing queued",
+        sha256=sha256,
+        task_id=task.id,
+    )
+
+
+@router.post("/pdf", response_model=FileUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_pdf(
+    request: Request,
+    meeting_name: Optional[str] = Query(None, max_length=200, description="Meeting name"),
+    meeting_date: Optional[datetime] = Query(None, description="Meeting date"),
+    organization: Optional[str] = Query(None, max_length=200, description="Organization name"),
+    filename: Optional[str] = Query(None, max_length=255, description="File name (raw uploads)"),
+):
+    """
+    Upload a PDF protocol and queue it for processing.
+
+    A file identical to an earlier upload is not queued again; the response
+    points at the stored file with ``duplicate`` set.
+
+    Accepts either ``multipart/form-data`` (a ``file`` part plus optional
+    ``meeting_name``, ``meeting_date`` and ``organization`` fields) or a raw
+    ``application/pdf`` body with the metadata as query parameters. The body
+    is streamed to disk; uploads over the size limit are aborted with 413
+    as soon as the limit is crossed, non-PDF content is rejected with 415.
+    """
+    content_type = request.headers.get("content-type", "")
+    is_multipart = content_type.startswith("multipart/form-data")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        allowed = settings.MAX_FILE_SIZE + (MULTIPART_OVERHEAD if is_multipart else 0)
+        if int(content_length) > allowed:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE} bytes",
+            )
+
+    upload = StreamingUpload(temp_path(), settings.MAX_FILE_SIZE)
+    await upload.open()
+    try:
+        if is_multipart:
+            filename, fields = await _stream_multipart(request, upload)
+            meeting_info = _meeting_info(*(fields.get(name) for name in MEETING_FIELDS))
+        else:
+            filename = filename or "upload.pdf"
+            check_extension(filename)
+            meeting_info = _meeting_info(meeting_name, meeting_date, organization)
+            async for chunk in request.stream():
+                await upload.write(chunk)
+        await upload.close()
+    except BaseException:
+        await upload.abort()
+        raise
+
+    sha256 = upload.sha256.hexdigest()
+    path = await asyncio.to_thread(store_upload, upload.path, sha256)
+
+    logger.info(f"Uploaded {filename} ({upload.size} bytes, sha256 {sha256[:12]})")
+    return await _stored_upload_response(os.path.basename(filename), upload.size, path, sha256, meeting_info)
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload: UploadSessionCreate,
+    response: Response,
+):
+    """
+    Start a resumable upload.
+
+    Send the file in chunks with ``PATCH /ingest/uploads/{upload_id}`` and
+    an ``Upload-Offset`` header. After an interruption, ``GET`` the upload
+    to read the offset to resume from.
+    """
+    meeting_info = _meeting_info(upload.meeting_name, upload.meeting_date, upload.organization)
+    session = await asyncio.to_thread(create_session, upload.filename, upload.size, meeting_info)
+    response.headers["Upload-Offset"] = "0"
+    return UploadSessionResponse(**session, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: str,
+    response: Response,
+):
+    """
+    Get the state of a resumable upload.
+    """
+    session = await asyncio.to_thread(load_session, upload_id)
+    response.headers["Upload-Offset"] = str(session["offset"])
+    return UploadSessionResponse(**session, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+
+
+@router.patch("/uploads/{upload_id}", response_model=Union[FileUploadResponse, UploadSessionResponse])
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., ge=0, description="Offset of this chunk in the file"),
+):
+    """
+    Append a chunk to a resumable upload.
+
+    The chunk must start at the current offset (409 otherwise). When the
+    last byte arrives, the file is stored and queued for processing (unless
+    it duplicates an earlier upload). If queueing fails with 429, retry with
+    an empty chunk at the final offset.
+    """
+    session = await append_chunk(upload_id, upload_offset, request.stream())
+    response.headers["Upload-Offset"] = str(session["offset"])
+
+    if "sha256" not in session:
+        return UploadSessionResponse(**session, chunk_size=settings.UPLOAD_CHUNK_SIZE)
+
+    # The session stays if queueing fails, so the client can retry the completion
+    result = await _stored_upload_response(
+        session["filename"], session["size"], session["path"], session["sha256"], session["meeting_info"]
+    )
+    await asyncio.to_thread(finish_session, upload_id)
+    logger.info(f"Completed resumable upload {upload_id} ({session['size']} bytes, {result.processing_status})")
+    return result
@@ -0,0 +1,38 @@
+"""
+Stored request profiles (see app/core/profiling.py).
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+import asyncio
+import logging
+
+from ....core.profiling import list_profiles, profile_path, token_valid
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+async def require_profiling_token(x_profile_token: Optional[str] = Header(None)):
+    # 404 rather than 401/403: profiling endpoints are not advertised
+    if not token_valid(x_profile_token):
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@router.get("", dependencies=[Depends(require_profiling_token)])
+async def get_profiles():
+    """
+    List stored profiles, newest first.
+    """
+    return await asyncio.to_thread(list_profiles)
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str):
+    """
+    Get a stored profile as a self-contained HTML page.
+    """
+    path = await asyncio.to_thread(profile_path, profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/html")
@@ -1,15 +1,45 @@
 """
 Proposal CRUD endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
+from sqlalchemy import select, or_
+from typing import List, Optional
 import logging
 from uuid import UUID
 
+from ....config import settings
+from ....core.cache import get_or_set_json, proposal_key, proposal_payload
+from ....core.conditional import (
+    collection_version,
+    has_conditional_headers,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    proposal_version,
+    query_fingerprint,
+    set_validators,
+)
+from ....core.fieldsets import (
+    PROPOSAL_FIELD_COLUMNS,
+    SUMMARY_FIELDS,
+    card_summary,
+    load_options,
+    parse_fields,
+    serialize_fields,
+)
+from ....core.queueing import enqueue_debounced, enqueue_or_defer
+from ....core.timing import TimedJSONResponse
 from ....database import get_db
 from ....models.proposal import Proposal
+from ....celery import BULK
+from ....services.analytics import search_analytics
+from ....services.changes import STALE_HASH, affected, changed_fields
+from ....services.near_duplicates import link_versions
+from ....services.query_parser import search_vector
+from ....services.stats import cached_facets, cached_overview
+from ....services.summaries import make_preview
+from ....tasks import generate_embeddings, summarize_proposals
 from ....schemas.proposal import (
     ProposalCreate,
     ProposalUpdate,
@@ -37,7 +67,9 @@ async def create_proposal(
             proposal_type=proposal_data.proposal_type.value if proposal_data.proposal_type else None,
             full_content_text=proposal_data.full_content_text,
             full_explanation_text=proposal_data.full_explanation_text,
+            search_vector=search_vector(proposal_data.full_content_text),
             summary=proposal_data.summary,
+            summary_preview=make_preview(proposal_data.summary),
             primary_author=proposal_data.primary_author,
             co_authors=proposal_data.co_authors,
             meeting_name=proposal_data.meeting_name,
@@ -54,10 +86,20 @@ async def create_proposal(
         )
         
         db.add(proposal)
+        await db.flush()
+        await link_versions(db, proposal)
         await db.commit()
         await db.refresh(proposal)
         
         logger.info(f"Created proposal: {proposal.id}")
+        
+        # Embed in the background; if the AI queue is backed up the proposal
+        # stays without embedding and is picked up by sweep_embeddings
+        await enqueue_or_defer(generate_embeddings, str(proposal.id))
+        if not proposal.summary:
+            # Summaries are precomputed in the bulk lane, never on the request path
+            await enqueue_or_defer(summarize_proposals, [str(proposal.id)], lane=BULK)
+        
         return proposal
         
     except Exception as e:
@@ -68,18 +110,48 @@ async def create_proposal(
 
 @router.get("", response_model=List[ProposalSummary])
 async def list_proposals(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get a list of all proposals (paginated).
+    
+    Supports conditional requests: the ETag is derived from the collection
+    version and the query parameters. With **fields**, only the requested
+    fields are selected and returned.
     """
+    selected = parse_fields(fields, PROPOSAL_FIELD_COLUMNS)
+    
     try:
-        query = select(Proposal).offset(skip).limit(limit).order_by(Proposal.created_at.desc())
+        last_modified, count = await collection_version(db)
+        etag = make_etag("proposals", last_modified, count, query_fingerprint(request))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        set_validators(response, etag, last_modified)
+        
+        query = (
+            select(Proposal)
+            .options(*load_options(selected or SUMMARY_FIELDS))
+            .offset(skip)
+            .limit(limit)
+            .order_by(Proposal.created_at.desc())
+        )
         result = await db.execute(query)
         proposals = result.scalars().all()
         
+        if selected:
+            content = []
+            for proposal in proposals:
+                extra = {"summary": card_summary(proposal)} if "summary" in selected else {}
+                content.append(serialize_fields(proposal, selected, **extra))
+            sparse = TimedJSONResponse(content=content)
+            set_validators(sparse, etag, last_modified)
+            return sparse
+        
         # Convert to summary format
         summaries = []
         for proposal in proposals:
@@ -87,7 +159,7 @@ async def list_proposals(
                 id=proposal.id,
                 title=proposal.title,
                 proposal_number=proposal.proposal_number,
-                summary=proposal.summary[:200] + "..." if proposal.summary and len(proposal.summary) > 200 else proposal.summary,
+                summary=card_summary(proposal),
                 submitted_date=proposal.submitted_date,
                 status=proposal.status,
                 tags=proposal.tags or [],
@@ -104,19 +176,60 @@ async def list_proposals(
 @router.get("/{proposal_id}", response_model=ProposalResponse)
 async def get_proposal(
     proposal_id: UUID,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (embedding only on request)"),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get a specific proposal by ID.
+    
+    Supports conditional requests: revalidation only reads ``updated_at``
+    and answers 304 without loading the row. Full responses are cached in
+    Redis per version. With **fields**, only the requested columns are
+    selected and returned.
     """
+    selected = parse_fields(fields, PROPOSAL_FIELD_COLUMNS)
+    fieldset_key = ",".join(selected or [])
+    
     try:
-        result = await db.execute(select(Proposal).where(Proposal.id == proposal_id))
+        # Version first for revalidation and the response cache
+        updated_at = None
+        if has_conditional_headers(request) or not selected:
+            updated_at = await proposal_version(db, proposal_id)
+            if updated_at is None:
+                raise HTTPException(status_code=404, detail="Proposal not found")
+            etag = make_etag(proposal_id, updated_at.isoformat(), fieldset_key)
+            if settings.ANALYTICS_ENABLED:
+                search_analytics.record_view(proposal_id)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(etag, updated_at)
+        
+        if not selected:
+            payload = await get_or_set_json(
+                proposal_key(proposal_id, updated_at),
+                lambda: _load_proposal_payload(db, proposal_id),
+            )
+            full = TimedJSONResponse(content=payload)
+            set_validators(full, etag, updated_at)
+            return full
+        
+        # updated_at is always needed for the validators
+        result = await db.execute(
+            select(Proposal)
+            .options(*load_options(selected + ["updated_at"]))
+            .where(Proposal.id == proposal_id)
+        )
         proposal = result.scalar_one_or_none()
         
         if not proposal:
             raise HTTPException(status_code=404, detail="Proposal not found")
+        if updated_at is None and settings.ANALYTICS_ENABLED:
+            search_analytics.record_view(proposal_id)
         
-        return proposal
+        etag = make_etag(proposal.id, proposal.updated_at.isoformat(), fieldset_key)
+        sparse = TimedJSONResponse(content=serialize_fields(proposal, selected))
+        set_validators(sparse, etag, proposal.updated_at)
+        return sparse
         
     except HTTPException:
         raise
@@ -125,6 +238,59 @@ async def get_proposal(
         raise HTTPException(status_code=500, detail="Failed to retrieve proposal")
 
 
+async def _load_proposal_payload(db: AsyncSession, proposal_id: UUID) -> dict:
+    result = await db.execute(select(Proposal).where(Proposal.id == proposal_id))
+    proposal = result.scalar_one_or_none()
+    if not proposal:
+        raise HTTPException(status_code=404, detail="Proposal not found")
+    return proposal_payload(proposal)
+
+
+@router.get("/{proposal_id}/versions", response_model=List[ProposalSummary])
+async def get_proposal_versions(
+    proposal_id: UUID,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get all versions of a proposal (resubmissions and amendments).
+    
+    Versions are linked at ingestion by near-duplicate detection; the list
+    includes the proposal itself, oldest first.
+    """
+    try:
+        result = await db.execute(select(Proposal.id, Proposal.version_of_id).where(Proposal.id == proposal_id))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Proposal not found")
+        root_id = row.version_of_id or row.id
+        
+        result = await db.execute(
+            select(Proposal)
+            .options(*load_options(SUMMARY_FIELDS + ("version_similarity", "created_at")))
+            .where(or_(Proposal.id == root_id, Proposal.version_of_id == root_id))
+            .order_by(Proposal.created_at)
+        )
+        return [
+            ProposalSummary(
+                id=version.id,
+                title=version.title,
+                proposal_number=version.proposal_number,
+                summary=card_summary(version),
+                submitted_date=version.submitted_date,
+                status=version.status,
+                tags=version.tags or [],
+                relevance_score=1.0 if version.id == root_id else version.version_similarity,
+            )
+            for version in result.scalars().all()
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving versions of proposal {proposal_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve proposal versions")
+
+
 @router.put("/{proposal_id}", response_model=ProposalResponse)
 async def update_proposal(
     proposal_id: UUID,
@@ -133,6 +299,10 @@ async def update_proposal(
 ):
     """
     Update an existing proposal.
+    
+    Only derived data fed by a changed field is recomputed: status and vote
+    edits trigger nothing, content edits re-summarize and (debounced)
+    re-embed.
     """
     try:
         result = await db.execute(select(Proposal).where(Proposal.id == proposal_id))
@@ -141,20 +311,52 @@ async def update_proposal(
         if not proposal:
             raise HTTPException(status_code=404, detail="Proposal not found")
         
-        # Update fields
         update_data = proposal_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            if field == "proposal_type" and value:
-                setattr(proposal, field, value.value)
-            elif field == "status" and value:
-                setattr(proposal, field, value.value)
-            else:
-                setattr(proposal, field, value)
+        for field in ("proposal_type", "status"):
+            if update_data.get(field):
+                update_data[field] = update_data[field].value
+        
+        # Only fields that actually change are written and trigger derived work
+        changed = changed_fields(proposal, update_data)
+        for field in changed:
+            setattr(proposal, field, update_data[field])
+        derived = affected(changed)
+        
+        if "preview" in derived:
+            # Hand-written summaries are kept; only the preview is derived
+            proposal.summary_source_hash = None
+            proposal.summary_preview = make_preview(proposal.summary)
+        
+        # Persist what is stale, so deferred or lost tasks are found by the sweeps
+        if "summary" in derived and proposal.summary_source_hash is not None:
+            proposal.summary_source_hash = STALE_HASH
+        if "summary" in derived:
+            # New content gets a fresh set of summary attempts
+            proposal.summary_attempts = 0
+            proposal.summary_retry_at = None
+        if "embedding" in derived:
+            proposal.embedding_source_hash = STALE_HASH
+        
+        if "search_vector" in derived:
+            proposal.search_vector = search_vector(proposal.full_content_text)
+        
+        if "signature" in derived:
+            await link_versions(db, proposal)
         
         await db.commit()
         await db.refresh(proposal)
         
-        logger.info(f"Updated proposal: {proposal.id}")
+        logger.info(f"Updated proposal: {proposal.id} (changed: {', '.join(sorted(changed)) or 'nothing'})")
+        
+        if "summary" in derived:
+            await enqueue_or_defer(summarize_proposals, [str(proposal.id)], lane=BULK)
+        if "embedding" in derived:
+            await enqueue_debounced(
+                generate_embeddings,
+                str(proposal.id),
+                key=f"embedding:{proposal.id}",
+                delay=settings.EMBEDDING_DEBOUNCE,
+            )
         return proposal
         
     except HTTPException:
@@ -202,33 +404,24 @@ async def get_proposals_stats(
     Get overview statistics about proposals.
     """
     try:
-        # Total count
-        total_result = await db.execute(select(func.count(Proposal.id)))
-        total_count = total_result.scalar()
-        
-        # Count by status
-        status_result = await db.execute(
-            select(Proposal.status, func.count(Proposal.id))
-            .group_by(Proposal.status)
-        )
-        status_counts = dict(status_result.all())
-        
-        # Count by category
-        category_result = await db.execute(
-            select(Proposal.category, func.count(Proposal.id))
-            .where(Proposal.category.isnot(None))
-            .group_by(Proposal.category)
-            .order_by(func.count(Proposal.id).desc())
-            .limit(10)
-        )
-        category_counts = dict(category_result.all())
-        
-        return {
-            "total_proposals": total_count,
-            "by_status": status_counts,
-            "by_category": category_counts,
-        }
+        return await cached_overview(db)
         
     except Exception as e:
         logger.error(f"Error getting proposal stats: {e}")
-        raise HTTPException(status_code=500, detail="Failed to retrieve statistics")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to retrieve statistics")
+
+
+@router.get("/stats/facets")
+async def get_proposals_facets(
+    limit: int = Query(20, ge=1, le=100, description="Maximum values per facet"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the most frequent categories, submitting organizations and tags.
+    """
+    try:
+        return await cached_facets(db, limit)
+        
+    except Exception as e:
+        logger.error(f"Error getting proposal facets: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve facets")
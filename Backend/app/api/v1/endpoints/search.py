@@ -1,29 +1,60 @@
 """
 Search endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, text
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
 import time
 import logging
 
+from ....core.cache import get_json, search_key, set_json
+from ....core.conditional import (
+    collection_version,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    query_fingerprint,
+    set_validators,
+)
+from ....core.fieldsets import (
+    PROPOSAL_FIELD_COLUMNS,
+    SUMMARY_FIELDS,
+    card_summary,
+    load_options,
+    parse_fields,
+    serialize_fields,
+)
+from ....core.singleflight import search_flights
+from ....core.timing import RANK, TimedJSONResponse, span
+from ....config import settings
 from ....database import get_db
 from ....models.proposal import Proposal
+from ....models.tag import tag_keys
+from ....services.analytics import search_analytics
+from ....services.embeddings import AIUnavailableError, embed_query
+from ....services.quantization import candidate_count, hamming_distance
+from ....services.query_parser import fulltext_condition, parse_query
+from ....services.vector_index import vector_index
 from ....schemas.proposal import (
     SearchRequest,
     SearchResponse,
     ProposalSummary,
     SearchType,
-    ProposalStatus
+    ProposalStatus,
+    TagMatch,
 )
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-
 @router.get("", response_model=SearchResponse)
 async def search_proposals(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=1, description="Search query"),
     type: SearchType = Query(SearchType.HYBRID, description="Search type"),
     limit: int = Query(20, ge=1, le=100, description="Maximum results"),
@@ -32,8 +63,10 @@ async def search_proposals(
     date_from: Optional[str] = Query(None, description="Filter by submission date from (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter by submission date to (YYYY-MM-DD)"),
     tags: List[str] = Query(default=[], description="Filter by tags"),
+    tag_match: TagMatch = Query(TagMatch.ANY, description="Match any or all of the tags"),
     category: Optional[str] = Query(None, description="Filter by category"),
     submitting_organization: Optional[str] = Query(None, description="Filter by organization"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per result"),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -45,107 +78,309 @@ async def search_proposals(
     - **offset**: Pagination offset
     - **status**: Filter by proposal status
     - **date_from/date_to**: Filter by submission date range
-    - **tags**: Filter by tags (can specify multiple)
+    - **tags**: Filter by tags (can specify multiple; case and diacritics are ignored)
+    - **tag_match**: Match proposals with any (default) or all of the tags
     - **category**: Filter by category
     - **submitting_organization**: Filter by submitting organization
+    - **fields**: Restrict each result to these fields (narrows the SELECT list)
+    
+    Supports conditional requests: the ETag is derived from the collection
+    version and the normalized query parameters. Identical concurrent
+    searches (same ETag) are executed once and share the result, and
+    complete (not degraded) outcomes are cached in Redis per collection
+    version.
     """
     start_time = time.time()
+    selected = parse_fields(fields, [*PROPOSAL_FIELD_COLUMNS, "relevance_score"])
     
     try:
-        # Build base query
-        query = select(Proposal)
-        conditions = []
-        
-        # Add search conditions based on type
-        if type == SearchType.FULLTEXT:
-            # Full-text search using PostgreSQL's text search
-            search_condition = func.to_tsvector('german', Proposal.full_content_text).match(q)
-            conditions.append(search_condition)
-        elif type == SearchType.SEMANTIC:
-            # TODO: Implement semantic search using embeddings
-            # For now, fall back to simple text matching
-            logger.warning("Semantic search not yet implemented, falling back to text search")
-            search_condition = or_(
-                Proposal.title.ilike(f"%{q}%"),
-                Proposal.full_content_text.ilike(f"%{q}%"),
-                Proposal.summary.ilike(f"%{q}%")
-            )
-            conditions.append(search_condition)
-        else:  # HYBRID
-            # Combine full-text and simple text search
-            search_condition = or_(
-                func.to_tsvector('german', Proposal.full_content_text).match(q),
-                Proposal.title.ilike(f"%{q}%"),
-                Proposal.summary.ilike(f"%{q}%")
-            )
-            conditions.append(search_condition)
+        last_modified, collection_count = await collection_version(db)
+        etag = make_etag("search", last_modified, collection_count, query_fingerprint(request))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        set_validators(response, etag, last_modified)
         
-        # Add filters
-        if status:
-            conditions.append(Proposal.status == status.value)
+        # Identical concurrent searches run once; the ETag covers the
+        # normalized parameters and the collection version
+        outcome = await search_flights.do(etag, lambda: cached_search(
+            db, last_modified, collection_count,
+            q, type, limit, offset, status, date_from, date_to,
+            tags, tag_match, category, submitting_organization, selected,
+        ))
+        total = outcome["total"]
+        degraded_reason = outcome["degraded_reason"]
         
-        if date_from:
-            conditions.append(Proposal.submitted_date >= date_from)
+        if settings.ANALYTICS_ENABLED:
+            search_analytics.record(
+                q,
+                type.value,
+                filters={
+                    name: value
+                    for name, value in (
+                        ("status", status.value if status else None),
+                        ("date_from", date_from),
+                        ("date_to", date_to),
+                        ("tags", tags),
+                        ("tag_match", tag_match.value if len(tags) > 1 else None),
+                        ("category", category),
+                        ("submitting_organization", submitting_organization),
+                    )
+                    if value
+                },
+                result_count=total,
+                latency=time.time() - start_time,
+                degraded=degraded_reason is not None,
+            )
         
-        if date_to:
-            conditions.append(Proposal.submitted_date <= date_to)
+        if selected:
+            sparse = TimedJSONResponse(content=jsonable_encoder({
+                "query": q,
+                "type": type,
+                "count": len(outcome["results"]),
+                "total": total,
+                "results": outcome["results"],
+                "took": time.time() - start_time,
+                "degraded": degraded_reason is not None,
+                "degraded_reason": degraded_reason,
+            }))
+            if degraded_reason is None:
+                set_validators(sparse, etag, last_modified)
+            return sparse
         
-        if tags:
-            # Check if any of the provided tags match
-            tag_conditions = [Proposal.tags.any(tag) for tag in tags]
-            conditions.append(or_(*tag_conditions))
+        execution_time = time.time() - start_time
         
-        if category:
-            conditions.append(Proposal.category.ilike(f"%{category}%"))
+        if degraded_reason is not None:
+            # Don't let clients revalidate a degraded result once AI is back
+            for header in ("ETag", "Last-Modified"):
+                if header in response.headers:
+                    del response.headers[header]
+            response.headers["Cache-Control"] = "no-store"
         
-        if submitting_organization:
-            conditions.append(Proposal.submitting_organization.ilike(f"%{submitting_organization}%"))
+        return SearchResponse(
+            query=q,
+            type=type,
+            count=len(outcome["results"]),
+            total=total,
+            results=outcome["results"],
+            took=execution_time,
+            degraded=degraded_reason is not None,
+            degraded_reason=degraded_reason
+        )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
+
+
+async def cached_search(db: AsyncSession, last_modified: Optional[datetime], collection_count: int, *params) -> dict:
+    """
+    Run ``_execute_search`` with ``params`` through the Redis response cache.
+    
+    Degraded outcomes are not cached, so full results return with the AI
+    provider. Used by the cache warmer for frequent queries.
+    """
+    key = search_key(last_modified, collection_count, jsonable_encoder(params))
+    outcome = await get_json(key)
+    if outcome is None:
+        outcome = await _execute_search(db, *params)
+        if outcome["degraded_reason"] is None:
+            await set_json(key, outcome)
+    return outcome
+
+
+async def _execute_search(
+    db: AsyncSession,
+    q: str,
+    type: SearchType,
+    limit: int,
+    offset: int,
+    status: Optional[ProposalStatus],
+    date_from: Optional[str],
+    date_to: Optional[str],
+    tags: List[str],
+    tag_match: TagMatch,
+    category: Optional[str],
+    submitting_organization: Optional[str],
+    selected: Optional[List[str]],
+) -> dict:
+    """
+    Run a search and return its JSON-compatible outcome (total, results, degraded_reason).
+    
+    Results are ``ProposalSummary`` dicts, or the selected fields when
+    ``selected`` is set. The outcome may be shared by coalesced requests
+    and must not be mutated.
+    """
+    # Build base query
+    query = select(Proposal)
+    conditions = []
+    parsed = parse_query(q)
+    scores: Dict = {}
+    
+    # AI ranking; degrade to lexical search if the provider is unavailable (NFR-006)
+    query_embedding = None
+    degraded_reason = None
+    if type in (SearchType.SEMANTIC, SearchType.HYBRID):
+        try:
+            query_embedding = await embed_query(q)
+        except AIUnavailableError as e:
+            degraded_reason = e.reason
+            logger.warning(f"Degrading {type.value} search to lexical: {e.reason}")
+    
+    lexical_condition = or_(
+        fulltext_condition(parsed.tsquery),
+        Proposal.title.ilike(f"%{q}%"),
+        Proposal.summary.ilike(f"%{q}%")
+    )
+    
+    # Add search conditions based on type
+    if type == SearchType.FULLTEXT:
+        # Full-text search (phrases, AND/OR/NOT) using PostgreSQL's text search
+        search_condition = fulltext_condition(parsed.tsquery)
+        conditions.append(search_condition)
+    elif type == SearchType.SEMANTIC and query_embedding is not None:
+        # Rank by cosine similarity; only embedded proposals can match
+        conditions.append(Proposal.embedding.isnot(None))
+    else:  # HYBRID, or degraded SEMANTIC
+        # Lexical match (full-text plus title/summary), re-ranked by
+        # semantic similarity when an embedding is available
+        conditions.append(lexical_condition)
+    
+    # Add filters
+    if status:
+        conditions.append(Proposal.status == status.value)
+    
+    if date_from:
+        conditions.append(Proposal.submitted_date >= date_from)
+    
+    if date_to:
+        conditions.append(Proposal.submitted_date <= date_to)
+    
+    keys = tag_keys(tags)
+    if keys:
+        # Normalized keys, matched with && / @> on the GIN index
+        if tag_match == TagMatch.ALL:
+            conditions.append(Proposal.tag_keys.contains(keys))
+        else:
+            conditions.append(Proposal.tag_keys.overlap(keys))
+    
+    if category:
+        conditions.append(Proposal.category.ilike(f"%{category}%"))
+    
+    if submitting_organization:
+        conditions.append(Proposal.submitting_organization.ilike(f"%{submitting_organization}%"))
+    
+    use_vector_index = (
+        type == SearchType.SEMANTIC
+        and query_embedding is not None
+        and settings.VECTOR_BACKEND == "numpy"
+        # Tag and organization filters are only available in SQL
+        and not tags
+        and not submitting_organization
+        # Maps a new generation if there is one (file I/O, off the event loop)
+        and await asyncio.to_thread(vector_index.reload) is not None
+    )
+    
+    if use_vector_index:
+        # Exact in-process top-k with metadata filters applied as masks
+        try:
+            with span(RANK):
+                hits, total = await asyncio.to_thread(
+                    vector_index.search,
+                    query_embedding,
+                    offset + limit,
+                    status=status.value if status else None,
+                    category=category,
+                    date_from=datetime.fromisoformat(date_from) if date_from else None,
+                    date_to=datetime.fromisoformat(date_to) if date_to else None,
+                )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date filter, expected YYYY-MM-DD")
+        
+        scores = dict(hits[offset:])
+        proposals = []
+        if scores:
+            result = await db.execute(
+                select(Proposal)
+                .options(*load_options(selected or SUMMARY_FIELDS))
+                .where(Proposal.id.in_(list(scores)))
+            )
+            proposals = sorted(result.scalars().all(), key=lambda p: -scores[p.id])
+    else:
         # Apply all conditions
         if conditions:
             query = query.where(and_(*conditions))
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
+        if (
+            type == SearchType.SEMANTIC
+            and query_embedding is not None
+            and settings.VECTOR_SEARCH_MODE == "two_stage"
+        ):
+            # First stage on binary codes (HNSW index), exact cosine rerank below
+            candidates = candidate_count(offset + limit, settings.VECTOR_OVERSAMPLING)
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {min(max(candidates, 40), 1000)}"))
+            shortlist = (
+                select(Proposal.id)
+                .where(and_(*conditions))
+                .order_by(hamming_distance(Proposal.embedding, query_embedding))
+                .limit(candidates)
+            )
+            query = query.where(Proposal.id.in_(shortlist))
+        
+        # Get total count (counts ids only instead of wrapping the full row select)
+        count_query = select(func.count(Proposal.id))
+        if conditions:
+            count_query = count_query.where(and_(*conditions))
         total_result = await db.execute(count_query)
         total = total_result.scalar()
         
-        # Apply pagination and ordering
-        query = query.order_by(Proposal.created_at.desc()).offset(offset).limit(limit)
-        
-        # Execute query
-        result = await db.execute(query)
-        proposals = result.scalars().all()
+        # Apply column narrowing and ordering
+        query = query.options(*load_options(selected or SUMMARY_FIELDS))
+        if query_embedding is not None:
+            distance = Proposal.embedding.cosine_distance(query_embedding)
+            query = query.add_columns(distance.label("distance")).order_by(distance)
+        else:
+            query = query.order_by(Proposal.created_at.desc())
         
-        # Convert to response format
-        proposal_summaries = []
+        # Apply pagination and execute query
+        result = await db.execute(query.offset(offset).limit(limit))
+        if query_embedding is not None:
+            proposals = []
+            for proposal, distance in result.all():
+                if distance is not None:
+                    scores[proposal.id] = 1.0 - distance
+                proposals.append(proposal)
+        else:
+            proposals = result.scalars().all()
+    
+    if selected:
+        results = []
         for proposal in proposals:
-            summary = ProposalSummary(
+            extra = {"relevance_score": scores.get(proposal.id, 1.0)}  # TODO: Lexical relevance score
+            if "summary" in selected:
+                extra["summary"] = card_summary(proposal)
+            results.append(serialize_fields(proposal, selected, **extra))
+    else:
+        results = [
+            ProposalSummary(
                 id=proposal.id,
                 title=proposal.title,
                 proposal_number=proposal.proposal_number,
-                summary=proposal.summary[:200] + "..." if proposal.summary and len(proposal.summary) > 200 else proposal.summary,
+                summary=card_summary(proposal),
                 submitted_date=proposal.submitted_date,
                 status=proposal.status,
                 tags=proposal.tags or [],
-                relevance_score=1.0  # TODO: Calculate actual relevance score
+                relevance_score=scores.get(proposal.id, 1.0)  # TODO: Lexical relevance score
             )
-            proposal_summaries.append(summary)
-        
-        execution_time = time.time() - start_time
-        
-        return SearchResponse(
-            query=q,
-            type=type,
-            count=len(proposal_summaries),
-            total=total,
-            results=proposal_summaries,
-            took=execution_time
-        )
-        
-    except Exception as e:
-        logger.error(f"Search error: {e}")
-        raise HTTPException(status_code=500, detail="Search failed")
+            for proposal in proposals
+        ]
+    
+    return {
+        "total": total,
+        "results": jsonable_encoder(results),
+        "degraded_reason": degraded_reason,
+    }
 
 
 @router.get("/similar/{proposal_id}")
@@ -174,7 +409,7 @@ async def find_similar_proposals(
                 Proposal.id != proposal_id,
                 or_(
                     Proposal.category == proposal.category,
-                    Proposal.tags.overlap(proposal.tags or []),
+                    Proposal.tag_keys.overlap(proposal.tag_keys or []),
                     func.similarity(Proposal.title, proposal.title) > 0.3
                 )
             )
@@ -0,0 +1,47 @@
+"""
+Tag endpoints (tag dictionary and suggestions).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from ....database import get_db
+from ....services.tags import suggest_tags, top_tags
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("")
+async def list_tags(
+    limit: int = Query(50, ge=1, le=500, description="Maximum tags"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the most used tags with their usage counts.
+    """
+    try:
+        return await top_tags(db, limit)
+    
+    except Exception as e:
+        logger.error(f"Error listing tags: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve tags")
+
+
+@router.get("/suggest")
+async def get_tag_suggestions(
+    q: str = Query(..., min_length=1, max_length=100, description="Tag prefix"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum suggestions"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Suggest tags starting with a prefix, most used first.
+    
+    Matching ignores case and diacritics ("okol" suggests "Ökologie").
+    """
+    try:
+        return await suggest_tags(db, q, limit)
+    
+    except Exception as e:
+        logger.error(f"Error suggesting tags: {e}")
+        raise HTTPException(status_code=500, detail="Failed to suggest tags")
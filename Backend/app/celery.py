@@ -1,9 +1,64 @@
 """
 Celery configuration for background tasks.
+
+Work is split into two lanes so bulk imports cannot starve interactive
+single-document uploads:
+
+- interactive: ``pdf_processing`` / ``ai_processing`` (default routes)
+- bulk: ``pdf_processing.bulk`` / ``ai_processing.bulk``
+
+Each lane is served by its own worker profile (see ``app.worker``) with
+separate concurrency and prefetch settings. Within a queue, tasks are
+ordered by priority (0 = highest).
+
+Periodic maintenance (analytics rollups, backfills, tag recounts) is
+scheduled by a single beat process (``python -m app.worker beat``).
 """
 from celery import Celery
+from kombu import Queue
 from .config import settings
 
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Task queues per lane
+LANE_QUEUES = {
+    INTERACTIVE: {
+        "app.tasks.process_pdf": "pdf_processing",
+        "app.tasks.reprocess_document": "pdf_processing",
+        "app.tasks.generate_embeddings": "ai_processing",
+        "app.tasks.summarize_proposals": "ai_processing",
+        "app.tasks.summarize_pending": "ai_processing",
+    },
+    BULK: {
+        "app.tasks.process_pdf": "pdf_processing.bulk",
+        "app.tasks.reprocess_document": "pdf_processing.bulk",
+        "app.tasks.generate_embeddings": "ai_processing.bulk",
+        "app.tasks.summarize_proposals": "ai_processing.bulk",
+        "app.tasks.summarize_pending": "ai_processing.bulk",
+    },
+}
+
+# Default priority per lane (Redis transport: lower value = served first)
+LANE_PRIORITY = {
+    INTERACTIVE: 0,
+    BULK: 6,
+}
+
+# Worker profiles: queues consumed, pool size and prefetch per lane
+WORKER_PROFILES = {
+    INTERACTIVE: {
+        "queues": ["pdf_processing", "ai_processing", "celery"],
+        "concurrency": settings.CELERY_INTERACTIVE_CONCURRENCY,
+        "prefetch_multiplier": settings.CELERY_INTERACTIVE_PREFETCH,
+    },
+    BULK: {
+        "queues": ["pdf_processing.bulk", "ai_processing.bulk"],
+        "concurrency": settings.CELERY_BULK_CONCURRENCY,
+        "prefetch_multiplier": settings.CELERY_BULK_PREFETCH,
+    },
+}
+
 # Create Celery app
 celery_app = Celery(
     "akta",
@@ -22,13 +77,44 @@ celery_app.conf.update(
     task_track_started=True,
     task_acks_late=True,
     worker_prefetch_multiplier=1,
+    # Expire results so Redis does not fill up with finished task metadata
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+    # Priority support on the Redis transport
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "queue_order_strategy": "priority",
+    },
+    task_default_priority=LANE_PRIORITY[INTERACTIVE],
 )
 
-# Task routing
+# Task queues
+celery_app.conf.task_queues = [
+    Queue(queue)
+    for profile in WORKER_PROFILES.values()
+    for queue in profile["queues"]
+]
+
+# Task routing (interactive lane by default)
 celery_app.conf.task_routes = {
-    "app.tasks.process_pdf": {"queue": "pdf_processing"},
-    "app.tasks.generate_embeddings": {"queue": "ai_processing"},
+    task: {"queue": queue}
+    for task, queue in LANE_QUEUES[INTERACTIVE].items()
+}
+
+# Periodic tasks; runs that are not picked up within their interval expire
+# instead of piling up while workers are down
+BEAT_SCHEDULE = {
+    "rollup-search-analytics": ("app.tasks.rollup_search_analytics", settings.BEAT_ANALYTICS_ROLLUP_INTERVAL),
+    "summarize-pending": ("app.tasks.summarize_pending", settings.BEAT_BACKFILL_INTERVAL),
+    "sweep-embeddings": ("app.tasks.sweep_embeddings", settings.BEAT_BACKFILL_INTERVAL),
+    "index-near-duplicates": ("app.tasks.index_near_duplicates", settings.BEAT_BACKFILL_INTERVAL),
+    "rebuild-tags": ("app.tasks.rebuild_tags", settings.BEAT_TAG_REBUILD_INTERVAL),
+}
+
+celery_app.conf.beat_schedule = {
+    name: {"task": task, "schedule": interval, "options": {"expires": interval}}
+    for name, (task, interval) in BEAT_SCHEDULE.items()
 }
 
 if __name__ == "__main__":
-    celery_app.start()
\ No newline at end of file
+    celery_app.start()
@@ -20,6 +20,12 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "akta_password"
     POSTGRES_DB: str = "akta_db"
     POSTGRES_PORT: int = 5432
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    
+    # Startup: "development" creates extensions/tables on boot, "production"
+    # only verifies the Alembic revision and pre-warms the connection pool
+    STARTUP_MODE: str = "development"
+    DB_POOL_PREWARM: int = 5  # connections opened at startup in production mode
     
     @property
     def DATABASE_URL(self) -> str:
@@ -31,19 +37,100 @@ class Settings(BaseSettings):
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Celery Configuration (interactive vs bulk lanes)
+    CELERY_RESULT_EXPIRES: int = 60 * 60  # seconds task results are kept in Redis
+    CELERY_INTERACTIVE_CONCURRENCY: int = 4
+    CELERY_INTERACTIVE_PREFETCH: int = 1
+    CELERY_BULK_CONCURRENCY: int = 2
+    CELERY_BULK_PREFETCH: int = 4
+    QUEUE_MAX_DEPTH_INTERACTIVE: int = 100  # producers back off above this depth
+    QUEUE_MAX_DEPTH_BULK: int = 5000
+    
+    # Periodic tasks (celery beat: python -m app.worker beat)
+    BEAT_ANALYTICS_ROLLUP_INTERVAL: int = 15 * 60  # seconds between search analytics rollups
+    BEAT_BACKFILL_INTERVAL: int = 5 * 60  # seconds between backfill sweeps (summaries, embeddings, signatures)
+    BEAT_TAG_REBUILD_INTERVAL: int = 24 * 3600  # seconds between tag dictionary recounts
+    
     # AI Configuration
     GOOGLE_API_KEY: Optional[str] = None
     GEMINI_MODEL: str = "gemini-pro"
+    GEMINI_EMBEDDING_MODEL: str = "models/embedding-001"
+    AI_PROVIDER: str = "gemini"  # "gemini" or "fake" (local provider for offline tests)
+    AI_REQUEST_TIMEOUT: float = 1.5  # seconds; request-path budget for AI calls
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures before the breaker opens
+    CIRCUIT_RESET_TIMEOUT: float = 30.0  # seconds before a half-open trial call
+    FAKE_AI_LATENCY: float = 0.0  # fault injection for the fake provider (seconds)
+    FAKE_AI_FAILURE_RATE: float = 0.0  # fault injection for the fake provider (0-1)
+    
+    # Proposal extraction
+    EXTRACTION_BACKEND: str = "gemini"  # "gemini" or "rules" (local, no AI)
+    EXTRACTION_BATCH_TOKENS: int = 6000  # page text per prompt (estimated tokens)
+    EXTRACTION_CONCURRENCY: int = 4  # batches in flight per document
+    EXTRACTION_CACHE_TTL: int = 30 * 24 * 3600  # seconds
+    
+    # Summary precomputation (background only)
+    SUMMARY_BATCH_SIZE: int = 20  # proposals per summary task
+    SUMMARY_CONCURRENCY: int = 4  # summaries in flight per task
+    SUMMARY_MAX_ATTEMPTS: int = 5  # failed attempts before a proposal is left until its content changes
+    SUMMARY_RETRY_DELAY: int = 900  # seconds before retrying a failed summary, doubled per failure
+    
+    # Re-embedding after edits
+    EMBEDDING_DEBOUNCE: int = 30  # seconds; a burst of edits enqueues one job
+    EMBEDDING_SWEEP_MIN_AGE: int = 10 * 60  # seconds before the sweep re-queues a proposal still without embedding
+    
+    # Search analytics
+    ANALYTICS_ENABLED: bool = True
+    ANALYTICS_BATCH_SIZE: int = 200  # events per INSERT
+    ANALYTICS_FLUSH_INTERVAL: float = 5.0  # seconds
+    ANALYTICS_MAX_BUFFER: int = 10000  # events held in memory before dropping
+    
+    # Caching and cache warming
+    CACHE_TTL: int = 300  # seconds; stats/facets cache (keys are versioned)
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_CONCURRENCY: int = 3  # DB sessions used by the warmer
+    WARMUP_PROPOSALS: int = 200  # most viewed proposals, topped up with recently created/edited ones
+    WARMUP_QUERIES: int = 50  # most frequent queries of the last week
+    
+    # Near-duplicate detection (MinHash/LSH)
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8  # estimated Jaccard similarity to link as a version
+    
+    # Corpus reindexing (python -m app.reindex)
+    REINDEX_WORKERS: int = 4
+    REINDEX_BATCH_SIZE: int = 50  # proposals per batch (one provider call for embeddings)
+    
+    # Archive snapshots (python -m app.snapshot)
+    SNAPSHOT_WORKERS: int = 4  # parallel connections for dump, restore and index rebuilds
+    SNAPSHOT_CHUNK_ROWS: int = 20000  # proposals per chunk file
+    SNAPSHOT_COMPRESSION_LEVEL: int = 3  # gzip level (1 fastest, 9 smallest)
     
     # Search Configuration
     EMBEDDING_DIMENSION: int = 768
     MAX_SEARCH_RESULTS: int = 100
     DEFAULT_SEARCH_RESULTS: int = 20
+    VECTOR_BACKEND: str = "pgvector"  # "pgvector" or "numpy" (memory-mapped in-process index)
+    VECTOR_INDEX_DIR: str = "vector_index"
+    VECTOR_INDEX_REFRESH_INTERVAL: float = 30.0  # seconds
+    VECTOR_SEARCH_MODE: str = "exact"  # "exact" or "two_stage" (binary-quantized prefilter, exact rerank)
+    VECTOR_OVERSAMPLING: int = 10  # two-stage candidates per requested result
+    
+    # Single-flight coalescing of identical concurrent searches and query embeddings
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_REDIS: bool = False  # also coalesce across workers via a Redis lock
+    SINGLEFLIGHT_TIMEOUT: float = 3.0  # seconds a follower waits for the leader before running itself
+    SINGLEFLIGHT_RESULT_TTL: float = 2.0  # seconds a leader's result stays readable by other workers
     
     # File Upload Configuration
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     UPLOAD_DIR: str = "uploads"
     ALLOWED_EXTENSIONS: set = {".pdf", ".txt"}
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes buffered per disk write
+    UPLOAD_SESSION_TTL: int = 24 * 3600  # seconds before an idle resumable upload is discarded
+    
+    # Page store (extracted page text and layout, written once per document)
+    PAGE_STORE_DIR: str = "uploads/.pages"
+    OCR_LANGUAGE: str = "deu"
+    OCR_DPI: int = 300
+    OCR_MIN_TEXT_CHARS: int = 20  # pages with less text-layer text are OCR'd
     
     # CORS Configuration
     BACKEND_CORS_ORIGINS: list = [
@@ -53,6 +140,34 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5173",
     ]
     
+    # Admission Control (per route class: search, crud, ingest)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_SEARCH_CONCURRENCY: int = 10
+    ADMISSION_CRUD_CONCURRENCY: int = 16
+    ADMISSION_INGEST_CONCURRENCY: int = 4
+    ADMISSION_SEARCH_QUEUE_SIZE: int = 50
+    ADMISSION_CRUD_QUEUE_SIZE: int = 100
+    ADMISSION_INGEST_QUEUE_SIZE: int = 10
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0  # seconds a request may wait for a slot
+    
+    # Rate Limiting (token bucket per route group and client, "<count>/<period>")
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_SEARCH: str = "30/minute"
+    RATE_LIMIT_READ: str = "300/minute"
+    RATE_LIMIT_WRITE: str = "60/minute"
+    RATE_LIMIT_INGEST: str = "10/minute"
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # Use X-Forwarded-For behind a proxy
+    RATE_LIMIT_TRUSTED_PROXIES: int = 1  # proxies appending to X-Forwarded-For; the client is the entry the outermost one added
+    RATE_LIMIT_API_KEYS: str = ""  # comma-separated X-API-Key values given their own bucket (others are keyed by address)
+    
+    # Request timing and profiling
+    SERVER_TIMING_ENABLED: bool = True  # Server-Timing header with db/embedding/cache/rank/encode spans
+    PROFILING_TOKEN: Optional[str] = None  # X-Profile-Token granting request profiling (off if unset)
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests profiled and stored automatically
+    PROFILING_INTERVAL: float = 0.001  # seconds between profiler samples
+    PROFILE_DIR: str = "profiles"
+    PROFILE_KEEP: int = 200  # stored profiles kept (newest)
+    
     # Security
     SECRET_KEY: str = "akta-secret-key-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
@@ -0,0 +1,232 @@
+"""
+Admission control and load shedding.
+
+Requests are grouped into route classes (search, crud, ingest). Each class has
+its own concurrency limit and a bounded FIFO wait queue with a deadline, so a
+burst of expensive searches cannot exhaust the database pool for everyone
+else. When a class is saturated, requests are rejected early with
+503 + Retry-After instead of all timing out together.
+"""
+from collections import deque
+from typing import Deque, Dict, Optional
+import asyncio
+import logging
+import math
+import time
+
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH = "search"
+CRUD = "crud"
+INGEST = "ingest"
+
+
+class RouteClassLimiter:
+    """
+    Concurrency limiter with a bounded, deadline-aware wait queue.
+
+    Slots are handed directly from a finishing request to the oldest waiter,
+    so queued requests are served in arrival order.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Exponentially weighted moving average of service time (seconds)
+        self._avg_service_time = 0.05
+
+        # Counters
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.rejected_timeout = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """Estimate how long a newly queued request would wait for a slot."""
+        return self._avg_service_time * (self.queued + 1) / self.max_concurrency
+
+    def retry_after(self) -> int:
+        """Suggested Retry-After value in whole seconds."""
+        return max(1, math.ceil(self.estimated_wait()))
+
+    async def acquire(self) -> bool:
+        """
+        Try to acquire a slot.
+
+        Returns:
+            True if the request was admitted, False if it should be shed.
+        """
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+
+        # Shed immediately if the request would miss its deadline anyway
+        if self.estimated_wait() > self.queue_timeout:
+            self.rejected_deadline += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_total += 1
+
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away while waiting; give back a slot we may have received
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._remove_waiter(waiter)
+            raise
+
+        if not done:
+            self._remove_waiter(waiter)
+            self.rejected_timeout += 1
+            return False
+
+        # The slot was handed over by release(); _active already accounts for it
+        self.admitted += 1
+        return True
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """Release a slot, handing it to the oldest live waiter if any."""
+        if service_time is not None:
+            self._avg_service_time = 0.9 * self._avg_service_time + 0.1 * service_time
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._active -= 1
+
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        waiter.cancel()
+
+    def snapshot(self) -> dict:
+        """Export limiter state for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "queued": self.queued,
+            "avg_service_time": round(self._avg_service_time, 6),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+
+class AdmissionController:
+    """Maps requests to route classes and owns one limiter per class."""
+
+    def __init__(self, api_prefix: str = settings.API_V1_STR):
+        self.api_prefix = api_prefix
+        self.limiters: Dict[str, RouteClassLimiter] = {
+            SEARCH: RouteClassLimiter(
+                SEARCH,
+                settings.ADMISSION_SEARCH_CONCURRENCY,
+                settings.ADMISSION_SEARCH_QUEUE_SIZE,
+                settings.ADMISSION_QUEUE_TIMEOUT,
+            ),
+            CRUD: RouteClassLimiter(
+                CRUD,
+                settings.ADMISSION_CRUD_CONCURRENCY,
+                settings.ADMISSION_CRUD_QUEUE_SIZE,
+                settings.ADMISSION_QUEUE_TIMEOUT,
+            ),
+            INGEST: RouteClassLimiter(
+                INGEST,
+                settings.ADMISSION_INGEST_CONCURRENCY,
+                settings.ADMISSION_INGEST_QUEUE_SIZE,
+                settings.ADMISSION_QUEUE_TIMEOUT,
+            ),
+        }
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        """Return the route class for a request, or None if it is not limited."""
+        if method == "OPTIONS" or not path.startswith(self.api_prefix):
+            return None
+
+        route = path[len(self.api_prefix):]
+        if route.startswith(("/docs", "/redoc", "/openapi.json")):
+            return None
+        if route.startswith("/search"):
+            return SEARCH
+        if route.startswith(("/uploads", "/ingest")):
+            return INGEST
+        return CRUD
+
+    def snapshot(self) -> dict:
+        return {name: limiter.snapshot() for name, limiter in self.limiters.items()}
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying admission control to API requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiters[route_class]
+        if not await limiter.acquire():
+            logger.warning(f"Shedding {scope['method']} {scope['path']} ({route_class} saturated)")
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service overloaded, please retry later"},
+                headers={"Retry-After": str(limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        start_time = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.monotonic() - start_time)
+
+
+# Global controller instance
+admission_controller = AdmissionController()
@@ -0,0 +1,78 @@
+"""
+Small JSON cache in Redis for derived collection data (stats, facets) and
+API responses (full proposal details, search outcomes).
+
+Keys embed the collection version (or the proposal's ``updated_at``), so
+entries never serve stale data after a write; the TTL only bounds how long
+superseded versions linger. Cache failures fall through to the loader.
+"""
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+import hashlib
+import json
+import logging
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..schemas.proposal import ProposalResponse
+from .conditional import collection_version
+from .redis_client import get_redis
+from .timing import CACHE, span
+
+logger = logging.getLogger(__name__)
+
+
+async def versioned_key(db: AsyncSession, name: str) -> str:
+    """Cache key for ``name`` at the current collection version."""
+    last_modified, count = await collection_version(db)
+    version = hashlib.sha1(f"{last_modified}|{count}".encode("utf-8")).hexdigest()[:16]
+    return f"cache:{name}:{version}"
+
+
+def proposal_key(proposal_id, updated_at: datetime) -> str:
+    """Cache key for a full proposal response at one version."""
+    return f"cache:proposal:{proposal_id}:{updated_at.isoformat()}"
+
+
+def search_key(last_modified: Optional[datetime], count: int, params: Any) -> str:
+    """Cache key for a search outcome at the current collection version."""
+    digest = hashlib.sha1(repr((last_modified, count, params)).encode("utf-8")).hexdigest()[:32]
+    return f"cache:search:{digest}"
+
+
+def proposal_payload(proposal) -> dict:
+    """JSON body of a full proposal response."""
+    return jsonable_encoder(ProposalResponse.model_validate(proposal))
+
+
+async def get_json(key: str) -> Any:
+    """Return the cached JSON value for ``key``, or None on a miss or failure."""
+    try:
+        with span(CACHE):
+            cached = await get_redis().get(key)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+async def set_json(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    """Store a JSON value under ``key`` (failures are logged)."""
+    try:
+        with span(CACHE):
+            await get_redis().setex(key, ttl or settings.CACHE_TTL, json.dumps(value, default=str))
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def get_or_set_json(key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None) -> Any:
+    """Return the cached JSON value for ``key``, computing and storing it on a miss."""
+    cached = await get_json(key)
+    if cached is not None:
+        return cached
+
+    value = await loader()
+    await set_json(key, value, ttl)
+    return value
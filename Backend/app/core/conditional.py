@@ -0,0 +1,106 @@
+"""
+HTTP conditional request helpers (ETag / Last-Modified).
+
+Validators are computed from cheap version queries (a single proposal's
+``updated_at`` or the collection's ``max(updated_at)`` plus row count) so a
+matching ``If-None-Match`` can be answered with 304 before any rows are
+loaded or serialized.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.proposal import Proposal
+
+# Clients must revalidate, but may keep the cached body
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the given version parts."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def has_conditional_headers(request: Request) -> bool:
+    """Check whether the request carries revalidation headers."""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current validators.
+
+    If-Modified-Since is only consulted when If-None-Match is absent (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: ignore the W/ prefix on both sides
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        current = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have second resolution
+        return current.replace(microsecond=0) <= since
+
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Attach validators and cache policy to a response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Build an empty 304 response carrying the validators."""
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+async def proposal_version(db: AsyncSession, proposal_id) -> Optional[datetime]:
+    """Return ``updated_at`` of a single proposal, or None if it does not exist."""
+    result = await db.execute(select(Proposal.updated_at).where(Proposal.id == proposal_id))
+    return result.scalar_one_or_none()
+
+
+def query_fingerprint(request: Request) -> str:
+    """Order-independent fingerprint of the request's query parameters."""
+    return repr(sorted(request.query_params.multi_items()))
+
+
+async def collection_version(db: AsyncSession) -> Tuple[Optional[datetime], int]:
+    """
+    Return a cheap version of the proposal collection.
+
+    ``max(updated_at)`` changes on every insert or update, and the row count
+    changes on every delete.
+    """
+    result = await db.execute(select(func.max(Proposal.updated_at), func.count(Proposal.id)))
+    last_modified, count = result.one()
+    return last_modified, count
@@ -0,0 +1,137 @@
+"""
+Sparse fieldsets (``?fields=``) for proposal endpoints.
+
+A requested fieldset narrows both the JSON payload and the SELECT list:
+only the columns backing the requested fields are loaded. The embedding
+column is deferred on the model and only loaded when explicitly requested.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import load_only, undefer
+
+from ..models.proposal import Proposal
+
+# Public field name -> ORM columns needed to produce it
+PROPOSAL_FIELD_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "id": ("id",),
+    "title": ("title",),
+    "proposal_number": ("proposal_number",),
+    "proposal_type": ("proposal_type",),
+    "full_content_text": ("full_content_text",),
+    "full_explanation_text": ("full_explanation_text",),
+    "summary": ("summary", "summary_preview"),
+    "summary_preview": ("summary_preview",),
+    "primary_author": ("primary_author",),
+    "co_authors": ("co_authors",),
+    "meeting_name": ("meeting_name",),
+    "meeting_date": ("meeting_date",),
+    "submitted_date": ("submitted_date",),
+    "decided_date": ("decided_date",),
+    "status": ("status",),
+    "votes_for": ("votes_for",),
+    "votes_against": ("votes_against",),
+    "votes_abstention": ("votes_abstention",),
+    "tags": ("tags",),
+    "category": ("category",),
+    "submitting_organization": ("submitting_organization",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+    "processing_status": ("processing_status",),
+    "processing_error": ("processing_error",),
+    "source_document_path": ("source_document_path",),
+    "source_document_page": ("source_document_page",),
+    "version_of_id": ("version_of_id",),
+    "version_similarity": ("version_similarity",),
+    "embedding": ("embedding",),
+    # Computed properties
+    "display_title": ("proposal_number", "title"),
+    "author_list": ("primary_author", "co_authors"),
+    "total_votes": ("votes_for", "votes_against", "votes_abstention"),
+    "vote_percentage_for": ("votes_for", "votes_against", "votes_abstention"),
+}
+
+# Fields available on summary endpoints (list and search)
+SUMMARY_FIELDS = ("id", "title", "proposal_number", "summary", "submitted_date", "status", "tags")
+
+SUMMARY_PREVIEW_LENGTH = 200
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated ``fields`` parameter.
+
+    Returns:
+        Ordered list of requested field names (always including ``id``),
+        or None if no fieldset was requested.
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested
+    """
+    if fields is None or not fields.strip():
+        return None
+
+    allowed = set(allowed)
+    requested = []
+    for name in (part.strip() for part in fields.split(",")):
+        if name and name not in requested:
+            requested.append(name)
+
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+        )
+
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+
+def load_options(fields: Iterable[str]) -> list:
+    """Build loader options restricting the SELECT list to the given fields."""
+    columns = []
+    for name in fields:
+        for column in PROPOSAL_FIELD_COLUMNS.get(name, ()):
+            if column not in columns:
+                columns.append(column)
+
+    options = [load_only(*(getattr(Proposal, column) for column in columns))]
+    if "embedding" in columns:
+        options.append(undefer(Proposal.embedding))
+    return options
+
+
+def truncate_summary(summary: Optional[str]) -> Optional[str]:
+    """Shorten a summary for list and search results."""
+    if summary and len(summary) > SUMMARY_PREVIEW_LENGTH:
+        return summary[:SUMMARY_PREVIEW_LENGTH] + "..."
+    return summary
+
+
+def card_summary(proposal: Proposal) -> Optional[str]:
+    """Summary shown on list and search result cards (precomputed preview if available)."""
+    return proposal.summary_preview or truncate_summary(proposal.summary)
+
+
+def serialize_fields(proposal: Proposal, fields: Iterable[str], **extra: Any) -> Dict[str, Any]:
+    """
+    Serialize only the given fields of a proposal.
+
+    Keyword arguments override or add values (e.g. a truncated summary or a
+    relevance score) for fields present in ``fields``.
+    """
+    data = {}
+    for name in fields:
+        if name in extra:
+            data[name] = extra[name]
+        elif name == "embedding":
+            embedding = proposal.embedding
+            data[name] = [float(value) for value in embedding] if embedding is not None else None
+        elif name == "tags":
+            data[name] = proposal.tags or []
+        else:
+            data[name] = getattr(proposal, name)
+    return jsonable_encoder(data)
@@ -0,0 +1,151 @@
+"""
+Opt-in statistical profiling of single requests.
+
+A request carrying ``X-Profile: return`` or ``X-Profile: store`` and a valid
+``X-Profile-Token`` (``PROFILING_TOKEN``; profiling is off while it is unset)
+runs under a sampling profiler (pyinstrument, async-aware, so only this
+request's task is attributed). ``return`` replaces the response with the
+HTML profile; ``store`` writes it to ``PROFILE_DIR`` and names it in the
+``X-Profile-Id`` response header. ``PROFILING_SAMPLE_RATE`` additionally
+stores profiles of a random fraction of requests.
+
+One request is profiled at a time per process; others run unprofiled.
+"""
+from typing import List, Optional
+import asyncio
+import hmac
+import logging
+import os
+import random
+import time
+import uuid
+
+from fastapi.responses import HTMLResponse
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+RETURN = "return"
+STORE = "store"
+
+PROFILE_SUFFIX = ".html"
+
+
+def token_valid(token: Optional[str]) -> bool:
+    """Whether a token grants access to profiling (always False while ``PROFILING_TOKEN`` is unset)."""
+    if not settings.PROFILING_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), settings.PROFILING_TOKEN.encode("utf-8"))
+
+
+def _make_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logger.warning("Profiling requested but pyinstrument is not installed")
+        return None
+    return Profiler(interval=settings.PROFILING_INTERVAL, async_mode="enabled")
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        if name.endswith(PROFILE_SUFFIX):
+            stat = os.stat(os.path.join(settings.PROFILE_DIR, name))
+            profiles.append({"id": name[:-len(PROFILE_SUFFIX)], "size": stat.st_size, "created_at": stat.st_mtime})
+    profiles.sort(key=lambda profile: profile["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None for unknown or malformed ids."""
+    if not profile_id or os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(settings.PROFILE_DIR, profile_id + PROFILE_SUFFIX)
+    return path if os.path.isfile(path) else None
+
+
+def _store(profile_id: str, html: str) -> None:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILE_DIR, profile_id + PROFILE_SUFFIX), "w", encoding="utf-8") as f:
+        f.write(html)
+    # Keep the newest PROFILE_KEEP profiles
+    for profile in list_profiles()[settings.PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(settings.PROFILE_DIR, profile["id"] + PROFILE_SUFFIX))
+        except OSError:
+            pass
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running requested or sampled requests under the profiler."""
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    def _mode(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(b"x-profile", b"").decode("latin-1").lower()
+        if requested in (RETURN, STORE):
+            token = headers.get(b"x-profile-token", b"").decode("latin-1")
+            if token_valid(token):
+                return requested
+            logger.warning(f"Rejected profiling request for {scope['path']}: invalid token")
+            return None
+        if settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return STORE
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_TOKEN or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._mode(scope)
+        profiler = _make_profiler() if mode else None
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status = {}
+
+        async def send_profiled(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if mode == STORE:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", profile_id.encode("latin-1"))
+                    ]
+            if mode == STORE:
+                await send(message)
+
+        self._busy = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            profiler.stop()
+            self._busy = False
+
+        html = profiler.output_html()
+        logger.info(
+            f"Profiled {scope['method']} {scope['path']} as {profile_id} "
+            f"({profiler.last_session.duration * 1000:.0f} ms)"
+        )
+        if mode == RETURN:
+            response = HTMLResponse(html, headers={
+                "X-Profile-Id": profile_id,
+                "X-Profiled-Status": str(status.get("code", "")),
+            })
+            await response(scope, receive, send)
+            return
+        try:
+            await asyncio.to_thread(_store, profile_id, html)
+        except OSError as e:
+            logger.error(f"Failed to store profile {profile_id}: {e}")
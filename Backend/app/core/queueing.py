@@ -0,0 +1,179 @@
+"""
+Producer-side task enqueueing with lane selection and backpressure.
+
+Before a task is sent, the depth of its target queue is read from the Redis
+broker. Above the lane's limit, producers either get a 429 with Retry-After
+or, when a periodic sweep finds the work again from the database, defer it.
+
+Debounced tasks run once after a quiet period: the first enqueue for a key
+schedules the task with a countdown, and later ones are dropped until the
+task clears the key when it starts.
+"""
+from typing import List, Optional
+import asyncio
+import logging
+
+from fastapi import HTTPException
+
+from ..celery import BULK, INTERACTIVE, LANE_PRIORITY, LANE_QUEUES, celery_app
+from ..config import settings
+from .redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+LANE_MAX_DEPTH = {
+    INTERACTIVE: settings.QUEUE_MAX_DEPTH_INTERACTIVE,
+    BULK: settings.QUEUE_MAX_DEPTH_BULK,
+}
+
+# Priority steps configured on the Redis transport (see app/celery.py)
+_PRIORITY_STEPS = celery_app.conf.broker_transport_options.get("priority_steps", [0])
+_PRIORITY_SEP = celery_app.conf.broker_transport_options.get("sep", ":")
+
+DEBOUNCE_PREFIX = "debounce:"
+DEBOUNCE_GRACE = 3600  # seconds a debounce key outlives its delay if the task never starts
+
+
+class QueueFullError(Exception):
+    """Raised when a queue is above its backpressure limit."""
+
+    def __init__(self, queue: str, depth: int, limit: int):
+        super().__init__(f"Queue {queue} is full ({depth} >= {limit})")
+        self.queue = queue
+        self.depth = depth
+        self.limit = limit
+
+
+def _queue_keys(queue: str) -> List[str]:
+    return [queue if not step else f"{queue}{_PRIORITY_SEP}{step}" for step in _PRIORITY_STEPS]
+
+
+async def queue_depth(queue: str) -> int:
+    """Number of messages waiting in a broker queue (all priority levels)."""
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for key in _queue_keys(queue):
+            pipe.llen(key)
+        lengths = await pipe.execute()
+    return sum(lengths)
+
+
+def queue_room_sync(task, lane: str) -> int:
+    """Messages that fit in a task's queue before its lane's depth limit (blocking; for Celery tasks)."""
+    queue = LANE_QUEUES[lane].get(task.name, "celery")
+    with get_sync_redis().pipeline(transaction=False) as pipe:
+        for key in _queue_keys(queue):
+            pipe.llen(key)
+        depth = sum(pipe.execute())
+    return max(0, LANE_MAX_DEPTH[lane] - depth)
+
+
+async def enqueue(task, *args, lane: str = INTERACTIVE, countdown: Optional[float] = None, **kwargs):
+    """
+    Send a task to its queue in the given lane, applying backpressure.
+    
+    ``countdown`` delays execution by that many seconds.
+
+    Raises:
+        QueueFullError: If the target queue is above the lane's depth limit
+    """
+    queue = LANE_QUEUES[lane].get(task.name, "celery")
+    limit = LANE_MAX_DEPTH[lane]
+
+    try:
+        depth = await queue_depth(queue)
+    except Exception as e:
+        # Depth unknown; the broker may still accept the task
+        logger.warning(f"Could not read depth of {queue}: {e}")
+        depth = 0
+
+    if depth >= limit:
+        raise QueueFullError(queue, depth, limit)
+
+    return await asyncio.to_thread(
+        task.apply_async,
+        args=args,
+        kwargs=kwargs,
+        queue=queue,
+        priority=LANE_PRIORITY[lane],
+        countdown=countdown,
+    )
+
+
+async def enqueue_or_429(task, *args, lane: str = INTERACTIVE, **kwargs):
+    """Enqueue a task, translating backpressure into 429 Too Many Requests."""
+    try:
+        return await enqueue(task, *args, lane=lane, **kwargs)
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=429,
+            detail="Processing queue is full, please retry later",
+            headers={"Retry-After": "30"},
+        )
+
+
+async def enqueue_or_defer(task, *args, lane: str = INTERACTIVE, **kwargs) -> Optional[object]:
+    """
+    Enqueue a task, or skip it when the queue is full.
+
+    Only use for work a periodic sweep finds again from the database
+    (``sweep_embeddings`` for proposals without an embedding,
+    ``summarize_pending`` for proposals without a summary).
+
+    Returns:
+        The AsyncResult, or None if the task was deferred.
+    """
+    try:
+        return await enqueue(task, *args, lane=lane, **kwargs)
+    except QueueFullError as e:
+        logger.info(f"Deferring {task.name}: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Failed to enqueue {task.name}: {e}")
+        return None
+
+
+async def enqueue_debounced(task, *args, key: str, delay: float, lane: str = INTERACTIVE, **kwargs) -> bool:
+    """
+    Enqueue a task to run after ``delay`` seconds, unless one is already pending for ``key``.
+    
+    The task must call ``clear_debounce(key)`` before it reads its input, so
+    changes made while it runs schedule another run. Full queues defer the
+    task like ``enqueue_or_defer`` and release the key, so callers must have
+    persisted the dirty state for a sweep to find.
+    
+    Returns:
+        True if a task was enqueued, False if one was pending or it was deferred.
+    """
+    redis_key = f"{DEBOUNCE_PREFIX}{key}"
+    try:
+        if not await get_redis().set(redis_key, 1, nx=True, ex=int(delay) + DEBOUNCE_GRACE):
+            return False
+    except Exception as e:
+        # Without Redis, enqueue every time rather than never
+        logger.warning(f"Could not debounce {task.name}: {e}")
+    
+    if await enqueue_or_defer(task, *args, lane=lane, countdown=delay, **kwargs) is not None:
+        return True
+    try:
+        await get_redis().delete(redis_key)
+    except Exception:
+        pass
+    return False
+
+
+def claim_debounce_sync(key: str, ttl: float) -> bool:
+    """Take a debounce key unless a task is already pending for it (blocking; for sweeps)."""
+    try:
+        return bool(get_sync_redis().set(f"{DEBOUNCE_PREFIX}{key}", 1, nx=True, ex=int(ttl) + DEBOUNCE_GRACE))
+    except Exception as e:
+        logger.warning(f"Could not debounce {key}: {e}")
+        return True
+
+
+def clear_debounce(key: str) -> None:
+    """Release a debounce key (called by the task when it starts; blocking)."""
+    try:
+        get_sync_redis().delete(f"{DEBOUNCE_PREFIX}{key}")
+    except Exception as e:
+        logger.warning(f"Could not clear debounce key {key}: {e}")
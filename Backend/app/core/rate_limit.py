@@ -0,0 +1,229 @@
+"""
+Distributed rate limiting backed by Redis.
+
+Each (route group, client) pair gets a token bucket stored in Redis and
+updated atomically by a Lua script, so limits hold across uvicorn workers
+and API replicas. The script uses the Redis server clock, so replicas with
+skewed clocks still agree on refill timing.
+"""
+from typing import Dict, Optional, Tuple
+import hashlib
+import logging
+import math
+
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+SEARCH = "search"
+READ = "read"
+WRITE = "write"
+INGEST = "ingest"
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS[1] = bucket key
+# ARGV[1] = capacity, ARGV[2] = refill rate (tokens/second), ARGV[3] = cost
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """
+    Parse a rate specification such as "30/minute".
+
+    Returns:
+        Tuple of (bucket capacity, refill rate in tokens per second)
+    """
+    count, _, period = spec.partition("/")
+    seconds = _PERIODS.get(period.strip().rstrip("s"))
+    if seconds is None:
+        raise ValueError(f"Invalid rate limit period in '{spec}'")
+    capacity = int(count)
+    return capacity, capacity / seconds
+
+
+class RateLimitResult:
+    """Outcome of a single rate limit check."""
+
+    def __init__(self, allowed: bool, limit: int, remaining: float, retry_after: float, reset: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset = reset
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, math.floor(self.remaining))),
+            "X-RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimiter:
+    """Token bucket rate limiter keyed by route group and client."""
+
+    def __init__(self, api_prefix: str = settings.API_V1_STR):
+        self.api_prefix = api_prefix
+        self.rules: Dict[str, Tuple[int, float]] = {
+            SEARCH: parse_rate(settings.RATE_LIMIT_SEARCH),
+            READ: parse_rate(settings.RATE_LIMIT_READ),
+            WRITE: parse_rate(settings.RATE_LIMIT_WRITE),
+            INGEST: parse_rate(settings.RATE_LIMIT_INGEST),
+        }
+        # Digests of the keys allowed their own bucket
+        self._api_keys = {
+            hashlib.sha256(key.strip().encode("utf-8")).hexdigest()
+            for key in settings.RATE_LIMIT_API_KEYS.split(",")
+            if key.strip()
+        }
+        self._script = None
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        """Return the route group for a request, or None if it is not limited."""
+        if method == "OPTIONS" or not path.startswith(self.api_prefix):
+            return None
+
+        route = path[len(self.api_prefix):]
+        if route.startswith(("/docs", "/redoc", "/openapi.json")):
+            return None
+        if route.startswith("/search"):
+            return SEARCH
+        if route.startswith(("/uploads", "/ingest")):
+            return INGEST
+        if method in ("GET", "HEAD"):
+            return READ
+        return WRITE
+
+    def client_key(self, scope) -> str:
+        """
+        Identify the client by a configured API key if present, otherwise by address.
+
+        Unknown API keys are ignored, so rotating the header cannot mint new
+        buckets. Behind proxies, the address is the ``X-Forwarded-For`` entry
+        appended by the outermost trusted proxy; entries further left are
+        client-controlled.
+        """
+        headers = dict(scope.get("headers") or [])
+
+        api_key = headers.get(b"x-api-key")
+        if api_key:
+            digest = hashlib.sha256(api_key).hexdigest()
+            if digest in self._api_keys:
+                return "key:" + digest[:16]
+
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = headers.get(b"x-forwarded-for")
+            if forwarded:
+                hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",") if hop.strip()]
+                if len(hops) >= settings.RATE_LIMIT_TRUSTED_PROXIES > 0:
+                    return "ip:" + hops[-settings.RATE_LIMIT_TRUSTED_PROXIES]
+
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def hit(self, group: str, client: str, cost: int = 1) -> RateLimitResult:
+        """Consume tokens from the bucket for (group, client)."""
+        capacity, rate = self.rules[group]
+        if self._script is None:
+            self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+
+        allowed, tokens, retry_after = await self._script(
+            keys=[f"ratelimit:{group}:{client}"],
+            args=[capacity, rate, cost],
+        )
+        tokens = float(tokens)
+        return RateLimitResult(
+            allowed=bool(int(allowed)),
+            limit=capacity,
+            remaining=tokens,
+            retry_after=float(retry_after),
+            reset=(capacity - tokens) / rate,
+        )
+
+
+class RateLimitMiddleware:
+    """ASGI middleware enforcing rate limits and adding rate limit headers."""
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = self.limiter.classify(scope["method"], scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = self.limiter.client_key(scope)
+        try:
+            result = await self.limiter.hit(group, client)
+        except Exception as e:
+            # Fail open: an unavailable Redis must not take the API down
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if not result.allowed:
+            logger.info(f"Rate limited {client} on {group}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded"},
+                headers=result.headers(),
+            )
+            await response(scope, receive, send)
+            return
+
+        extra_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in result.headers().items()
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + extra_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
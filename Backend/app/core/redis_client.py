@@ -0,0 +1,58 @@
+"""
+Shared Redis clients (async for the API, sync for Celery tasks).
+"""
+from typing import Optional
+import logging
+
+import redis
+from redis import asyncio as aioredis
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+_sync_redis: Optional[redis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Get the process-wide Redis client (created lazily)."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+    return _redis
+
+
+def get_sync_redis() -> redis.Redis:
+    """Get the process-wide blocking Redis client (for Celery tasks)."""
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=1.0,
+            socket_connect_timeout=1.0,
+        )
+    return _sync_redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client."""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+
+
+async def check_redis_health() -> bool:
+    """Check Redis health."""
+    try:
+        return bool(await get_redis().ping())
+    except Exception as e:
+        logger.error(f"Redis health check failed: {e}")
+        return False
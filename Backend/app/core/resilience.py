@@ -0,0 +1,172 @@
+"""
+Resilience primitives for AI-backed paths.
+
+- ``backoff_delay``: jittered exponential backoff for task retries, so a
+  provider outage does not cause synchronized retry storms
+- ``CircuitBreaker``: breaker whose state lives in Redis, shared by all API
+  workers, replicas and Celery workers. While open, callers skip the
+  provider entirely (the API degrades to lexical search, tasks back off).
+"""
+from typing import Optional
+import logging
+import random
+
+from ..config import settings
+from .redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the breaker is open."""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+
+
+def backoff_delay(retries: int, base: float = 5.0, cap: float = 600.0) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        retries: Number of retries already attempted
+        base: Delay scale for the first retry (seconds)
+        cap: Maximum delay (seconds)
+    """
+    return random.uniform(0, min(cap, base * (2 ** retries)))
+
+
+# KEYS[1] = breaker hash; ARGV[1] = reset timeout (s)
+# Returns the state the caller should act on: closed, open or half_open
+# (half_open admits exactly one trial call per reset window).
+_ALLOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'closed' then
+    return 'closed'
+end
+local opened_at = tonumber(redis.call('HGET', KEYS[1], 'opened_at') or '0')
+if now - opened_at >= tonumber(ARGV[1]) then
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'opened_at', now)
+    return 'half_open'
+end
+return 'open'
+"""
+
+# KEYS[1] = breaker hash; ARGV[1] = 1 success / 0 failure, ARGV[2] = threshold
+_RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+if ARGV[1] == '1' then
+    redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0)
+    return 'closed'
+end
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'half_open' or failures >= tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now)
+    return 'open'
+end
+return state
+"""
+
+
+class CircuitBreaker:
+    """
+    Redis-backed circuit breaker.
+
+    Use ``allow``/``record_*`` from async code and the ``*_sync`` variants
+    from Celery tasks. If Redis itself is unavailable the breaker stays
+    closed, so the provider is still tried.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.key = f"circuit:{name}"
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._async_scripts = None
+        self._sync_scripts = None
+
+    def _scripts(self, sync: bool):
+        if sync:
+            if self._sync_scripts is None:
+                client = get_sync_redis()
+                self._sync_scripts = (client.register_script(_ALLOW_SCRIPT), client.register_script(_RECORD_SCRIPT))
+            return self._sync_scripts
+        if self._async_scripts is None:
+            client = get_redis()
+            self._async_scripts = (client.register_script(_ALLOW_SCRIPT), client.register_script(_RECORD_SCRIPT))
+        return self._async_scripts
+
+    async def allow(self) -> bool:
+        """Check whether a call may go to the provider."""
+        allow_script, _ = self._scripts(sync=False)
+        try:
+            state = await allow_script(keys=[self.key], args=[self.reset_timeout])
+        except Exception as e:
+            logger.warning(f"Circuit '{self.name}' state unavailable: {e}")
+            return True
+        return state != OPEN
+
+    async def record_success(self) -> None:
+        await self._record(True)
+
+    async def record_failure(self) -> None:
+        await self._record(False)
+
+    async def _record(self, success: bool) -> None:
+        _, record_script = self._scripts(sync=False)
+        try:
+            state = await record_script(keys=[self.key], args=[int(success), self.failure_threshold])
+        except Exception as e:
+            logger.warning(f"Circuit '{self.name}' state unavailable: {e}")
+            return
+        if not success and state == OPEN:
+            logger.warning(f"Circuit '{self.name}' opened")
+
+    def allow_sync(self) -> bool:
+        """Blocking variant of allow() for Celery tasks."""
+        allow_script, _ = self._scripts(sync=True)
+        try:
+            return allow_script(keys=[self.key], args=[self.reset_timeout]) != OPEN
+        except Exception as e:
+            logger.warning(f"Circuit '{self.name}' state unavailable: {e}")
+            return True
+
+    def record_sync(self, success: bool) -> None:
+        """Blocking variant of record_success()/record_failure() for Celery tasks."""
+        _, record_script = self._scripts(sync=True)
+        try:
+            state = record_script(keys=[self.key], args=[int(success), self.failure_threshold])
+        except Exception as e:
+            logger.warning(f"Circuit '{self.name}' state unavailable: {e}")
+            return
+        if not success and state == OPEN:
+            logger.warning(f"Circuit '{self.name}' opened")
+
+    async def state(self) -> Optional[str]:
+        """Current state for monitoring (None if unknown)."""
+        try:
+            return await get_redis().hget(self.key, "state") or CLOSED
+        except Exception:
+            return None
+
+
+# Breakers for the AI provider
+embedding_breaker = CircuitBreaker(
+    "embeddings",
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+)
+llm_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+)
@@ -0,0 +1,193 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the loader, the others (followers) await its result or
+exception. Followers wait at most ``timeout`` seconds; after that, or if
+the leader is cancelled, they run the loader themselves, so a stuck leader
+delays them but never blocks them. Shared results are the same object for
+every caller and must not be mutated.
+
+With ``SINGLEFLIGHT_REDIS`` the leader also takes a Redis lock
+(``SET NX PX``, expiring after ``timeout``) and publishes its result as
+JSON for ``SINGLEFLIGHT_RESULT_TTL``, so identical work in other workers
+polls for that result instead of repeating it. Loaders must then return
+JSON-compatible values. Errors are not shared across workers, and Redis
+failures fall through to local execution.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from ..config import settings
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Polling interval bounds (seconds) while waiting for another worker's result
+_POLL_MIN = 0.01
+_POLL_MAX = 0.1
+
+# KEYS[1] = lock; ARGV[1] = token. Deletes the lock only if this leader still holds it.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key within the process and, optionally, across workers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._release_script = None
+
+        # Counters
+        self.executed = 0
+        self.coalesced = 0
+        self.remote_hits = 0
+        self.timed_out = 0
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``loader`` once for all concurrent callers with the same ``key``.
+
+        Args:
+            key: Identity of the work (any string; hashed for Redis)
+            loader: Coroutine function doing the work
+            timeout: Seconds a follower waits before running the loader itself
+                (default ``SINGLEFLIGHT_TIMEOUT``)
+        """
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await loader()
+        timeout = settings.SINGLEFLIGHT_TIMEOUT if timeout is None else timeout
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            return await self._follow(flight, loader, timeout)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            value = await self._lead(key, loader, timeout)
+        except Exception as e:
+            flight.set_exception(e)
+            # Retrieved here so a flight without followers is not logged as unhandled
+            flight.exception()
+            raise
+        except BaseException:
+            # Cancelled leader: followers run the loader themselves
+            flight.cancel()
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def _follow(self, flight: asyncio.Future, loader: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        self.coalesced += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            logger.warning(f"Single-flight '{self.name}' leader exceeded {timeout}s, running locally")
+        except asyncio.CancelledError:
+            if not flight.cancelled():
+                raise
+        return await self._execute(loader)
+
+    async def _execute(self, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self.executed += 1
+        return await loader()
+
+    async def _lead(self, key: str, loader: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        if not settings.SINGLEFLIGHT_REDIS:
+            return await self._execute(loader)
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        lock_key = f"singleflight:{self.name}:{digest}:lock"
+        result_key = f"singleflight:{self.name}:{digest}:result"
+        token = uuid.uuid4().hex
+        redis = get_redis()
+        try:
+            cached = await redis.get(result_key)
+            if cached is not None:
+                self.remote_hits += 1
+                return json.loads(cached)
+            acquired = await redis.set(lock_key, token, nx=True, px=max(1, int(timeout * 1000)))
+        except Exception as e:
+            logger.warning(f"Single-flight '{self.name}' lock unavailable: {e}")
+            return await self._execute(loader)
+
+        if not acquired:
+            value = await self._await_remote(lock_key, result_key, timeout)
+            if value is not _MISSING:
+                self.remote_hits += 1
+                return value
+            return await self._execute(loader)
+
+        try:
+            value = await self._execute(loader)
+            try:
+                await redis.set(result_key, json.dumps(value), px=max(1, int(settings.SINGLEFLIGHT_RESULT_TTL * 1000)))
+            except Exception as e:
+                logger.warning(f"Single-flight '{self.name}' result not published: {e}")
+            return value
+        finally:
+            try:
+                if self._release_script is None:
+                    self._release_script = redis.register_script(_RELEASE_SCRIPT)
+                await self._release_script(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Single-flight '{self.name}' lock not released: {e}")
+
+    async def _await_remote(self, lock_key: str, result_key: str, timeout: float) -> Any:
+        """Poll for another worker's result until it appears, its lock is gone, or ``timeout``."""
+        deadline = time.monotonic() + timeout
+        interval = _POLL_MIN
+        redis = get_redis()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+            interval = min(_POLL_MAX, interval * 2)
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.get(result_key)
+                    pipe.exists(lock_key)
+                    cached, locked = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Single-flight '{self.name}' lock unavailable: {e}")
+                return _MISSING
+            if cached is not None:
+                return json.loads(cached)
+            if not locked:
+                # Leader failed or its lock expired without a result
+                return _MISSING
+        self.timed_out += 1
+        logger.warning(f"Single-flight '{self.name}' remote leader exceeded {timeout}s, running locally")
+        return _MISSING
+
+    def snapshot(self) -> dict:
+        """Export coalescing counters for monitoring."""
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "remote_hits": self.remote_hits,
+            "timed_out": self.timed_out,
+        }
+
+
+# Coalescers for the search hot path
+search_flights = SingleFlight("search")
+embedding_flights = SingleFlight("embedding")
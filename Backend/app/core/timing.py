@@ -0,0 +1,123 @@
+"""
+Per-request timing spans reported in a ``Server-Timing`` header.
+
+Hot paths wrap their work in ``span(name)``; durations and counts are summed
+per name in a context variable set by ``ServerTimingMiddleware``, so spans
+cost two clock reads and a dict update, and nothing outside a request.
+Database statements are timed by engine events (``instrument_engine``) and
+JSON rendering by ``TimedJSONResponse``.
+
+Example header::
+
+    Server-Timing: db;dur=12.4;desc="3 queries", embedding;dur=85.0, encode;dur=1.2, total;dur=101.3
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+# Span name -> [seconds, count] for the current request
+_spans: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("timing_spans", default=None)
+
+DB = "db"
+EMBEDDING = "embedding"
+CACHE = "cache"
+RANK = "rank"
+ENCODE = "encode"
+
+
+def add_span(name: str, seconds: float) -> None:
+    """Add a measured duration to the current request's spans (no-op outside a request)."""
+    spans = _spans.get()
+    if spans is None:
+        return
+    entry = spans.get(name)
+    if entry is None:
+        spans[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block (sync or async code) as ``name``."""
+    if _spans.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+
+def server_timing(spans: Dict[str, List[float]], total: float) -> str:
+    """Format spans and the total duration as a Server-Timing header value."""
+    metrics = []
+    for name, (seconds, count) in spans.items():
+        metric = f"{name};dur={seconds * 1000:.1f}"
+        if count > 1:
+            metric += f';desc="{int(count)} calls"'
+        metrics.append(metric)
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement executed on an (async) engine as a ``db`` span."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_timing_start", None)
+        if start is not None:
+            add_span(DB, time.perf_counter() - start)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response whose rendering is timed as an ``encode`` span."""
+
+    def render(self, content) -> bytes:
+        with span(ENCODE):
+            return super().render(content)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware collecting spans per request and adding ``Server-Timing`` and ``X-Process-Time``."""
+
+    def __init__(self, app, enabled: bool = True):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: Dict[str, List[float]] = {}
+        token = _spans.set(spans if self.enabled else None)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(total).encode("latin-1")))
+                if self.enabled:
+                    headers.append((b"server-timing", server_timing(spans, total).encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _spans.reset(token)
@@ -4,20 +4,29 @@ Database configuration and session management.
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+import asyncio
 import logging
+import os
 
 from .config import settings
+from .core.timing import instrument_engine
 
 logger = logging.getLogger(__name__)
 
-# Create async engine
+# Create async engine (a larger asyncpg prepared statement cache keeps the
+# bounded set of search statement shapes prepared on every connection)
 engine = create_async_engine(
-    settings.DATABASE_URL,
+    make_url(settings.DATABASE_URL).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_PREPARED_STATEMENT_CACHE_SIZE)}
+    ),
     echo=False,  # Set to True for SQL logging
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
 )
+instrument_engine(engine)
 
 # Create session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -28,6 +37,18 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Engine for Celery tasks: each task runs its own event loop (asyncio.run),
+# so connections must not be pooled across tasks
+task_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+TaskSessionLocal = async_sessionmaker(
+    task_engine,
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -51,6 +72,52 @@ async def init_db():
         raise
 
 
+def get_alembic_head() -> str:
+    """Get the head revision from the Alembic migration scripts."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+async def verify_db_revision():
+    """
+    Verify the database schema is at the Alembic head revision.
+    
+    Used instead of init_db() in production, so workers never run DDL
+    (and never contend for DDL locks) while booting.
+    """
+    expected = get_alembic_head()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = set(result.scalars().all())
+    except Exception as e:
+        logger.error(f"Could not read Alembic revision: {e}")
+        raise
+    
+    if expected not in current:
+        raise RuntimeError(
+            f"Database revision {sorted(current) or 'none'} does not match head {expected}; "
+            f"run 'alembic upgrade head' before starting"
+        )
+    logger.info(f"Database schema at revision {expected}")
+
+
+async def prewarm_pool(connections: int):
+    """Open pool connections up front so first requests skip connection setup."""
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    # Held concurrently, so the pool has to open distinct connections
+    await asyncio.gather(*(ping() for _ in range(connections)))
+    logger.info(f"Pre-warmed {connections} database connections")
+
+
 async def get_db() -> AsyncSession:
     """Dependency to get database session."""
     async with AsyncSessionLocal() as session:
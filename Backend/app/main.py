@@ -5,13 +5,26 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
-import time
 from datetime import datetime
 
 from .config import settings
-from .database import init_db, check_db_health
+from .database import init_db, check_db_health, prewarm_pool, verify_db_revision
 from .api.v1.api import api_router
+from .core.admission import AdmissionControlMiddleware, admission_controller
+from .core.profiling import ProfilingMiddleware
+from .core.queueing import queue_depth
+from .core.rate_limit import RateLimitMiddleware, rate_limiter
+from .core.redis_client import check_redis_health, close_redis
+from .core.resilience import embedding_breaker, llm_breaker
+from .core.singleflight import embedding_flights, search_flights
+from .core.timing import ServerTimingMiddleware, TimedJSONResponse
+from .services.analytics import search_analytics
+from .services.summaries import summary_metrics
+from .services.warmup import warm_caches
+from .celery import WORKER_PROFILES
+from .services.vector_index import run_refresh_loop
 from .schemas.proposal import HealthResponse
 
 # Configure logging
@@ -25,16 +38,46 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting AKTA API...")
     try:
-        await init_db()
-        logger.info("Database initialized successfully")
+        if settings.STARTUP_MODE == "production":
+            await verify_db_revision()
+            await prewarm_pool(settings.DB_POOL_PREWARM)
+        else:
+            await init_db()
+            logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    # Keep the shared in-process vector index up to date
+    refresh_task = None
+    if settings.VECTOR_BACKEND == "numpy":
+        refresh_task = asyncio.create_task(run_refresh_loop(settings.VECTOR_INDEX_REFRESH_INTERVAL))
+    
+    # Flush buffered search analytics in the background
+    analytics_task = None
+    if settings.ANALYTICS_ENABLED:
+        analytics_task = asyncio.create_task(search_analytics.run())
+    
+    # Warm caches in the background so startup is not delayed
+    warmup_task = None
+    if settings.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warm_caches())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AKTA API...")
+    if refresh_task is not None:
+        refresh_task.cancel()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if analytics_task is not None:
+        analytics_task.cancel()
+        try:
+            await analytics_task
+        except asyncio.CancelledError:
+            pass
+    await close_redis()
 
 
 # Create FastAPI application
@@ -46,8 +89,19 @@ app = FastAPI(
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
     lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
 )
 
+# Add admission control middleware (added before CORS so shed responses
+# still carry CORS headers)
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# Add rate limiting middleware (runs before admission control so rejected
+# clients never occupy a slot)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -55,18 +109,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-RateLimit-Limit",
+        "X-RateLimit-Remaining",
+        "X-RateLimit-Reset",
+        "Retry-After",
+        "Server-Timing",
+        "X-Process-Time",
+        "X-Profile-Id",
+    ],
 )
 
 
-# Add request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request, call_next):
-    """Add processing time to response headers."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Add profiling middleware (opt-in per request, see app/core/profiling.py)
+app.add_middleware(ProfilingMiddleware)
+
+# Add request timing middleware (outermost, so spans cover the whole request;
+# X-Process-Time is kept for existing clients)
+app.add_middleware(ServerTimingMiddleware, enabled=settings.SERVER_TIMING_ENABLED)
 
 
 # Include API routes
@@ -89,9 +149,7 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     db_healthy = await check_db_health()
-    
-    # TODO: Add Redis health check
-    redis_healthy = True  # Placeholder
+    redis_healthy = await check_redis_health()
     
     status = "healthy" if db_healthy and redis_healthy else "unhealthy"
     
@@ -106,6 +164,69 @@ async def health_check():
     )
 
 
+# Admission control state endpoint
+@app.get("/health/admission")
+async def admission_state():
+    """Export admission control state for monitoring."""
+    return {
+        "enabled": settings.ADMISSION_CONTROL_ENABLED,
+        "route_classes": admission_controller.snapshot(),
+    }
+
+
+# Single-flight coalescing state endpoint
+@app.get("/health/singleflight")
+async def singleflight_state():
+    """Export request coalescing counters for monitoring."""
+    return {
+        "enabled": settings.SINGLEFLIGHT_ENABLED,
+        "redis": settings.SINGLEFLIGHT_REDIS,
+        "flights": {flights.name: flights.snapshot() for flights in (search_flights, embedding_flights)},
+    }
+
+
+# Task queue depth endpoint
+@app.get("/health/queues")
+async def queue_state():
+    """Export Celery queue depths per lane for monitoring."""
+    try:
+        return {
+            lane: {queue: await queue_depth(queue) for queue in profile["queues"]}
+            for lane, profile in WORKER_PROFILES.items()
+        }
+    except Exception as e:
+        logger.error(f"Queue depth check failed: {e}")
+        raise HTTPException(status_code=503, detail="Broker unavailable")
+
+
+# Circuit breaker state endpoint
+@app.get("/health/circuits")
+async def circuit_state():
+    """Export AI provider circuit breaker states for monitoring."""
+    return {
+        "provider": settings.AI_PROVIDER,
+        "circuits": {breaker.name: await breaker.state() for breaker in (embedding_breaker, llm_breaker)},
+    }
+
+
+# Summary pipeline metrics endpoint
+@app.get("/health/summaries")
+async def summary_state():
+    """Export summary precomputation throughput for monitoring."""
+    try:
+        return await summary_metrics()
+    except Exception as e:
+        logger.error(f"Summary metrics check failed: {e}")
+        raise HTTPException(status_code=503, detail="Metrics unavailable")
+
+
+# Search analytics sink endpoint
+@app.get("/health/analytics")
+async def analytics_state():
+    """Export search analytics sink counters for monitoring."""
+    return {"enabled": settings.ANALYTICS_ENABLED, **search_analytics.snapshot()}
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
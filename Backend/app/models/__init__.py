@@ -1,5 +1,19 @@
 # Backend/app/models/__init__.py
 """Data models for AKTA"""
 from .proposal import Proposal
+from .analytics import SearchEvent, SearchQueryDaily
+from .near_duplicate import ProposalLSHBucket, ProposalSignature
+from .tag import TagDictionary
+from .reindex import ReindexPartition, ReindexRun, ReindexShadow
 
-__all__ = ["Proposal"]
+__all__ = [
+    "Proposal",
+    "SearchEvent",
+    "SearchQueryDaily",
+    "ReindexRun",
+    "ReindexPartition",
+    "ReindexShadow",
+    "ProposalSignature",
+    "ProposalLSHBucket",
+    "TagDictionary",
+]
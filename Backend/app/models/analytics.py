@@ -0,0 +1,47 @@
+"""
+Search analytics data models.
+"""
+from sqlalchemy import BigInteger, Boolean, Column, Date, DateTime, Float, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class SearchEvent(Base):
+    """
+    One executed search (raw log, written in batches by the analytics sink).
+    """
+    __tablename__ = "search_events"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    query = Column(Text, nullable=False)
+    search_type = Column(String(20), nullable=False)
+    filters = Column(JSONB)
+    result_count = Column(Integer, nullable=False)
+    latency_ms = Column(Float, nullable=False)
+    zero_result = Column(Boolean, nullable=False)
+    degraded = Column(Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f"<SearchEvent(id={self.id}, query='{self.query[:50]}', results={self.result_count})>"
+
+
+class SearchQueryDaily(Base):
+    """
+    Daily rollup of search events per normalized query and search type.
+    """
+    __tablename__ = "search_query_daily"
+    
+    day = Column(Date, primary_key=True)
+    query = Column(Text, primary_key=True)  # lower-cased, whitespace-normalized
+    search_type = Column(String(20), primary_key=True)
+    searches = Column(Integer, nullable=False)
+    zero_results = Column(Integer, nullable=False)
+    avg_latency_ms = Column(Float, nullable=False)
+    max_latency_ms = Column(Float, nullable=False)
+    avg_result_count = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<SearchQueryDaily(day={self.day}, query='{self.query[:50]}', searches={self.searches})>"
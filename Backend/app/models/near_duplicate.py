@@ -0,0 +1,39 @@
+"""
+Near-duplicate detection models (MinHash signatures and LSH buckets).
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class ProposalSignature(Base):
+    """
+    MinHash signature of a proposal's title and text.
+    """
+    __tablename__ = "proposal_signatures"
+    
+    proposal_id = Column(UUID(as_uuid=True), ForeignKey("proposals.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)  # NUM_PERM little-endian uint32 values
+    shingle_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ProposalSignature(proposal_id={self.proposal_id}, shingles={self.shingle_count})>"
+
+
+class ProposalLSHBucket(Base):
+    """
+    One LSH band bucket of a proposal; proposals sharing a bucket are candidates.
+    """
+    __tablename__ = "proposal_lsh_buckets"
+    
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)  # 64-bit hash of the band's signature values
+    proposal_id = Column(
+        UUID(as_uuid=True), ForeignKey("proposals.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    
+    def __repr__(self):
+        return f"<ProposalLSHBucket(band={self.band}, bucket={self.bucket}, proposal_id={self.proposal_id})>"
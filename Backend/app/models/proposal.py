@@ -1,70 +1,139 @@
 """
 Proposal data model.
+
+A proposal is stored in three tables with the same primary key:
+
+- ``proposals``: narrow row with the columns used for filtering, sorting
+  and result lists (kept small enough to stay in shared buffers)
+- ``proposal_contents``: full texts, generated summary and processing error
+- ``proposal_vectors``: the embedding
+
+``Proposal`` is mapped to the outer join of the three tables, so the ORM API
+is the same as for a single table: the unit of work inserts and deletes one
+row per table and updates only the tables whose columns changed. Queries
+that only touch narrow columns let Postgres drop the joins entirely.
+
+Bulk ``update(Proposal)`` statements cannot target the join; use
+``proposal_updates`` instead.
 """
-from sqlalchemy import Column, String, Text, DateTime, ARRAY, Float
-from sqlalchemy.dialects.postgresql import UUID
+from typing import List
+import uuid
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table, Text, DateTime, ARRAY, Float, case, event, inspect, literal_column, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.orm import column_property, deferred, object_session
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
-import uuid
 
+from ..config import settings
 from ..database import Base
+from .tag import TagDictionary, normalize_tag, tag_keys
 
 
-class Proposal(Base):
-    """
-    Proposal model representing a political proposal.
-    """
-    __tablename__ = "proposals"
+proposals_table = Table(
+    "proposals",
+    Base.metadata,
     
     # Primary key
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    Column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
     
     # Basic proposal information
-    title = Column(String(500), nullable=False, index=True)
-    proposal_number = Column(String(50), unique=True, index=True)
-    proposal_type = Column(String(100), index=True)  # e.g., "Positionsantrag", "Satzungsänderung"
-    
-    # Content
-    full_content_text = Column(Text, nullable=False)
-    full_explanation_text = Column(Text)
-    summary = Column(Text)
+    Column("title", String(500), nullable=False),
+    Column("proposal_number", String(50), unique=True, index=True),
+    Column("proposal_type", String(100), index=True),  # e.g., "Positionsantrag", "Satzungsänderung"
+    Column("summary_preview", String(300)),  # Short summary for result cards
     
     # Authorship
-    primary_author = Column(String(200))
-    co_authors = Column(ARRAY(String))
+    Column("primary_author", String(200)),
+    Column("co_authors", ARRAY(String)),
     
     # Meeting/Decision information
-    meeting_name = Column(String(200))
-    meeting_date = Column(DateTime(timezone=True))
-    submitted_date = Column(DateTime(timezone=True), index=True)
-    decided_date = Column(DateTime(timezone=True))
+    Column("meeting_name", String(200)),
+    Column("meeting_date", DateTime(timezone=True)),
+    Column("submitted_date", DateTime(timezone=True), index=True),
+    Column("decided_date", DateTime(timezone=True)),
     
     # Status and voting
-    status = Column(String(50), index=True)  # e.g., "passed", "rejected", "withdrawn", "pending"
-    votes_for = Column(Float)
-    votes_against = Column(Float)
-    votes_abstention = Column(Float)
+    Column("status", String(50), index=True),  # e.g., "passed", "rejected", "withdrawn", "pending"
+    Column("votes_for", Float),
+    Column("votes_against", Float),
+    Column("votes_abstention", Float),
     
     # Categorization and tagging
-    tags = Column(ARRAY(String), default=[])
-    category = Column(String(100), index=True)
-    submitting_organization = Column(String(200), index=True)
+    Column("tags", ARRAY(String), default=[]),
+    Column("tag_keys", postgresql.ARRAY(String), default=[]),  # normalized tags (maintained on write)
+    Column("category", String(100), index=True),
+    Column("submitting_organization", String(200), index=True),
     
-    # Source document information
-    source_document_path = Column(String(500))
-    source_document_page = Column(Float)  # Page number in source document
+    # Version chain: earliest near-duplicate this proposal resubmits or amends
+    Column("version_of_id", UUID(as_uuid=True), ForeignKey("proposals.id", ondelete="SET NULL"), index=True),
+    Column("version_similarity", Float),  # estimated Jaccard similarity to the matched version
     
-    # Search and AI features
-    embedding = Column(Vector(768))  # Vector for semantic search
-    search_vector = Column(Text)  # Full-text search vector (tsvector in PostgreSQL)
+    # Source document information
+    Column("source_document_path", String(500)),
+    Column("source_document_page", Float),  # Page number in source document
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False, index=True),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True),
     
     # Processing status
-    processing_status = Column(String(50), default="pending")  # "pending", "processing", "completed", "failed"
-    processing_error = Column(Text)
+    Column("processing_status", String(50), default="pending"),  # "pending", "processing", "completed", "failed"
+    
+    # Tag filters use && (any) and @> (all)
+    Index("ix_proposals_tag_keys", "tag_keys", postgresql_using="gin"),
+)
+
+proposal_contents_table = Table(
+    "proposal_contents",
+    Base.metadata,
+    Column("proposal_id", UUID(as_uuid=True), ForeignKey("proposals.id", ondelete="CASCADE"), primary_key=True),
+    Column("full_content_text", Text, nullable=False),
+    Column("full_explanation_text", Text),
+    Column("summary", Text),
+    Column("summary_source_hash", String(64)),  # Content hash a generated summary is based on (NULL if hand-written)
+    Column("summary_attempts", Integer, nullable=False, server_default="0"),  # Failed summary attempts since the last success or edit
+    Column("summary_retry_at", DateTime(timezone=True)),  # No new summary attempt before this time
+    Column("search_vector", Text),  # Full-text search vector (tsvector in PostgreSQL)
+    Column("processing_error", Text),
+    # Full-text search; same expression as query_parser.fulltext_condition
+    Index(
+        "ix_proposal_contents_fulltext",
+        func.to_tsvector(literal_column("'german'::regconfig"), text("full_content_text")),
+        postgresql_using="gin",
+    ),
+)
+
+proposal_vectors_table = Table(
+    "proposal_vectors",
+    Base.metadata,
+    Column("proposal_id", UUID(as_uuid=True), ForeignKey("proposals.id", ondelete="CASCADE"), primary_key=True),
+    Column("embedding", Vector(settings.EMBEDDING_DIMENSION)),  # Vector for semantic search
+    Column("embedding_source_hash", String(64)),  # Hash of the text the embedding was computed from
+)
+
+_TABLE_COLUMNS = {
+    table: {column.name for column in table.c}
+    for table in (proposal_contents_table, proposal_vectors_table)
+}
+
+
+class Proposal(Base):
+    """
+    Proposal model representing a political proposal.
+    """
+    __table__ = proposals_table.outerjoin(proposal_contents_table).outerjoin(proposal_vectors_table)
+    
+    # One attribute for the shared primary key
+    id = column_property(
+        proposals_table.c.id,
+        proposal_contents_table.c.proposal_id,
+        proposal_vectors_table.c.proposal_id,
+    )
+    
+    # Loaded only on request
+    embedding = deferred(proposal_vectors_table.c.embedding)
     
     def __repr__(self):
         return f"<Proposal(id={self.id}, title='{self.title[:50]}...', status='{self.status}')>"
@@ -95,4 +164,117 @@ class Proposal(Base):
         total = self.total_votes
         if total == 0 or not self.votes_for:
             return 0.0
-        return (self.votes_for / total) * 100
\ No newline at end of file
+        return (self.votes_for / total) * 100
+
+
+def _count_tags(connection, added: dict, removed: List[str]) -> None:
+    """
+    Apply usage count changes to the tag dictionary (added: key -> label).
+
+    One upsert in key order, so concurrent tag edits lock dictionary rows in
+    the same order and cannot deadlock. A removed key missing from the
+    dictionary gets an unused entry (count 0).
+    """
+    deltas = {key: (label, 1) for key, label in added.items()}
+    deltas.update((key, (key, -1)) for key in removed)
+    if not deltas:
+        return
+    table = TagDictionary.__table__
+    stmt = pg_insert(table).values([
+        {"key": key, "label": label, "usage_count": max(delta, 0)}
+        for key, (label, delta) in sorted(deltas.items())
+    ])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=["key"],
+        # The inserted count (1 for added, 0 for removed) tells the direction
+        set_={"usage_count": case(
+            (stmt.excluded.usage_count > 0, table.c.usage_count + 1),
+            else_=func.greatest(table.c.usage_count - 1, 0),
+        )},
+    ))
+
+
+def _stored_tag_keys(connection, proposal_id) -> List[str]:
+    """Tag keys as stored (for proposals whose tags were never loaded)."""
+    return connection.execute(
+        select(proposals_table.c.tag_keys).where(proposals_table.c.id == proposal_id)
+    ).scalar() or []
+
+
+def _labels(tags) -> dict:
+    """Normalized key -> display label (first spelling) of a tag list."""
+    labels = {}
+    for tag in tags or ():
+        key = normalize_tag(tag)
+        if key:
+            labels.setdefault(key, tag.strip())
+    return labels
+
+
+@event.listens_for(Proposal, "before_insert")
+def _index_new_tags(mapper, connection, target):
+    labels = _labels(target.tags)
+    target.tag_keys = list(labels)
+    _count_tags(connection, labels, [])
+
+
+@event.listens_for(Proposal, "before_update")
+def _index_changed_tags(mapper, connection, target):
+    history = inspect(target).attrs.tags.history
+    if not history.has_changes():
+        return
+    if history.deleted:
+        old = set(tag_keys(history.deleted[0]))
+    else:
+        # Assigned without loading the previous tags
+        old = set(_stored_tag_keys(connection, target.id))
+    labels = _labels(target.tags)
+    target.tag_keys = list(labels)
+    _count_tags(
+        connection,
+        {key: label for key, label in labels.items() if key not in old},
+        [key for key in old if key not in labels],
+    )
+
+
+@event.listens_for(Proposal, "before_delete")
+def _release_tags(mapper, connection, target):
+    state = inspect(target)
+    if "tags" in state.dict:
+        keys = tag_keys(state.dict["tags"])
+    else:
+        keys = _stored_tag_keys(connection, target.id)
+    _count_tags(connection, {}, keys)
+
+
+@event.listens_for(Proposal, "before_update")
+def _touch_updated_at(mapper, connection, target):
+    # Edits that only change content or vector columns skip the narrow row,
+    # but updated_at drives cache versions and the vector index refresh
+    session = object_session(target)
+    if session is not None and session.is_modified(target, include_collections=False):
+        target.updated_at = func.now()
+
+
+def proposal_updates(proposal_id, touch: bool = True, **values) -> List:
+    """
+    UPDATE statements setting ``values`` on the tables that hold them.
+    
+    The narrow row is always updated, so ``updated_at`` moves as it would
+    for a single-table update. Bookkeeping writes that change nothing a
+    reader sees pass ``touch=False`` to leave ``updated_at`` alone.
+    """
+    statements = []
+    for table, columns in _TABLE_COLUMNS.items():
+        table_values = {name: values.pop(name) for name in list(values) if name in columns}
+        if table_values:
+            statements.append(
+                update(table).where(table.c.proposal_id == proposal_id).values(**table_values)
+            )
+    if touch:
+        values["updated_at"] = func.now()
+    if values:
+        statements.append(
+            update(proposals_table).where(proposals_table.c.id == proposal_id).values(**values)
+        )
+    return statements
@@ -0,0 +1,60 @@
+"""
+Corpus reindex bookkeeping models.
+"""
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+
+from ..database import Base
+
+
+class ReindexRun(Base):
+    """
+    One rebuild of a derived search column for the whole corpus.
+    """
+    __tablename__ = "reindex_runs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    target = Column(String(50), nullable=False, index=True)  # "embeddings"
+    status = Column(String(20), nullable=False, default="running")  # "running", "failed", "ready", "swapped"
+    options = Column(JSONB)  # configuration the run was started with (model, dimension, batch size)
+    rows_total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+    swapped_at = Column(DateTime(timezone=True))
+    error = Column(Text)
+    
+    def __repr__(self):
+        return f"<ReindexRun(id={self.id}, target='{self.target}', status='{self.status}')>"
+
+
+class ReindexPartition(Base):
+    """
+    Keyset range of proposal ids processed by one worker, with its checkpoint.
+    """
+    __tablename__ = "reindex_partitions"
+    
+    run_id = Column(Integer, ForeignKey("reindex_runs.id", ondelete="CASCADE"), primary_key=True)
+    partition = Column(Integer, primary_key=True)
+    lower_id = Column(UUID(as_uuid=True))  # exclusive, NULL for the first partition
+    upper_id = Column(UUID(as_uuid=True))  # inclusive, NULL for the last partition
+    last_id = Column(UUID(as_uuid=True))  # checkpoint: last id written to the shadow table
+    rows_done = Column(BigInteger, nullable=False, default=0)
+    done = Column(Boolean, nullable=False, default=False)
+    
+    def __repr__(self):
+        return f"<ReindexPartition(run_id={self.run_id}, partition={self.partition}, done={self.done})>"
+
+
+class ReindexShadow(Base):
+    """
+    Rebuilt value of a derived column, kept aside until the run is swapped in.
+    """
+    __tablename__ = "reindex_shadow"
+    
+    run_id = Column(Integer, ForeignKey("reindex_runs.id", ondelete="CASCADE"), primary_key=True)
+    proposal_id = Column(UUID(as_uuid=True), primary_key=True)
+    embedding = Column(Vector())  # any dimension, the new model may differ
+    search_vector = Column(Text)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # write horizon taken before the value was read
@@ -0,0 +1,47 @@
+"""
+Tag dictionary model and tag normalization.
+"""
+from typing import Iterable, List
+import re
+import unicodedata
+
+from sqlalchemy import Column, DateTime, Index, Integer, Text
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+def normalize_tag(tag: str) -> str:
+    """Case- and diacritic-folded form of a tag ("Klimaschutz " and "klimaschütz" match)."""
+    decomposed = unicodedata.normalize("NFKD", tag)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", stripped).strip().casefold()
+
+
+def tag_keys(tags: Iterable[str]) -> List[str]:
+    """Distinct normalized keys of a tag list, in order."""
+    keys = []
+    for tag in tags or ():
+        key = normalize_tag(tag)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class TagDictionary(Base):
+    """
+    Normalized tag with its display label and number of proposals using it.
+    """
+    __tablename__ = "tag_dictionary"
+    __table_args__ = (
+        # Prefix matching (LIKE 'abc%') for suggestions
+        Index("ix_tag_dictionary_key_pattern", "key", postgresql_ops={"key": "text_pattern_ops"}),
+    )
+    
+    key = Column(Text, primary_key=True)  # normalize_tag() of the label
+    label = Column(Text, nullable=False)  # first spelling seen
+    usage_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<TagDictionary(key='{self.key}', usage_count={self.usage_count})>"
@@ -0,0 +1,105 @@
+"""
+Rebuild derived search data for the whole corpus.
+
+Usage:
+    python -m app.reindex run embeddings --dry-run
+    python -m app.reindex run embeddings [--workers 4] [--batch-size 50] [--max-rate 20] [--no-swap]
+    python -m app.reindex run embeddings --restart
+    python -m app.reindex swap <run id>
+    python -m app.reindex status
+
+``run`` resumes the latest unfinished run of the target unless ``--restart``
+is given, and swaps the new values in once all partitions are done.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from .config import settings
+from .core.redis_client import close_redis
+from .database import AsyncSessionLocal
+from .services.reindex import TARGETS, create_run, estimate, latest_run, run_options, run_reindex, run_status, swap_run
+
+
+async def _run(args) -> int:
+    target = TARGETS[args.target]
+
+    async with AsyncSessionLocal() as session:
+        if args.dry_run:
+            print(json.dumps(await estimate(session, target, args.batch_size, args.max_rate), indent=2))
+            return 0
+
+        run = None if args.restart else await latest_run(session, target)
+        if run is not None and run.options != run_options(target, args.batch_size):
+            print(
+                f"Run {run.id} was started with {run.options}; use --restart to start over "
+                f"with the current settings",
+                file=sys.stderr,
+            )
+            return 1
+        if run is None:
+            run = await create_run(session, target, args.workers * 4, args.batch_size)
+        else:
+            print(f"Resuming run {run.id} ({run.status})")
+        run_id, status = run.id, run.status
+
+    if status != "ready":
+        written = await run_reindex(AsyncSessionLocal, run_id, args.workers, args.batch_size, args.max_rate)
+        print(f"Run {run_id}: {written} proposals rebuilt")
+    if not args.no_swap:
+        swapped = await swap_run(AsyncSessionLocal, run_id)
+        print(f"Run {run_id}: {swapped} proposals swapped in")
+    return 0
+
+
+async def _swap(args) -> int:
+    try:
+        swapped = await swap_run(AsyncSessionLocal, args.run_id)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Run {args.run_id}: {swapped} proposals swapped in")
+    return 0
+
+
+async def _status(args) -> int:
+    async with AsyncSessionLocal() as session:
+        print(json.dumps(await run_status(session), indent=2, default=str))
+    return 0
+
+
+async def _main(args) -> int:
+    try:
+        return await args.handler(args)
+    finally:
+        await close_redis()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.reindex", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="rebuild a derived column (resumable)")
+    run.add_argument("target", choices=sorted(TARGETS))
+    run.add_argument("--workers", type=int, default=settings.REINDEX_WORKERS, help="parallel workers")
+    run.add_argument("--batch-size", type=int, default=settings.REINDEX_BATCH_SIZE, help="proposals per batch")
+    run.add_argument("--max-rate", type=float, default=0, help="proposals per second across workers (0: unlimited)")
+    run.add_argument("--dry-run", action="store_true", help="print a cost estimate and exit")
+    run.add_argument("--restart", action="store_true", help="start a new run instead of resuming")
+    run.add_argument("--no-swap", action="store_true", help="leave the new values in the shadow table")
+    run.set_defaults(handler=_run)
+
+    swap = commands.add_parser("swap", help="swap a ready run into the live columns")
+    swap.add_argument("run_id", type=int)
+    swap.set_defaults(handler=_swap)
+
+    status = commands.add_parser("status", help="show recent runs")
+    status.set_defaults(handler=_status)
+
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
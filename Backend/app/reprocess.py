@@ -0,0 +1,61 @@
+"""
+Re-run proposal segmentation and parsing from the page store.
+
+Stored pages are reused as-is, so no PDF is read or OCR'd again.
+
+Usage:
+    python -m app.reprocess --all
+    python -m app.reprocess <document hash> [<document hash> ...]
+    python -m app.reprocess --inline <document hash>
+"""
+import argparse
+import sys
+
+from .celery import BULK, LANE_PRIORITY, LANE_QUEUES
+from .services.page_store import page_store
+from .tasks import reprocess_document
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.reprocess", description=__doc__.splitlines()[1])
+    parser.add_argument("hashes", nargs="*", help="SHA-256 of the documents to reprocess")
+    parser.add_argument("--all", action="store_true", help="reprocess every stored document")
+    parser.add_argument("--inline", action="store_true", help="run in this process instead of queueing")
+    args = parser.parse_args(argv)
+
+    hashes = list(page_store.documents()) if args.all else args.hashes
+    if not hashes:
+        parser.error("pass document hashes or --all")
+
+    missing = [doc_hash for doc_hash in hashes if not page_store.exists(doc_hash)]
+    if missing:
+        print(f"Not in the page store: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    failed = 0
+    for doc_hash in hashes:
+        if args.inline:
+            outcome = reprocess_document.apply(args=(doc_hash,))
+            result = outcome.get(propagate=False)
+            if not outcome.successful():
+                failed += 1
+                print(f"{doc_hash}: failed: {result!r}", file=sys.stderr)
+            elif result["status"] == "missing":
+                print(f"{doc_hash}: skipped, not in the page store")
+            elif result["status"] != "completed":
+                print(f"{doc_hash}: skipped ({result['status']})")
+            else:
+                print(f"{doc_hash}: {result['proposals_extracted']} proposals")
+        else:
+            reprocess_document.apply_async(
+                args=(doc_hash,),
+                queue=LANE_QUEUES[BULK][reprocess_document.name],
+                priority=LANE_PRIORITY[BULK],
+            )
+    if not args.inline:
+        print(f"Queued {len(hashes)} documents on the bulk lane")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
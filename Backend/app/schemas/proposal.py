@@ -32,6 +32,12 @@ class SearchType(str, Enum):
     HYBRID = "hybrid"
 
 
+class TagMatch(str, Enum):
+    """Tag filter mode enumeration."""
+    ANY = "any"  # at least one of the tags
+    ALL = "all"  # every tag
+
+
 # Base schemas
 class ProposalBase(BaseModel):
     """Base proposal schema with common fields."""
@@ -95,8 +101,11 @@ class ProposalResponse(ProposalBase):
     updated_at: datetime
     processing_status: str
     processing_error: Optional[str] = None
+    summary_preview: Optional[str] = None
     source_document_path: Optional[str] = None
     source_document_page: Optional[float] = None
+    version_of_id: Optional[UUID] = None
+    version_similarity: Optional[float] = None
     
     # Computed properties
     display_title: str
@@ -130,6 +139,7 @@ class SearchRequest(BaseModel):
     date_from: Optional[datetime] = Field(None, description="Filter by submission date from")
     date_to: Optional[datetime] = Field(None, description="Filter by submission date to")
     tags: List[str] = Field(default_factory=list, description="Filter by tags")
+    tag_match: TagMatch = Field(TagMatch.ANY, description="Match any or all of the tags")
     category: Optional[str] = Field(None, description="Filter by category")
     submitting_organization: Optional[str] = Field(None, description="Filter by organization")
 
@@ -142,6 +152,8 @@ class SearchResponse(BaseModel):
     total: int = Field(..., description="Total number of matching results")
     results: List[ProposalSummary]
     took: float = Field(..., description="Search execution time in seconds")
+    degraded: bool = Field(False, description="True if AI ranking was unavailable and lexical search was used")
+    degraded_reason: Optional[str] = Field(None, description="Why the search was degraded")
 
 
 # File upload schemas
@@ -152,6 +164,27 @@ class FileUploadResponse(BaseModel):
     upload_path: str
     processing_status: str
     message: str
+    sha256: Optional[str] = None
+    duplicate: bool = False
+    task_id: Optional[str] = None
+
+
+class UploadSessionCreate(BaseModel):
+    """Resumable upload creation schema."""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0, description="Total file size in bytes")
+    meeting_name: Optional[str] = Field(None, max_length=200)
+    meeting_date: Optional[datetime] = None
+    organization: Optional[str] = Field(None, max_length=200)
+
+
+class UploadSessionResponse(BaseModel):
+    """Resumable upload state schema."""
+    upload_id: str
+    filename: str
+    size: int
+    offset: int = Field(..., description="Bytes received so far; the next chunk must start here")
+    chunk_size: int = Field(..., description="Recommended chunk size in bytes")
 
 
 # Health check schema
@@ -0,0 +1,2 @@
+# Backend/app/services/__init__.py
+"""Service modules"""
\ No newline at end of file
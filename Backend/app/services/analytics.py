@@ -0,0 +1,213 @@
+"""
+Search analytics.
+
+Search endpoints push events into the in-process ``search_analytics`` sink
+without awaiting anything. A background task started in the application
+lifespan flushes the buffer with multi-row INSERTs, once
+``ANALYTICS_BATCH_SIZE`` events are buffered or every
+``ANALYTICS_FLUSH_INTERVAL`` seconds. The buffer is bounded by
+``ANALYTICS_MAX_BUFFER``; events beyond it are dropped and counted.
+
+Proposal detail views are counted in the same sink (``record_view``) and
+flushed as increments to one Redis sorted set per UTC day;
+``most_viewed_proposal_ids`` ranks proposals over the last days for the
+cache warmer.
+
+``rollup_search_events`` aggregates raw events into ``search_query_daily``
+for the dashboard.
+"""
+from collections import Counter, deque
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+
+from sqlalchemy import Date, func, insert, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..core.redis_client import get_redis
+from ..database import AsyncSessionLocal
+from ..models.analytics import SearchEvent, SearchQueryDaily
+
+logger = logging.getLogger(__name__)
+
+# Sorted set per UTC day (ISO date appended): proposal id -> views
+VIEWS_KEY = "analytics:views:"
+VIEWS_RETENTION = timedelta(days=8)
+
+
+class SearchAnalyticsSink:
+    """Bounded in-memory buffer of search events, flushed in batches."""
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: deque = deque()
+        self._views: Counter = Counter()
+        self._wakeup: Optional[asyncio.Event] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    def record(
+        self,
+        query: str,
+        search_type: str,
+        filters: Dict[str, Any],
+        result_count: int,
+        latency: float,
+        degraded: bool = False,
+    ) -> None:
+        """Buffer one search event (never blocks, never raises)."""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append({
+            "created_at": datetime.now(timezone.utc),
+            "query": query,
+            "search_type": search_type,
+            "filters": filters or None,
+            "result_count": result_count,
+            "latency_ms": latency * 1000,
+            "zero_result": result_count == 0,
+            "degraded": degraded,
+        })
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def record_view(self, proposal_id) -> None:
+        """Count one proposal detail view (never blocks, never raises)."""
+        proposal_id = str(proposal_id)
+        if proposal_id not in self._views and len(self._views) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._views[proposal_id] += 1
+        self.recorded += 1
+
+    async def flush_views(self) -> int:
+        """Add buffered view counts to today's sorted set; a failed flush is dropped and counted."""
+        if not self._views:
+            return 0
+        views, self._views = self._views, Counter()
+        key = VIEWS_KEY + datetime.now(timezone.utc).date().isoformat()
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for proposal_id, count in views.items():
+                    pipe.zincrby(key, count, proposal_id)
+                pipe.expire(key, VIEWS_RETENTION)
+                await pipe.execute()
+        except Exception as e:
+            self.failed += sum(views.values())
+            logger.error(f"Dropping {len(views)} proposal view counts: {e}")
+            return 0
+        written = sum(views.values())
+        self.written += written
+        return written
+
+    async def flush(self) -> int:
+        """Write buffered events; a failed batch is dropped and counted."""
+        await self.flush_views()
+        written = 0
+        while self._buffer:
+            rows = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(insert(SearchEvent), rows)
+                    await session.commit()
+            except Exception as e:
+                self.failed += len(rows)
+                logger.error(f"Dropping {len(rows)} search events: {e}")
+                break
+            written += len(rows)
+        self.written += written
+        return written
+
+    async def run(self) -> None:
+        """Flush by count or time until cancelled, then flush what is left."""
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+    def snapshot(self) -> dict:
+        """Sink counters for monitoring."""
+        return {
+            "buffered": len(self._buffer),
+            "buffered_views": len(self._views),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+search_analytics = SearchAnalyticsSink(
+    batch_size=settings.ANALYTICS_BATCH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL,
+    max_buffer=settings.ANALYTICS_MAX_BUFFER,
+)
+
+
+async def most_viewed_proposal_ids(limit: int, days: int = 7) -> List[str]:
+    """IDs of the most viewed proposals over the last ``days`` UTC days."""
+    today = datetime.now(timezone.utc).date()
+    keys = [VIEWS_KEY + (today - timedelta(days=offset)).isoformat() for offset in range(days)]
+    ranking = VIEWS_KEY + "ranking"
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.zunionstore(ranking, keys)
+        pipe.zrevrange(ranking, 0, limit - 1)
+        pipe.delete(ranking)
+        _, proposal_ids, _ = await pipe.execute()
+    return proposal_ids
+
+
+def normalized_query(column):
+    """SQL expression normalizing a query for aggregation."""
+    # Inlined (not bound) so the SELECT and GROUP BY expressions are identical
+    return func.lower(
+        func.regexp_replace(func.btrim(column), literal_column(r"'\s+'"), literal_column("' '"), literal_column("'g'"))
+    )
+
+
+async def rollup_search_events(session: AsyncSession, day: date) -> None:
+    """(Re)compute the daily rollup for one day (idempotent)."""
+    start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+    query = normalized_query(SearchEvent.query)
+    aggregated = (
+        select(
+            literal(day, Date),
+            query,
+            SearchEvent.search_type,
+            func.count(),
+            func.count().filter(SearchEvent.zero_result),
+            func.avg(SearchEvent.latency_ms),
+            func.max(SearchEvent.latency_ms),
+            func.avg(SearchEvent.result_count),
+        )
+        .where(SearchEvent.created_at >= start, SearchEvent.created_at < start + timedelta(days=1))
+        .group_by(query, SearchEvent.search_type)
+    )
+    columns = [
+        "day", "query", "search_type", "searches", "zero_results",
+        "avg_latency_ms", "max_latency_ms", "avg_result_count",
+    ]
+    stmt = pg_insert(SearchQueryDaily).from_select(columns, aggregated)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "query", "search_type"],
+        set_={column: stmt.excluded[column] for column in columns[3:]},
+    )
+    await session.execute(stmt)
+    await session.commit()
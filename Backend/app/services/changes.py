@@ -0,0 +1,81 @@
+"""
+Dirty-field tracking for proposal edits.
+
+An edit only triggers the derived recomputation its changed fields feed:
+status or vote edits trigger nothing, a title edit refreshes lexical data
+(the near-duplicate signature), and a content edit additionally refreshes
+the search vector, the summary and the embedding.
+
+Text fields are compared by content hash, so re-sending an unchanged text
+(as clients with a full edit form do) is not a change.
+
+Invalidated summaries and embeddings get ``STALE_HASH`` as their source
+hash in the same transaction as the edit, so the recomputation is not lost
+if its task is deferred: the periodic sweeps find stale rows again.
+
+``write_horizon`` tells readers of derived data which later writes they
+may have missed.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+import hashlib
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.proposal import Proposal
+
+# Source hash of derived data invalidated by an edit and not yet recomputed
+STALE_HASH = ""
+
+TEXT_FIELDS = frozenset({"title", "full_content_text", "full_explanation_text", "summary"})
+
+# Derived data -> fields it is computed from. Summaries and embeddings also
+# read the title, but a title edit alone is not worth a provider call; the
+# next content edit (or an embeddings reindex) picks it up.
+DERIVED_FROM = {
+    "signature": {"title", "full_content_text"},
+    "search_vector": {"full_content_text"},
+    "summary": {"full_content_text"},
+    "preview": {"summary"},
+    "embedding": {"full_content_text", "summary"},
+}
+
+
+def text_hash(value: Optional[str]) -> Optional[str]:
+    """SHA-256 of a text, or None for a missing text."""
+    if value is None:
+        return None
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+async def write_horizon(session: AsyncSession) -> datetime:
+    """
+    Start of the oldest open transaction in the database.
+
+    ``updated_at`` is the writing transaction's start time, so rows committed
+    after a read taken now have ``updated_at`` >= the horizon (sessions of
+    other roles need pg_read_all_stats to be visible here).
+    """
+    return (await session.execute(text(
+        "SELECT coalesce(min(xact_start), now()) FROM pg_stat_activity "
+        "WHERE datname = current_database() AND xact_start IS NOT NULL"
+    ))).scalar()
+
+
+def changed_fields(proposal: Proposal, update_data: Dict[str, Any]) -> Set[str]:
+    """Fields of ``update_data`` whose value differs from the proposal's."""
+    changed = set()
+    for field, value in update_data.items():
+        current = getattr(proposal, field)
+        if field in TEXT_FIELDS:
+            if text_hash(value) != text_hash(current):
+                changed.add(field)
+        elif value != current:
+            changed.add(field)
+    return changed
+
+
+def affected(changed: Set[str]) -> Set[str]:
+    """Derived data to recompute after the given fields changed."""
+    return {derived for derived, sources in DERIVED_FROM.items() if sources & changed}
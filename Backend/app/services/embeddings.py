@@ -0,0 +1,144 @@
+"""
+Embedding generation.
+
+Providers:
+- ``gemini``: Google Gemini (library imported on first use, so the API can
+  start without paying its import cost)
+- ``fake``: local deterministic feature-hashing embeddings with configurable
+  latency and failure rate, for offline development and fault injection
+
+Request-path calls go through the shared embedding circuit breaker and a
+timeout; callers get ``AIUnavailableError`` and are expected to degrade.
+"""
+from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+
+import numpy as np
+
+from ..config import settings
+from ..core.resilience import embedding_breaker
+from ..core.singleflight import embedding_flights
+from ..core.timing import EMBEDDING, span
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+
+
+class AIUnavailableError(Exception):
+    """Raised when the AI provider cannot be used right now."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def genai_client():
+    """Import and configure the Gemini client on first use."""
+    global _configured
+    import google.generativeai as genai
+
+    if not _configured:
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        _configured = True
+    return genai
+
+
+def embeddings_available() -> bool:
+    """Check whether an embedding provider is configured."""
+    return settings.AI_PROVIDER == "fake" or bool(settings.GOOGLE_API_KEY)
+
+
+def inject_faults() -> None:
+    """Apply the fake provider's configured latency and failure rate."""
+    if settings.FAKE_AI_LATENCY:
+        time.sleep(settings.FAKE_AI_LATENCY)
+    if settings.FAKE_AI_FAILURE_RATE and random.random() < settings.FAKE_AI_FAILURE_RATE:
+        raise RuntimeError("Injected fake provider failure")
+
+
+def _fake_embed(texts: List[str]) -> List[List[float]]:
+    """Feature-hashing embeddings: texts sharing words get similar vectors."""
+    inject_faults()
+    embeddings = []
+    for text in texts:
+        vector = np.zeros(settings.EMBEDDING_DIMENSION, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % settings.EMBEDDING_DIMENSION
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        embeddings.append((vector / norm if norm else vector).tolist())
+    return embeddings
+
+
+def embedding_text(title: Optional[str], summary: Optional[str], content: Optional[str]) -> str:
+    """Text a proposal embedding is computed from."""
+    return "\n\n".join(part for part in (title, summary, content) if part)
+
+
+def embed_texts(texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+    """
+    Generate embeddings for a batch of texts (blocking, no breaker).
+
+    Args:
+        texts: Texts to embed
+        task_type: Gemini task type ("retrieval_document" or "retrieval_query")
+
+    Returns:
+        One embedding vector per input text
+    """
+    if settings.AI_PROVIDER == "fake":
+        return _fake_embed(texts)
+
+    genai = genai_client()
+    result = genai.embed_content(
+        model=settings.GEMINI_EMBEDDING_MODEL,
+        content=texts,
+        task_type=task_type,
+    )
+    return result["embedding"]
+
+
+async def embed_query(text: str) -> List[float]:
+    """
+    Generate the embedding for a search query within the request budget.
+
+    Identical concurrent queries share one provider call (and, with
+    ``SINGLEFLIGHT_REDIS``, one across workers).
+
+    Raises:
+        AIUnavailableError: If no provider is configured, the breaker is
+            open, or the call fails or times out
+    """
+    with span(EMBEDDING):
+        return await embedding_flights.do(f"{settings.AI_PROVIDER}:{text}", lambda: _embed_query(text))
+
+
+async def _embed_query(text: str) -> List[float]:
+    if not embeddings_available():
+        raise AIUnavailableError("no embedding provider configured")
+
+    if not await embedding_breaker.allow():
+        raise AIUnavailableError("embedding provider circuit open")
+
+    try:
+        embeddings = await asyncio.wait_for(
+            asyncio.to_thread(embed_texts, [text], "retrieval_query"),
+            timeout=settings.AI_REQUEST_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        await embedding_breaker.record_failure()
+        raise AIUnavailableError("embedding provider timed out")
+    except Exception as e:
+        logger.error(f"Query embedding failed: {e}")
+        await embedding_breaker.record_failure()
+        raise AIUnavailableError("embedding provider failed")
+
+    await embedding_breaker.record_success()
+    return embeddings[0]
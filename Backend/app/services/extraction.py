@@ -0,0 +1,304 @@
+"""
+Proposal extraction from protocol page texts.
+
+Pages are packed into token-budgeted batches, one prompt per batch, and the
+structured output is cached per page under a hash of the page text, the
+backend and ``PROMPT_VERSION``. Re-ingesting a corrected protocol only sends
+the pages whose text changed; independent batches run concurrently up to
+``EXTRACTION_CONCURRENCY``.
+
+Backends (``EXTRACTION_BACKEND``):
+
+- ``gemini``: Google Gemini, behind the shared LLM circuit breaker
+- ``rules``: local heading-based extractor for offline development and tests
+
+Each backend returns, per page, a list of proposal fragments::
+
+    {"proposal_number": str | None, "title": str | None,
+     "proposal_type": str | None, "text": str, "continued": bool}
+
+``continued`` marks text that continues the last proposal of the previous
+page; ``merge_fragments`` stitches fragments into whole proposals.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+import hashlib
+import json
+import logging
+import re
+
+from ..config import settings
+from ..core.redis_client import get_sync_redis
+from ..core.resilience import CircuitOpenError, llm_breaker
+from .embeddings import genai_client
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt or the fragment format changes to invalidate the cache
+PROMPT_VERSION = "1"
+
+CACHE_PREFIX = "extraction"
+
+
+class Page(NamedTuple):
+    number: int  # 1-based page number in the source document
+    text: str
+
+
+class ExtractionResult(NamedTuple):
+    proposals: List[dict]
+    pages_total: int
+    pages_cached: int
+    batches: int
+
+
+class ExtractionError(Exception):
+    """Raised when a backend returns unusable output."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def pack_batches(pages: List[Page], budget: int) -> List[List[Page]]:
+    """
+    Pack pages in order into batches of at most ``budget`` estimated tokens.
+
+    A page larger than the budget gets a batch of its own.
+    """
+    batches: List[List[Page]] = []
+    current: List[Page] = []
+    used = 0
+    for page in pages:
+        tokens = estimate_tokens(page.text)
+        if current and used + tokens > budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(page)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class ExtractionBackend:
+    """Base class for extraction backends."""
+
+    name = "base"
+
+    def extract_batch(self, pages: List[Page]) -> Dict[int, List[dict]]:
+        """Extract proposal fragments for each page of a batch, keyed by page number."""
+        raise NotImplementedError
+
+
+# "Antrag A1: Titel", "A-2024-03: Titel", "S3 - Titel"
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:(?P<type>[\wäöüÄÖÜß]*antrag|Satzungsänderung)\s+)?"
+    r"(?P<number>[A-Z]{1,3}[-\s]?\d+(?:[-./]\d+)*)\s*[:.\-–]\s*(?P<title>\S.{2,})$",
+    re.IGNORECASE,
+)
+
+
+class RuleBasedExtractor(ExtractionBackend):
+    """Splits pages at proposal headings; no AI involved."""
+
+    name = "rules"
+
+    def _extract_page(self, text: str) -> List[dict]:
+        fragments: List[dict] = []
+        current = {"proposal_number": None, "title": None, "proposal_type": None, "lines": [], "continued": True}
+        for line in text.splitlines():
+            match = HEADING_PATTERN.match(line)
+            if match:
+                if current["lines"] or not current["continued"]:
+                    fragments.append(current)
+                current = {
+                    "proposal_number": match.group("number").replace(" ", ""),
+                    "title": match.group("title").strip(),
+                    "proposal_type": match.group("type"),
+                    "lines": [],
+                    "continued": False,
+                }
+            elif line.strip():
+                current["lines"].append(line.strip())
+        if current["lines"] or not current["continued"]:
+            fragments.append(current)
+        return [
+            {
+                "proposal_number": fragment["proposal_number"],
+                "title": fragment["title"],
+                "proposal_type": fragment["proposal_type"],
+                "text": "\n".join(fragment["lines"]),
+                "continued": fragment["continued"],
+            }
+            for fragment in fragments
+        ]
+
+    def extract_batch(self, pages: List[Page]) -> Dict[int, List[dict]]:
+        return {page.number: self._extract_page(page.text) for page in pages}
+
+
+EXTRACTION_PROMPT = """Du extrahierst Anträge aus Seiten eines Sitzungsprotokolls.
+Antworte ausschließlich mit JSON der Form:
+{{"pages": [{{"page": <Seitennummer>, "proposals": [{{"proposal_number": str|null, "title": str|null,
+"proposal_type": str|null, "text": str, "continued": bool}}]}}]}}
+"continued" ist true, wenn der Text einen Antrag der vorherigen Seite fortsetzt.
+Gib für jede Seite einen Eintrag zurück, auch wenn sie keine Anträge enthält.
+
+{pages}"""
+
+
+class GeminiExtractor(ExtractionBackend):
+    """Extracts proposals with Gemini, one prompt per batch."""
+
+    name = "gemini"
+
+    def __init__(self):
+        self._model = None
+
+    def _client(self):
+        if self._model is None:
+            self._model = genai_client().GenerativeModel(settings.GEMINI_MODEL)
+        return self._model
+
+    def _parse(self, raw: str, pages: List[Page]) -> Dict[int, List[dict]]:
+        raw = raw.strip()
+        if raw.startswith("```"):
+            raw = raw.strip("`").removeprefix("json").strip()
+        try:
+            data = json.loads(raw)
+            by_page = {int(entry["page"]): entry.get("proposals") or [] for entry in data["pages"]}
+        except (ValueError, KeyError, TypeError) as e:
+            raise ExtractionError(f"Unparseable extraction output: {e}")
+
+        results = {}
+        for page in pages:
+            if page.number not in by_page:
+                raise ExtractionError(f"Page {page.number} missing from extraction output")
+            results[page.number] = [
+                {
+                    "proposal_number": item.get("proposal_number"),
+                    "title": item.get("title"),
+                    "proposal_type": item.get("proposal_type"),
+                    "text": item.get("text") or "",
+                    "continued": bool(item.get("continued")),
+                }
+                for item in by_page[page.number]
+            ]
+        return results
+
+    def extract_batch(self, pages: List[Page]) -> Dict[int, List[dict]]:
+        if not llm_breaker.allow_sync():
+            raise CircuitOpenError(llm_breaker.name)
+        prompt = EXTRACTION_PROMPT.format(
+            pages="\n\n".join(f"=== Seite {page.number} ===\n{page.text}" for page in pages)
+        )
+        try:
+            response = self._client().generate_content(prompt)
+            results = self._parse(response.text, pages)
+        except Exception:
+            llm_breaker.record_sync(False)
+            raise
+        llm_breaker.record_sync(True)
+        return results
+
+
+BACKENDS = {
+    RuleBasedExtractor.name: RuleBasedExtractor,
+    GeminiExtractor.name: GeminiExtractor,
+}
+
+
+def get_backend(name: Optional[str] = None) -> ExtractionBackend:
+    """Instantiate the configured (or named) extraction backend."""
+    name = name or settings.EXTRACTION_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend: {name}")
+    return BACKENDS[name]()
+
+
+def cache_key(backend: ExtractionBackend, text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{PROMPT_VERSION}:{backend.name}:{digest}"
+
+
+def _cache_get(keys: List[str]) -> List[Optional[str]]:
+    try:
+        return get_sync_redis().mget(keys)
+    except Exception as e:
+        logger.warning(f"Extraction cache unavailable: {e}")
+        return [None] * len(keys)
+
+
+def _cache_set(entries: Dict[str, List[dict]]) -> None:
+    try:
+        with get_sync_redis().pipeline(transaction=False) as pipe:
+            for key, fragments in entries.items():
+                pipe.setex(key, settings.EXTRACTION_CACHE_TTL, json.dumps(fragments))
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not write extraction cache: {e}")
+
+
+def merge_fragments(pages: List[Page], fragments: Dict[int, List[dict]]) -> List[dict]:
+    """Stitch per-page fragments into proposals, in page order."""
+    proposals: List[dict] = []
+    for page in pages:
+        for fragment in fragments.get(page.number, []):
+            if fragment["continued"] and proposals:
+                if fragment["text"]:
+                    proposals[-1]["full_content_text"] += "\n" + fragment["text"]
+                continue
+            if not fragment["title"] and not fragment["proposal_number"]:
+                # Preamble text before the first proposal
+                continue
+            proposals.append({
+                "proposal_number": fragment["proposal_number"],
+                "title": fragment["title"] or fragment["proposal_number"],
+                "proposal_type": fragment["proposal_type"],
+                "full_content_text": fragment["text"],
+                "source_document_page": page.number,
+            })
+    return proposals
+
+
+def extract_proposals(pages: List[Page], backend: Optional[ExtractionBackend] = None) -> ExtractionResult:
+    """
+    Extract proposals from page texts, reusing cached per-page results.
+
+    Raises:
+        ExtractionError, CircuitOpenError: If a batch could not be extracted
+            (results of completed batches are cached and reused on retry)
+    """
+    backend = backend or get_backend()
+    keys = {page.number: cache_key(backend, page.text) for page in pages}
+
+    fragments: Dict[int, List[dict]] = {}
+    for page, cached in zip(pages, _cache_get([keys[page.number] for page in pages])):
+        if cached is not None:
+            fragments[page.number] = json.loads(cached)
+
+    missing = [page for page in pages if page.number not in fragments]
+    batches = pack_batches(missing, settings.EXTRACTION_BATCH_TOKENS)
+
+    def run(batch: List[Page]) -> Dict[int, List[dict]]:
+        results = backend.extract_batch(batch)
+        _cache_set({keys[number]: page_fragments for number, page_fragments in results.items()})
+        return results
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=settings.EXTRACTION_CONCURRENCY) as executor:
+            for results in executor.map(run, batches):
+                fragments.update(results)
+
+    logger.info(
+        f"Extracted {len(pages)} pages with {backend.name}: "
+        f"{len(pages) - len(missing)} cached, {len(batches)} batches"
+    )
+    return ExtractionResult(
+        proposals=merge_fragments(pages, fragments),
+        pages_total=len(pages),
+        pages_cached=len(pages) - len(missing),
+        batches=len(batches),
+    )
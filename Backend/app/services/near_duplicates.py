@@ -0,0 +1,242 @@
+"""
+Near-duplicate detection with MinHash and locality-sensitive hashing.
+
+Proposals are often resubmitted or amended across meetings. Each proposal's
+title and text are split into word shingles and summarized by a MinHash
+signature (``NUM_PERM`` 32-bit values, 512 bytes), whose per-value
+agreement estimates the Jaccard similarity of the shingle sets.
+
+The signature is cut into ``BANDS`` bands; each band is hashed into a bucket
+stored in ``proposal_lsh_buckets``. Proposals sharing at least one bucket
+are candidates (an indexed lookup, no scan over the corpus), and only the
+candidates' signatures are compared. With 16 bands of 8 values, pairs above
+about 0.7 similarity almost always collide and pairs below 0.4 rarely do.
+
+A match at or above ``NEAR_DUPLICATE_THRESHOLD`` joins the proposal to the
+matched proposal's version chain. Chains are one level deep: the earliest
+proposal (by submission date, then creation) is the root, and every other
+version points at it (``version_of_id``). A proposal older than the chain's
+root becomes the new root and the chain is re-pointed to it.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+import hashlib
+import logging
+import re
+
+import numpy as np
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.near_duplicate import ProposalLSHBucket, ProposalSignature
+from ..models.proposal import Proposal, proposals_table
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 5  # words
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures must be comparable across processes and releases.
+# Multipliers stay below 2**32 so that a * x (x a 32-bit shingle hash) fits
+# in uint64 without wrapping.
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+class NearDuplicate(NamedTuple):
+    proposal_id: UUID
+    similarity: float
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of the distinct word shingles of a text."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """MinHash signature (``NUM_PERM`` uint32 values) of a set of shingle hashes."""
+    if hashes.size == 0:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    # Universal hashing h(x) = ((a * x) mod p + b) mod p with p = 2**61 - 1,
+    # vectorized over shingles x permutations. All steps are exact in uint64:
+    # a * x < 2**64, and (a * x) mod p + b < 2**62. The low 32 bits are kept.
+    products = np.outer(hashes.astype(np.uint64), _PERM_A) % _MERSENNE_PRIME
+    permuted = (products + _PERM_B) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs of a signature."""
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(values.astype("<u4").tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def proposal_signature(title: Optional[str], text: Optional[str]) -> Tuple[np.ndarray, int]:
+    """Signature and shingle count of a proposal's title and text."""
+    hashes = shingle_hashes(f"{title or ''}\n{text or ''}")
+    return minhash(hashes), int(hashes.size)
+
+
+def _decode(signature: bytes) -> np.ndarray:
+    return np.frombuffer(signature, dtype="<u4")
+
+
+async def store_signature(session: AsyncSession, proposal_id: UUID, signature: np.ndarray, shingle_count: int) -> None:
+    """Replace the stored signature and LSH buckets of a proposal."""
+    stmt = pg_insert(ProposalSignature).values(
+        proposal_id=proposal_id,
+        signature=signature.astype("<u4").tobytes(),
+        shingle_count=shingle_count,
+    )
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=["proposal_id"],
+        set_={"signature": stmt.excluded.signature, "shingle_count": stmt.excluded.shingle_count, "updated_at": func.now()},
+    ))
+    await session.execute(delete(ProposalLSHBucket).where(ProposalLSHBucket.proposal_id == proposal_id))
+    await session.execute(
+        pg_insert(ProposalLSHBucket)
+        .values([
+            {"band": band, "bucket": bucket, "proposal_id": proposal_id}
+            for band, bucket in band_buckets(signature)
+        ])
+        .on_conflict_do_nothing()
+    )
+
+
+async def find_near_duplicates(
+    session: AsyncSession,
+    signature: np.ndarray,
+    exclude: Sequence[UUID] = (),
+    threshold: Optional[float] = None,
+    limit: int = 10,
+) -> List[NearDuplicate]:
+    """Stored proposals whose estimated similarity reaches the threshold, best first."""
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    candidates = (
+        select(ProposalLSHBucket.proposal_id)
+        .where(tuple_(ProposalLSHBucket.band, ProposalLSHBucket.bucket).in_(band_buckets(signature)))
+        .distinct()
+    )
+    if exclude:
+        candidates = candidates.where(ProposalLSHBucket.proposal_id.notin_(list(exclude)))
+    result = await session.execute(
+        select(ProposalSignature.proposal_id, ProposalSignature.signature)
+        .where(ProposalSignature.proposal_id.in_(candidates))
+    )
+    matches = [
+        NearDuplicate(proposal_id, similarity(signature, _decode(stored)))
+        for proposal_id, stored in result.all()
+    ]
+    matches = [match for match in matches if match.similarity >= threshold]
+    matches.sort(key=lambda match: match.similarity, reverse=True)
+    return matches[:limit]
+
+
+def _age(row) -> tuple:
+    """Sort key putting the earliest version first."""
+    return (row.submitted_date or row.created_at, row.created_at, row.id)
+
+
+async def _repoint(session: AsyncSession, old_root: UUID, new_root: UUID, exclude: UUID) -> None:
+    """Move ``old_root`` and its versions under ``new_root``."""
+    await session.execute(
+        update(proposals_table)
+        .where(
+            or_(proposals_table.c.id == old_root, proposals_table.c.version_of_id == old_root),
+            proposals_table.c.id != exclude,
+        )
+        .values(version_of_id=new_root, updated_at=func.now())
+    )
+
+
+async def link_versions(session: AsyncSession, proposal: Proposal) -> Optional[NearDuplicate]:
+    """
+    Index a (flushed) proposal and link it into the version chain of its best match.
+
+    The earliest proposal of the merged chain is its root: either the matched
+    chain's root (the proposal points at it) or the proposal itself (the
+    chain is re-pointed to it). Versions of the proposal follow it into the
+    merged chain.
+
+    Returns:
+        The best match, or None if the proposal has no near-duplicate.
+    """
+    signature, shingle_count = proposal_signature(proposal.title, proposal.full_content_text)
+    await store_signature(session, proposal.id, signature, shingle_count)
+
+    matches = await find_near_duplicates(session, signature, exclude=[proposal.id]) if shingle_count else []
+    best = None
+    root_id = None
+    if matches:
+        result = await session.execute(
+            select(Proposal.id, Proposal.version_of_id)
+            .where(Proposal.id.in_([match.proposal_id for match in matches]))
+        )
+        roots = {row.id: row.version_of_id or row.id for row in result.all()}
+        for match in matches:
+            root = roots.get(match.proposal_id)
+            # Skip matches that are versions of this proposal itself
+            if root is not None and root != proposal.id:
+                best, root_id = match, root
+                break
+
+    if root_id is not None:
+        result = await session.execute(
+            select(Proposal.id, Proposal.submitted_date, Proposal.created_at)
+            .where(Proposal.id.in_([proposal.id, root_id]))
+        )
+        earliest = min(result.all(), key=_age)
+        if earliest.id == proposal.id:
+            await _repoint(session, root_id, proposal.id, exclude=proposal.id)
+            logger.info(f"Proposal {proposal.id} is the new root of {root_id}'s versions")
+            root_id = None
+        else:
+            await _repoint(session, proposal.id, root_id, exclude=proposal.id)
+
+    proposal.version_of_id = root_id
+    proposal.version_similarity = round(best.similarity, 3) if root_id is not None else None
+    if root_id is not None:
+        logger.info(f"Proposal {proposal.id} is a version of {root_id} (similarity {best.similarity:.2f})")
+    return best
+
+
+async def index_missing(session: AsyncSession, limit: int) -> int:
+    """Index proposals without a signature, oldest first (so roots are the earliest versions)."""
+    result = await session.execute(
+        select(Proposal)
+        .where(~select(ProposalSignature.proposal_id).where(ProposalSignature.proposal_id == Proposal.id).exists())
+        .order_by(func.coalesce(Proposal.submitted_date, Proposal.created_at), Proposal.created_at)
+        .limit(limit)
+    )
+    proposals = result.scalars().all()
+    for proposal in proposals:
+        await link_versions(session, proposal)
+        await session.flush()
+    await session.commit()
+    return len(proposals)
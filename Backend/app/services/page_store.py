@@ -0,0 +1,188 @@
+"""
+Per-page extraction store.
+
+Reading a PDF (text layer, or tesseract OCR for scanned pages) is the most
+expensive pipeline step, so its output is written once per document and
+reused by every later stage. Reprocessing from the store only re-runs
+segmentation and AI parsing.
+
+Layout of ``PAGE_STORE_DIR``: one ZIP archive per document,
+``<sha256[:2]>/<sha256>.zip``, holding a deflate-compressed JSON member per
+page (``pages/00001.json``: text, extraction method and word boxes) and a
+``document.json`` with the page count and the metadata needed to reprocess
+(source path, meeting info). Archives are written to a temporary file and
+renamed into place, so readers never see partial documents.
+"""
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Coordinates are stored in PDF points, rounded to this many decimals
+_COORD_DECIMALS = 1
+
+
+class PageRecord(NamedTuple):
+    number: int  # 1-based page number in the source document
+    text: str
+    method: str  # "text" (PDF text layer) or "ocr"
+    words: List[list]  # [x0, top, x1, bottom, text] per word
+
+
+def document_hash(path: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ocr_page(page) -> PageRecord:
+    """Run tesseract on a rendered page; returns text and word boxes in PDF points."""
+    import pytesseract
+
+    image = page.to_image(resolution=settings.OCR_DPI).original
+    data = pytesseract.image_to_data(
+        image, lang=settings.OCR_LANGUAGE, output_type=pytesseract.Output.DICT
+    )
+    scale = 72 / settings.OCR_DPI
+    words, lines, current_line = [], [], None
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if line_key != current_line:
+            lines.append([])
+            current_line = line_key
+        lines[-1].append(word)
+        left, top = data["left"][i] * scale, data["top"][i] * scale
+        words.append([
+            round(left, _COORD_DECIMALS),
+            round(top, _COORD_DECIMALS),
+            round(left + data["width"][i] * scale, _COORD_DECIMALS),
+            round(top + data["height"][i] * scale, _COORD_DECIMALS),
+            word,
+        ])
+    return PageRecord(number=page.page_number, text="\n".join(" ".join(line) for line in lines), method="ocr", words=words)
+
+
+def read_pdf_pages(path: str) -> List[PageRecord]:
+    """
+    Extract text and word layout for every page of a PDF.
+
+    Pages whose text layer has fewer than ``OCR_MIN_TEXT_CHARS`` characters
+    are treated as scanned and run through OCR.
+    """
+    import pdfplumber
+
+    records = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            if len(text.strip()) < settings.OCR_MIN_TEXT_CHARS:
+                try:
+                    records.append(_ocr_page(page))
+                    continue
+                except Exception as e:
+                    logger.warning(f"OCR failed for page {page.page_number} of {path}: {e}")
+            words = [
+                [
+                    round(word["x0"], _COORD_DECIMALS),
+                    round(word["top"], _COORD_DECIMALS),
+                    round(word["x1"], _COORD_DECIMALS),
+                    round(word["bottom"], _COORD_DECIMALS),
+                    word["text"],
+                ]
+                for word in page.extract_words()
+            ]
+            records.append(PageRecord(number=page.page_number, text=text, method="text", words=words))
+    return records
+
+
+class PageStore:
+    """Write-once store of extracted pages, keyed by document hash and page number."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, doc_hash: str) -> str:
+        return os.path.join(self.directory, doc_hash[:2], f"{doc_hash}.zip")
+
+    def exists(self, doc_hash: str) -> bool:
+        return os.path.exists(self.path(doc_hash))
+
+    def save(self, doc_hash: str, pages: List[PageRecord], metadata: Optional[dict] = None) -> None:
+        """Store the pages of a document (no-op if it is already stored)."""
+        path = self.path(doc_hash)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("document.json", json.dumps({
+                    "format": FORMAT_VERSION,
+                    "sha256": doc_hash,
+                    "page_count": len(pages),
+                    "ocr_pages": sum(page.method == "ocr" for page in pages),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    **(metadata or {}),
+                }))
+                for page in pages:
+                    archive.writestr(f"pages/{page.number:05d}.json", json.dumps(page._asdict(), ensure_ascii=False))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def metadata(self, doc_hash: str) -> Optional[dict]:
+        """Document metadata, or None if the document is not stored."""
+        try:
+            with zipfile.ZipFile(self.path(doc_hash)) as archive:
+                return json.loads(archive.read("document.json"))
+        except FileNotFoundError:
+            return None
+
+    def load(self, doc_hash: str) -> Optional[List[PageRecord]]:
+        """All pages of a document in order, or None if it is not stored."""
+        try:
+            with zipfile.ZipFile(self.path(doc_hash)) as archive:
+                names = sorted(name for name in archive.namelist() if name.startswith("pages/"))
+                return [PageRecord(**json.loads(archive.read(name))) for name in names]
+        except FileNotFoundError:
+            return None
+
+    def load_page(self, doc_hash: str, number: int) -> Optional[PageRecord]:
+        """A single page, or None if it is not stored."""
+        try:
+            with zipfile.ZipFile(self.path(doc_hash)) as archive:
+                return PageRecord(**json.loads(archive.read(f"pages/{number:05d}.json")))
+        except (FileNotFoundError, KeyError):
+            return None
+
+    def documents(self) -> Iterator[str]:
+        """Hashes of all stored documents."""
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in sorted(os.listdir(self.directory)):
+            subdir = os.path.join(self.directory, prefix)
+            if not os.path.isdir(subdir):
+                continue
+            for name in sorted(os.listdir(subdir)):
+                if name.endswith(".zip"):
+                    yield name[:-len(".zip")]
+
+
+page_store = PageStore(settings.PAGE_STORE_DIR)
@@ -0,0 +1,69 @@
+"""
+Binary-quantized first stage for two-stage semantic search.
+
+Each embedding is reduced to one sign bit per dimension (96 bytes for 768
+dimensions, 1/32 of float32), the same quantization as pgvector's
+``binary_quantize``. The first stage ranks by Hamming distance between
+codes and keeps ``VECTOR_OVERSAMPLING`` times the requested number of
+candidates; the second stage reranks only those with exact cosine
+similarity on the full vectors.
+
+Used by both vector backends: the in-process index keeps a memory-mapped
+code matrix next to its float32 vectors, and the pgvector path orders by
+``<~>`` on an HNSW expression index over ``binary_quantize(embedding)``.
+"""
+from typing import Sequence
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import cast, func, literal
+from sqlalchemy.dialects.postgresql import BIT
+
+from ..config import settings
+
+BIT_INDEX = "ix_proposal_vectors_embedding_bit"
+
+# Set bits per 16-bit word, for numpy without bitwise_count (< 2.0)
+_POPCOUNT = np.array([bin(value).count("1") for value in range(1 << 16)], dtype=np.uint8)
+
+
+def binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """Sign-bit codes (uint8, dimension / 8 per row) of a matrix of vectors."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Hamming distance of every row of ``codes`` to one query code."""
+    # Whole words where the code width allows, fewer elements to count
+    word = np.uint64 if codes.shape[-1] % 8 == 0 else np.uint16 if codes.shape[-1] % 2 == 0 else np.uint8
+    diff = np.bitwise_xor(np.ascontiguousarray(codes).view(word), np.ascontiguousarray(query_code).view(word))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).sum(axis=-1, dtype=np.uint16)
+    if word is np.uint64:
+        diff = diff.view(np.uint16)
+    return _POPCOUNT[diff].sum(axis=-1, dtype=np.uint16)
+
+
+def candidate_count(k: int, oversampling: int) -> int:
+    """First-stage candidates kept for a top-``k`` query."""
+    return k * max(1, oversampling)
+
+
+def bit_index_ddl(dimension: int) -> str:
+    """CREATE INDEX statement for the HNSW index over the binary codes (pgvector >= 0.7)."""
+    return (
+        f"CREATE INDEX IF NOT EXISTS {BIT_INDEX} ON proposal_vectors "
+        f"USING hnsw ((binary_quantize(embedding)::bit({int(dimension)})) bit_hamming_ops)"
+    )
+
+
+def hamming_distance(embedding_column, query_embedding: Sequence[float]):
+    """
+    SQL Hamming distance between a stored embedding and a query, as indexed.
+
+    Matches the expression of ``BIT_INDEX`` so the HNSW index serves the
+    first stage.
+    """
+    dimension = settings.EMBEDDING_DIMENSION
+    query = literal(list(query_embedding), type_=Vector(dimension))
+    return cast(func.binary_quantize(embedding_column), BIT(dimension)).op("<~>")(func.binary_quantize(query))
@@ -0,0 +1,279 @@
+"""
+Search query parser.
+
+Turns user query syntax into a normalized AST and a PostgreSQL ``to_tsquery``
+expression string:
+
+- ``"soziale marktwirtschaft"``: phrase (words must be adjacent)
+- ``AND`` / ``UND`` / ``&``: conjunction (also implied between terms)
+- ``OR`` / ``ODER`` / ``|``: disjunction
+- ``NOT`` / ``NICHT`` / ``-term`` / ``!term``: negation
+- ``steuer*``: prefix match
+- parentheses for grouping
+
+Parsing is lenient: unbalanced quotes or parentheses are closed implicitly
+and stray operators are ignored, so any input yields a valid tsquery.
+Parsed queries are cached, and the resulting tsquery string is always bound
+as a parameter so the SQL statement text stays identical across searches.
+"""
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Union
+import re
+
+from sqlalchemy import Text, cast, false, func, literal_column
+
+from ..models.proposal import Proposal
+
+# Words as PostgreSQL's German parser sees them (letters incl. umlauts, digits)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BARE_RE = re.compile(r'[^\s()"]+')
+
+# Word operators are only recognized in upper case
+_AND_WORDS = {"AND", "UND", "&", "&&"}
+_OR_WORDS = {"OR", "ODER", "|", "||"}
+_NOT_WORDS = {"NOT", "NICHT"}
+
+
+class Term(NamedTuple):
+    word: str
+    prefix: bool = False
+
+
+class Phrase(NamedTuple):
+    words: Tuple[str, ...]
+
+
+class And(NamedTuple):
+    children: Tuple["Node", ...]
+
+
+class Or(NamedTuple):
+    children: Tuple["Node", ...]
+
+
+class Not(NamedTuple):
+    child: "Node"
+
+
+Node = Union[Term, Phrase, And, Or, Not]
+
+
+class ParsedQuery(NamedTuple):
+    """Result of parsing a user query."""
+    ast: Optional[Node]
+    tsquery: str
+    terms: Tuple[str, ...]  # positive words, e.g. for highlighting or ILIKE
+
+    @property
+    def is_empty(self) -> bool:
+        return self.ast is None
+
+
+# ----------------------------------------------------------------------
+# Tokenizer
+# ----------------------------------------------------------------------
+
+def _tokenize(query: str) -> List[Tuple[str, str]]:
+    """Split a query into (kind, value) tokens."""
+    tokens = []
+    i, n = 0, len(query)
+    while i < n:
+        char = query[i]
+        if char.isspace():
+            i += 1
+        elif char == '"':
+            end = query.find('"', i + 1)
+            end = n if end == -1 else end
+            tokens.append(("PHRASE", query[i + 1:end]))
+            i = end + 1
+        elif char == "(":
+            tokens.append(("LPAREN", char))
+            i += 1
+        elif char == ")":
+            tokens.append(("RPAREN", char))
+            i += 1
+        elif char in "-!" and i + 1 < n and not query[i + 1].isspace():
+            tokens.append(("NOT", char))
+            i += 1
+        else:
+            match = _BARE_RE.match(query, i)
+            word = match.group(0)
+            i = match.end()
+            if word in _AND_WORDS:
+                tokens.append(("AND", word))
+            elif word in _OR_WORDS:
+                tokens.append(("OR", word))
+            elif word in _NOT_WORDS or word in ("!", "-"):
+                tokens.append(("NOT", word))
+            else:
+                tokens.append(("TERM", word))
+    return tokens
+
+
+# ----------------------------------------------------------------------
+# Parser (NOT binds tighter than AND, AND tighter than OR)
+# ----------------------------------------------------------------------
+
+class _Parser:
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Optional[Node]:
+        nodes = []
+        while self.peek() is not None:
+            node = self.parse_or()
+            if node is not None:
+                nodes.append(node)
+            elif self.peek() is not None:
+                # Stray closing parenthesis or operator
+                self.take()
+        return _make(And, nodes)
+
+    def parse_or(self) -> Optional[Node]:
+        nodes = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            nodes.append(self.parse_and())
+        return _make(Or, nodes)
+
+    def parse_and(self) -> Optional[Node]:
+        nodes = [self.parse_not()]
+        while self.peek() in ("AND", "NOT", "TERM", "PHRASE", "LPAREN"):
+            if self.peek() == "AND":
+                self.take()
+            nodes.append(self.parse_not())
+        return _make(And, nodes)
+
+    def parse_not(self) -> Optional[Node]:
+        if self.peek() == "NOT":
+            self.take()
+            child = self.parse_not()
+            return Not(child) if child is not None else None
+        return self.parse_primary()
+
+    def parse_primary(self) -> Optional[Node]:
+        kind = self.peek()
+        if kind == "LPAREN":
+            self.take()
+            node = self.parse_or()
+            if self.peek() == "RPAREN":
+                self.take()
+            return node
+        if kind == "PHRASE":
+            return _words_node(self.take()[1], prefix=False)
+        if kind == "TERM":
+            value = self.take()[1]
+            prefix = value.endswith("*")
+            return _words_node(value.rstrip("*"), prefix=prefix)
+        return None
+
+
+def _words_node(text: str, prefix: bool) -> Optional[Node]:
+    """Turn raw text into a term, or a phrase if it contains several words."""
+    words = tuple(word.lower() for word in _WORD_RE.findall(text))
+    if not words:
+        return None
+    if len(words) == 1:
+        return Term(words[0], prefix)
+    return Phrase(words)
+
+
+def _make(kind, nodes: List[Optional[Node]]) -> Optional[Node]:
+    """Build a flattened, de-duplicated And/Or node (or a single child)."""
+    flat = []
+    for node in nodes:
+        if node is None:
+            continue
+        children = node.children if isinstance(node, kind) else (node,)
+        for child in children:
+            if child not in flat:
+                flat.append(child)
+    if not flat:
+        return None
+    if len(flat) == 1:
+        return flat[0]
+    return kind(tuple(flat))
+
+
+# ----------------------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------------------
+
+def to_tsquery(node: Optional[Node]) -> str:
+    """Compile an AST into a ``to_tsquery`` expression string."""
+    if node is None:
+        return ""
+    if isinstance(node, Term):
+        return f"{node.word}:*" if node.prefix else node.word
+    if isinstance(node, Phrase):
+        return "(" + " <-> ".join(node.words) + ")"
+    if isinstance(node, Not):
+        return "!" + to_tsquery(node.child)
+    operator = " & " if isinstance(node, And) else " | "
+    return "(" + operator.join(to_tsquery(child) for child in node.children) + ")"
+
+
+def _positive_terms(node: Optional[Node], negated: bool = False) -> List[str]:
+    if node is None:
+        return []
+    if isinstance(node, Term):
+        return [] if negated else [node.word]
+    if isinstance(node, Phrase):
+        return [] if negated else [" ".join(node.words)]
+    if isinstance(node, Not):
+        return _positive_terms(node.child, not negated)
+    terms = []
+    for child in node.children:
+        terms.extend(term for term in _positive_terms(child, negated) if term not in terms)
+    return terms
+
+
+@lru_cache(maxsize=4096)
+def _parse_normalized(query: str) -> ParsedQuery:
+    ast = _Parser(_tokenize(query)).parse()
+    return ParsedQuery(ast=ast, tsquery=to_tsquery(ast), terms=tuple(_positive_terms(ast)))
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """
+    Parse a user search query (cached by whitespace-normalized input).
+
+    Returns:
+        ParsedQuery with the AST, the tsquery string and the positive terms
+    """
+    return _parse_normalized(" ".join(query.split()))
+
+
+# Inlined (not bound) so the expression matches expression indexes and the
+# statement text is identical for every query
+TS_CONFIG = literal_column("'german'::regconfig")
+
+
+def fulltext_condition(tsquery: str):
+    """
+    Match the proposal text against a compiled tsquery string.
+
+    The tsquery is a bound parameter, so every full-text search shares one
+    statement shape and hits the asyncpg prepared statement cache. The
+    ``to_tsvector`` expression is served by the GIN expression index
+    ``ix_proposal_contents_fulltext``; keep both in sync.
+    """
+    if not tsquery:
+        return false()
+    return func.to_tsvector(TS_CONFIG, Proposal.full_content_text).op("@@")(
+        func.to_tsquery(TS_CONFIG, tsquery)
+    )
+
+
+def search_vector(text):
+    """Stored tsvector (as text) of a proposal text, matching ``fulltext_condition``."""
+    return cast(func.to_tsvector(TS_CONFIG, text), Text)
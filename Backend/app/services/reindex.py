@@ -0,0 +1,457 @@
+"""
+Corpus reindexing.
+
+Rebuilds a derived search column for every proposal after the embedding
+model (``GEMINI_EMBEDDING_MODEL`` / ``EMBEDDING_DIMENSION``) or the text the
+column is computed from changes. Targets:
+
+- ``embeddings``: ``proposal_vectors.embedding`` (embedding provider)
+
+Full-text search reads an expression index, not a stored column; after a
+text-search configuration change, ``REINDEX INDEX ix_proposal_contents_fulltext``.
+
+A run splits the id space into keyset partitions (``reindex_partitions``)
+that parallel workers walk in id order. Each batch writes its values to
+``reindex_shadow`` and advances the partition checkpoint in one
+transaction, so an interrupted run resumes where it stopped. A shadow
+value records the write horizon taken before its rows were read
+(``changes.write_horizon``); a proposal with a later ``updated_at`` may
+have changed after the read and is recomputed.
+
+Live columns are untouched until ``swap_run``: search keeps serving the old
+values until the new ones are complete. The swap catches up on proposals
+changed while the run was going, then copies all shadow values in a single
+transaction with writers to the live table locked out. Nothing is computed
+under that lock: proposals changed since the last catch-up keep their live
+value, marked stale for the embedding sweep. Swapped proposals
+get a new ``updated_at``, which invalidates response caches and makes the
+in-process vector index pick up the new vectors on its next refresh (after
+an ``EMBEDDING_DIMENSION`` change, clear ``VECTOR_INDEX_DIR`` first).
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+from uuid import UUID
+import asyncio
+import logging
+import math
+import time
+
+from sqlalchemy import Table, and_, delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..core.resilience import backoff_delay, embedding_breaker
+from ..models.proposal import Proposal, proposal_vectors_table, proposals_table
+from ..models.reindex import ReindexPartition, ReindexRun, ReindexShadow
+from .changes import STALE_HASH, write_horizon
+from .embeddings import embed_texts, embedding_text
+from .quantization import BIT_INDEX, bit_index_ddl
+
+logger = logging.getLogger(__name__)
+
+# Unlocked catch-up passes before the swap takes its lock
+CATCH_UP_ROUNDS = 3
+
+MAX_ATTEMPTS = 5
+
+
+class Target(NamedTuple):
+    name: str
+    live_table: Table
+    live_column: str
+    compute: Callable  # async (session, ids) -> {id: value}
+    uses_provider: bool  # calls the embedding provider (costs tokens)
+
+
+async def _compute_embeddings(session: AsyncSession, ids: List[UUID]) -> Dict[UUID, list]:
+    result = await session.execute(
+        select(Proposal.id, Proposal.title, Proposal.summary, Proposal.full_content_text)
+        .where(Proposal.id.in_(ids))
+    )
+    rows = result.all()
+    if not rows:
+        return {}
+
+    for attempt in range(MAX_ATTEMPTS):
+        if not await embedding_breaker.allow():
+            await asyncio.sleep(settings.CIRCUIT_RESET_TIMEOUT)
+            continue
+        try:
+            embeddings = await asyncio.to_thread(
+                embed_texts, [embedding_text(row.title, row.summary, row.full_content_text) for row in rows]
+            )
+        except Exception as e:
+            await embedding_breaker.record_failure()
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            logger.warning(f"Embedding batch failed ({e}), retrying")
+            await asyncio.sleep(backoff_delay(attempt, base=5))
+            continue
+        await embedding_breaker.record_success()
+        return {row.id: embedding for row, embedding in zip(rows, embeddings)}
+
+    raise RuntimeError("Embedding provider unavailable")
+
+
+TARGETS = {
+    "embeddings": Target("embeddings", proposal_vectors_table, "embedding", _compute_embeddings, True),
+}
+
+
+def run_options(target: Target, batch_size: int) -> dict:
+    """Configuration recorded with a run (to spot runs started under other settings)."""
+    options = {"batch_size": batch_size}
+    if target.name == "embeddings":
+        options.update(model=settings.GEMINI_EMBEDDING_MODEL, dimension=settings.EMBEDDING_DIMENSION)
+    return options
+
+
+class BatchThrottle:
+    """Shared rows-per-second budget across workers (0 disables throttling)."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, rows: int) -> None:
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + rows / self.rate
+        await asyncio.sleep(start - now)
+
+
+async def estimate(session: AsyncSession, target: Target, batch_size: int, max_rate: float = 0) -> dict:
+    """Dry-run cost estimate: rows, provider calls and tokens, expected duration."""
+    result = await session.execute(
+        select(
+            func.count(Proposal.id),
+            func.coalesce(func.sum(
+                func.length(Proposal.title)
+                + func.coalesce(func.length(Proposal.summary), 0)
+                + func.length(Proposal.full_content_text)
+            ), 0),
+        )
+    )
+    rows, characters = result.one()
+    batches = math.ceil(rows / batch_size)
+    return {
+        "target": target.name,
+        "rows": rows,
+        "batches": batches,
+        "provider_calls": batches if target.uses_provider else 0,
+        # About four characters per token, as in extraction.estimate_tokens
+        "tokens": int(characters) // 4 + rows if target.uses_provider else 0,
+        "min_duration_seconds": round(rows / max_rate) if max_rate else None,
+    }
+
+
+async def create_run(session: AsyncSession, target: Target, partitions: int, batch_size: int) -> ReindexRun:
+    """Start a run with ``partitions`` keyset ranges of about equal size."""
+    total = (await session.execute(select(func.count(Proposal.id)))).scalar()
+    step = max(1, math.ceil(total / max(1, partitions)))
+
+    ranked = select(
+        proposals_table.c.id,
+        func.row_number().over(order_by=proposals_table.c.id).label("rn"),
+    ).subquery()
+    boundaries = (await session.execute(
+        select(ranked.c.id).where(ranked.c.rn % step == 0, ranked.c.rn < total).order_by(ranked.c.id)
+    )).scalars().all()
+
+    run = ReindexRun(target=target.name, status="running", options=run_options(target, batch_size), rows_total=total)
+    session.add(run)
+    await session.flush()
+
+    bounds = [None, *boundaries, None]
+    for number, (lower, upper) in enumerate(zip(bounds, bounds[1:])):
+        session.add(ReindexPartition(
+            run_id=run.id, partition=number, lower_id=lower, upper_id=upper, rows_done=0, done=False,
+        ))
+    await session.commit()
+    logger.info(f"Reindex run {run.id} ({target.name}): {total} rows in {len(bounds) - 1} partitions")
+    return run
+
+
+async def latest_run(session: AsyncSession, target: Target) -> Optional[ReindexRun]:
+    """The most recent run of a target that has not been swapped in."""
+    result = await session.execute(
+        select(ReindexRun)
+        .where(ReindexRun.target == target.name, ReindexRun.status.in_(("running", "failed", "ready")))
+        .order_by(ReindexRun.id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _compute_shadow(session: AsyncSession, run_id: int, target: Target, ids: List[UUID]) -> None:
+    """Compute and store shadow values, stamped with the horizon taken before the read."""
+    horizon = await write_horizon(session)
+    await _store_shadow(session, run_id, target, await target.compute(session, ids), horizon)
+
+
+async def _store_shadow(
+    session: AsyncSession,
+    run_id: int,
+    target: Target,
+    values: Dict[UUID, object],
+    horizon: datetime,
+) -> None:
+    if not values:
+        return
+    column = target.live_column  # shadow columns are named like the live ones
+    stmt = pg_insert(ReindexShadow).values([
+        {"run_id": run_id, "proposal_id": proposal_id, column: value, "computed_at": horizon}
+        for proposal_id, value in values.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["run_id", "proposal_id"],
+        set_={column: stmt.excluded[column], "computed_at": stmt.excluded.computed_at},
+    )
+    await session.execute(stmt)
+
+
+async def _process_partition(
+    session_factory,
+    run_id: int,
+    number: int,
+    target: Target,
+    batch_size: int,
+    throttle: BatchThrottle,
+) -> int:
+    """Walk one partition from its checkpoint; returns rows written."""
+    written = 0
+    async with session_factory() as session:
+        partition = await session.get(ReindexPartition, (run_id, number))
+        while not partition.done:
+            query = select(proposals_table.c.id).order_by(proposals_table.c.id).limit(batch_size)
+            lower = partition.last_id or partition.lower_id
+            if lower is not None:
+                query = query.where(proposals_table.c.id > lower)
+            if partition.upper_id is not None:
+                query = query.where(proposals_table.c.id <= partition.upper_id)
+            ids = (await session.execute(query)).scalars().all()
+
+            if ids:
+                await throttle.acquire(len(ids))
+                await _compute_shadow(session, run_id, target, ids)
+                partition.last_id = ids[-1]
+                partition.rows_done += len(ids)
+                written += len(ids)
+            partition.done = len(ids) < batch_size
+            # Shadow rows and checkpoint commit together
+            await session.commit()
+    return written
+
+
+async def run_reindex(
+    session_factory,
+    run_id: int,
+    workers: int,
+    batch_size: int,
+    max_rate: float = 0,
+) -> int:
+    """
+    Process the open partitions of a run with parallel workers.
+
+    Returns:
+        Rows written in this invocation. The run is marked ``ready`` once all
+        partitions are done, ``failed`` (resumable) if a worker fails.
+    """
+    async with session_factory() as session:
+        run = await session.get(ReindexRun, run_id)
+        target = TARGETS[run.target]
+        pending = (await session.execute(
+            select(ReindexPartition.partition)
+            .where(ReindexPartition.run_id == run_id, ReindexPartition.done.is_(False))
+            .order_by(ReindexPartition.partition)
+        )).scalars().all()
+        run.status = "running"
+        run.error = None
+        await session.commit()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for number in pending:
+        queue.put_nowait(number)
+    throttle = BatchThrottle(max_rate)
+
+    async def worker() -> int:
+        written = 0
+        while not queue.empty():
+            number = queue.get_nowait()
+            written += await _process_partition(session_factory, run_id, number, target, batch_size, throttle)
+            logger.info(f"Reindex run {run_id}: partition {number} done")
+        return written
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, min(workers, len(pending))))]
+    try:
+        written = sum(await asyncio.gather(*tasks))
+    except BaseException as e:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        async with session_factory() as session:
+            await session.execute(
+                update(ReindexRun).where(ReindexRun.id == run_id).values(status="failed", error=str(e) or repr(e))
+            )
+            await session.commit()
+        raise
+
+    async with session_factory() as session:
+        await session.execute(
+            update(ReindexRun).where(ReindexRun.id == run_id).values(status="ready", finished_at=func.now())
+        )
+        await session.commit()
+    return written
+
+
+def _stale_ids_query(run_id: int):
+    """Proposals without a shadow value, or possibly changed after theirs was read."""
+    shadow = ReindexShadow
+    return (
+        select(proposals_table.c.id)
+        .outerjoin(shadow, and_(shadow.run_id == run_id, shadow.proposal_id == proposals_table.c.id))
+        .where(or_(
+            shadow.proposal_id.is_(None),
+            proposals_table.c.updated_at >= shadow.computed_at,
+        ))
+        .order_by(proposals_table.c.id)
+    )
+
+
+async def _catch_up(session: AsyncSession, run_id: int, target: Target, batch_size: int) -> int:
+    ids = (await session.execute(_stale_ids_query(run_id))).scalars().all()
+    await session.commit()
+    for start in range(0, len(ids), batch_size):
+        # One transaction per batch keeps each horizon close to its read
+        await _compute_shadow(session, run_id, target, ids[start:start + batch_size])
+        await session.commit()
+    return len(ids)
+
+
+async def _skip_stale(session: AsyncSession, run_id: int, target: Target) -> int:
+    """Drop shadow values that went stale since the catch-up, marking the live values stale instead."""
+    stale = _stale_ids_query(run_id).where(ReindexShadow.proposal_id.isnot(None)).order_by(None)
+    ids = (await session.execute(stale)).scalars().all()
+    if not ids:
+        return 0
+    await session.execute(
+        delete(ReindexShadow).where(ReindexShadow.run_id == run_id, ReindexShadow.proposal_id.in_(ids))
+    )
+    if target.name == "embeddings":
+        await session.execute(
+            update(proposal_vectors_table)
+            .where(proposal_vectors_table.c.proposal_id.in_(ids))
+            .values(embedding_source_hash=STALE_HASH)
+        )
+    return len(ids)
+
+
+async def swap_run(session_factory, run_id: int) -> int:
+    """
+    Replace the live column with the shadow values of a ready run.
+
+    Returns:
+        Number of proposals swapped.
+    """
+    async with session_factory() as session:
+        run = await session.get(ReindexRun, run_id)
+        if run is None or run.status != "ready":
+            raise ValueError(f"Run {run_id} is not ready to swap")
+        target = TARGETS[run.target]
+        batch_size = (run.options or {}).get("batch_size", settings.REINDEX_BATCH_SIZE)
+
+        # The catch-up (and every provider call) happens without locks
+        for _ in range(CATCH_UP_ROUNDS):
+            caught_up = await _catch_up(session, run_id, target, batch_size)
+            logger.info(f"Reindex run {run_id}: caught up {caught_up} changed proposals")
+            if caught_up <= batch_size:
+                break
+
+        # Readers keep going; writers to the live table wait for the swap
+        live = target.live_table
+        await session.execute(text(f"LOCK TABLE {live.name} IN EXCLUSIVE MODE"))
+        skipped = await _skip_stale(session, run_id, target)
+        if skipped:
+            logger.info(f"Reindex run {run_id}: {skipped} proposals changed during the swap, left to the sweep")
+
+        if target.name == "embeddings":
+            await _match_vector_dimension(session, run_id)
+
+        shadow_value = getattr(ReindexShadow, target.live_column)
+        result = await session.execute(
+            update(live)
+            .where(live.c.proposal_id == ReindexShadow.proposal_id, ReindexShadow.run_id == run_id)
+            .values({target.live_column: shadow_value})
+        )
+        swapped = result.rowcount
+        await session.execute(
+            update(proposals_table)
+            .where(proposals_table.c.id == ReindexShadow.proposal_id, ReindexShadow.run_id == run_id)
+            .values(updated_at=func.now())
+        )
+        await session.execute(delete(ReindexShadow).where(ReindexShadow.run_id == run_id))
+        run.status = "swapped"
+        run.swapped_at = func.now()
+        await session.commit()
+
+    logger.info(f"Reindex run {run_id} ({target.name}) swapped in: {swapped} proposals")
+    return swapped
+
+
+async def _match_vector_dimension(session: AsyncSession, run_id: int) -> None:
+    """Change the live vector column type if the new model has another dimension."""
+    new_dimension = (await session.execute(
+        select(func.vector_dims(ReindexShadow.embedding))
+        .where(ReindexShadow.run_id == run_id, ReindexShadow.embedding.isnot(None))
+        .limit(1)
+    )).scalar()
+    current_dimension = (await session.execute(text(
+        "SELECT atttypmod FROM pg_attribute "
+        "WHERE attrelid = 'proposal_vectors'::regclass AND attname = 'embedding'"
+    ))).scalar()
+    if new_dimension is None or new_dimension == current_dimension:
+        return
+    logger.warning(f"Embedding dimension changes from {current_dimension} to {new_dimension}")
+    # The binary-code index casts to the dimension, so it is rebuilt for the new one
+    has_bit_index = (await session.execute(text("SELECT to_regclass(:name)"), {"name": BIT_INDEX})).scalar()
+    await session.execute(text(f"DROP INDEX IF EXISTS {BIT_INDEX}"))
+    # The swap overwrites every live row with a shadow value in the same
+    # transaction; the rest stay NULL until the embedding sweep fills them
+    await session.execute(text(
+        f"ALTER TABLE proposal_vectors ALTER COLUMN embedding TYPE vector({int(new_dimension)}) USING NULL"
+    ))
+    if has_bit_index is not None:
+        await session.execute(text(bit_index_ddl(new_dimension)))
+
+
+async def run_status(session: AsyncSession, limit: int = 10) -> List[dict]:
+    """Recent runs with their progress."""
+    done = func.coalesce(func.sum(ReindexPartition.rows_done), 0)
+    result = await session.execute(
+        select(ReindexRun, done, func.count(ReindexPartition.partition).filter(ReindexPartition.done.is_(False)))
+        .outerjoin(ReindexPartition, ReindexPartition.run_id == ReindexRun.id)
+        .group_by(ReindexRun.id)
+        .order_by(ReindexRun.id.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            "id": run.id,
+            "target": run.target,
+            "status": run.status,
+            "rows_done": rows_done,
+            "rows_total": run.rows_total,
+            "open_partitions": open_partitions,
+            "options": run.options,
+            "created_at": run.created_at,
+            "finished_at": run.finished_at,
+            "swapped_at": run.swapped_at,
+            "error": run.error,
+        }
+        for run, rows_done, open_partitions in result.all()
+    ]
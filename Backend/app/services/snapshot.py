@@ -0,0 +1,549 @@
+"""
+Binary COPY snapshots of the proposal archive.
+
+A snapshot is a directory with a ``manifest.json`` and, per table, gzip
+compressed chunks of PostgreSQL binary ``COPY`` output
+(``<table>/00000.copy.gz``). Chunks are keyset ranges of proposal ids, so
+every chunk is a complete COPY stream that can be loaded independently and
+in parallel. The manifest records each chunk's row count and SHA-256, the
+Alembic revision and the ``updated_at`` high-water marks.
+
+All chunks of a dump are read in one exported snapshot (as ``pg_dump -j``
+does), so a dump is consistent even while the archive is being written.
+
+Incremental dumps hold the rows changed after the base snapshot's
+high-water marks (minus ``WATERMARK_OVERLAP`` for transactions that were
+still open when the base was taken), plus the ids of all live proposals so
+deletions are applied on restore.
+
+Full restores drop the secondary indexes and foreign keys of the restored
+tables, load all chunks in parallel and recreate them afterwards. The
+dropped definitions are kept in ``.restore-ddl.json`` next to the manifest
+until they are recreated, so an interrupted restore can be resumed.
+Incremental restores load into unlogged staging tables and upsert from
+there in one transaction.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from uuid import UUID
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import zlib
+
+from sqlalchemy import Table
+
+from ..config import settings
+from ..database import engine
+from ..models.near_duplicate import ProposalLSHBucket, ProposalSignature
+from ..models.proposal import proposal_contents_table, proposal_vectors_table, proposals_table
+from ..models.tag import TagDictionary
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+RESTORE_DDL = ".restore-ddl.json"
+LIVE_IDS = "live_ids"
+STAGING_PREFIX = "_snapshot_"
+
+WATERMARK_OVERLAP = timedelta(minutes=5)
+READ_BLOCK = 1024 * 1024
+
+
+class SnapshotTable(NamedTuple):
+    table: Table
+    key: Optional[str]  # proposal id column chunks are split on (None: a single chunk)
+    watermark: Optional[str]  # table whose updated_at marks changes (None: always dumped in full)
+    changed: Optional[str]  # incremental filter, "{}" is the high-water parameter
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    @property
+    def columns(self) -> List[str]:
+        return [column.name for column in self.table.c]
+
+    @property
+    def conflict(self) -> List[str]:
+        return [column.name for column in self.table.primary_key]
+
+
+_CHANGED_PROPOSALS = "proposal_id IN (SELECT id FROM proposals WHERE updated_at > {})"
+
+# Parents first
+SNAPSHOT_TABLES = [
+    SnapshotTable(proposals_table, "id", "proposals", "updated_at > {}"),
+    SnapshotTable(proposal_contents_table, "proposal_id", "proposals", _CHANGED_PROPOSALS),
+    SnapshotTable(proposal_vectors_table, "proposal_id", "proposals", _CHANGED_PROPOSALS),
+    SnapshotTable(ProposalSignature.__table__, "proposal_id", "proposal_signatures", "updated_at > {}"),
+    SnapshotTable(
+        ProposalLSHBucket.__table__, "proposal_id", "proposal_signatures",
+        "proposal_id IN (SELECT proposal_id FROM proposal_signatures WHERE updated_at > {})",
+    ),
+    SnapshotTable(TagDictionary.__table__, None, None, None),
+]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_list(columns: List[str]) -> str:
+    return ", ".join(_quote(column) for column in columns)
+
+
+def _row_count(status: str) -> int:
+    # asyncpg returns the command tag, e.g. "COPY 1234" or "INSERT 0 1234"
+    return int(status.split()[-1])
+
+
+class _ChunkWriter:
+    """Gzip-compresses a COPY stream to a file, hashing the compressed bytes."""
+
+    def __init__(self, path: str, level: int):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.file = open(self.tmp_path, "wb")
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self.file.write(data)
+            self.sha256.update(data)
+            self.size += len(data)
+
+    def write(self, data: bytes) -> None:
+        self._emit(self.compressor.compress(data))
+
+    def close(self) -> None:
+        self._emit(self.compressor.flush())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def _read_chunk(path: str):
+    """Decompressed blocks of a chunk file."""
+    f = await asyncio.to_thread(gzip.open, path, "rb")
+    try:
+        while True:
+            block = await asyncio.to_thread(f.read, READ_BLOCK)
+            if not block:
+                return
+            yield block
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+async def _run_parallel(jobs: list, workers: int) -> list:
+    """Await job coroutine functions with at most ``workers`` in flight, in order of the list."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, job in enumerate(jobs):
+        queue.put_nowait((index, job))
+    results = [None] * len(jobs)
+
+    async def worker():
+        while not queue.empty():
+            index, job = queue.get_nowait()
+            results[index] = await job()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, min(workers, len(jobs))))]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
+
+
+class _Connection:
+    """Raw asyncpg connection checked out of the API engine's pool."""
+
+    async def __aenter__(self):
+        self.conn = await engine.connect()
+        raw = await self.conn.get_raw_connection()
+        return raw.driver_connection
+
+    async def __aexit__(self, *exc_info):
+        await self.conn.close()
+
+
+def read_manifest(directory: str) -> dict:
+    with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')} in {directory}")
+    return manifest
+
+
+async def _revision(conn) -> Optional[str]:
+    return await conn.fetchval("SELECT version_num FROM alembic_version LIMIT 1")
+
+
+async def _boundaries(conn, chunk_rows: int) -> List[Optional[UUID]]:
+    """Proposal id keyset bounds splitting the archive into chunks of about ``chunk_rows``."""
+    total = await conn.fetchval("SELECT count(*) FROM proposals")
+    rows = await conn.fetch(
+        "SELECT id FROM (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM proposals) ranked "
+        "WHERE rn % $1 = 0 AND rn < $2 ORDER BY id",
+        max(1, chunk_rows), total,
+    )
+    return [None, *(row["id"] for row in rows), None]
+
+
+def _chunk_query(spec: SnapshotTable, lower, upper, since: Optional[datetime]):
+    conditions, args = [], []
+    if spec.key is not None:
+        if lower is not None:
+            args.append(lower)
+            conditions.append(f"{_quote(spec.key)} > ${len(args)}")
+        if upper is not None:
+            args.append(upper)
+            conditions.append(f"{_quote(spec.key)} <= ${len(args)}")
+    if since is not None and spec.changed is not None:
+        args.append(since)
+        conditions.append(spec.changed.format(f"${len(args)}"))
+    query = f"SELECT {_column_list(spec.columns)} FROM {_quote(spec.name)}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, args
+
+
+async def _dump_chunk(
+    snapshot_id: str, query: str, args: list, path: str, level: int, keep_empty: bool = False
+) -> Optional[dict]:
+    async with _Connection() as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            await conn.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+            writer = await asyncio.to_thread(_ChunkWriter, path, level)
+
+            async def sink(data):
+                await asyncio.to_thread(writer.write, bytes(data))
+
+            try:
+                status = await conn.copy_from_query(query, *args, output=sink, format="binary")
+            except BaseException:
+                await asyncio.to_thread(writer.abort)
+                raise
+            await asyncio.to_thread(writer.close)
+
+    rows = _row_count(status)
+    if rows == 0 and not keep_empty:
+        os.remove(path)
+        return None
+    return {"file": os.path.basename(path), "rows": rows, "bytes": writer.size, "sha256": writer.sha256.hexdigest()}
+
+
+async def dump(
+    directory: str,
+    workers: int,
+    chunk_rows: int,
+    base: Optional[str] = None,
+    level: Optional[int] = None,
+) -> dict:
+    """
+    Write a snapshot to ``directory`` (which must not hold one already).
+
+    Args:
+        base: Directory of the snapshot an incremental dump builds on (None: full dump)
+
+    Returns:
+        The manifest.
+    """
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        raise ValueError(f"{directory} already holds a snapshot")
+    level = settings.SNAPSHOT_COMPRESSION_LEVEL if level is None else level
+    base_manifest = read_manifest(base) if base else None
+
+    async with _Connection() as conn:
+        # The coordinating transaction stays open so workers can attach to its snapshot
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            snapshot_id = await conn.fetchval("SELECT pg_export_snapshot()")
+            revision = await _revision(conn)
+            if base_manifest is not None and base_manifest["revision"] != revision:
+                raise ValueError(
+                    f"Base snapshot is at revision {base_manifest['revision']}, the database at {revision}; "
+                    f"take a full snapshot"
+                )
+            high_water = {
+                "proposals": await conn.fetchval("SELECT max(updated_at) FROM proposals"),
+                "proposal_signatures": await conn.fetchval("SELECT max(updated_at) FROM proposal_signatures"),
+            }
+            bounds = await _boundaries(conn, chunk_rows)
+
+            since = {}
+            if base_manifest is not None:
+                for name, value in base_manifest["high_water"].items():
+                    since[name] = datetime.fromisoformat(value) - WATERMARK_OVERLAP if value else None
+
+            jobs, layout = [], []
+            for spec in SNAPSHOT_TABLES:
+                os.makedirs(os.path.join(directory, spec.name), exist_ok=True)
+                ranges = list(zip(bounds, bounds[1:])) if spec.key else [(None, None)]
+                for number, (lower, upper) in enumerate(ranges):
+                    query, args = _chunk_query(spec, lower, upper, since.get(spec.watermark))
+                    path = os.path.join(directory, spec.name, f"{number:05d}.copy.gz")
+                    jobs.append(lambda q=query, a=args, p=path: _dump_chunk(snapshot_id, q, a, p, level))
+                    layout.append(spec.name)
+            if base_manifest is not None:
+                path = os.path.join(directory, f"{LIVE_IDS}.copy.gz")
+                jobs.append(lambda p=path: _dump_chunk(snapshot_id, "SELECT id FROM proposals", [], p, level, True))
+                layout.append(LIVE_IDS)
+
+            results = await _run_parallel(jobs, workers)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "kind": "incremental" if base_manifest else "full",
+        "id": datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"),
+        "base": base_manifest["id"] if base_manifest else None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "revision": revision,
+        "high_water": {name: value.isoformat() if value else None for name, value in high_water.items()},
+        "tables": {spec.name: {"columns": spec.columns, "chunks": []} for spec in SNAPSHOT_TABLES},
+    }
+    for name, chunk in zip(layout, results):
+        if chunk is None:
+            continue
+        if name == LIVE_IDS:
+            manifest[LIVE_IDS] = chunk
+        else:
+            manifest["tables"][name]["chunks"].append(chunk)
+
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    rows = sum(chunk["rows"] for table in manifest["tables"].values() for chunk in table["chunks"])
+    logger.info(f"Snapshot {manifest['id']} ({manifest['kind']}): {rows} rows in {directory}")
+    return manifest
+
+
+def _chunk_paths(directory: str, manifest: dict) -> List[tuple]:
+    """(path, expected sha256) of every file in a snapshot."""
+    paths = [
+        (os.path.join(directory, name, chunk["file"]), chunk["sha256"])
+        for name, table in manifest["tables"].items()
+        for chunk in table["chunks"]
+    ]
+    if LIVE_IDS in manifest:
+        paths.append((os.path.join(directory, manifest[LIVE_IDS]["file"]), manifest[LIVE_IDS]["sha256"]))
+    return paths
+
+
+async def verify(directory: str, workers: int) -> List[str]:
+    """Files of a snapshot that are missing or fail their checksum."""
+    manifest = read_manifest(directory)
+
+    async def check(path, expected):
+        try:
+            actual = await asyncio.to_thread(_file_sha256, path)
+        except FileNotFoundError:
+            return f"{path}: missing"
+        return None if actual == expected else f"{path}: checksum mismatch"
+
+    results = await _run_parallel(
+        [lambda p=path, e=expected: check(p, e) for path, expected in _chunk_paths(directory, manifest)],
+        workers,
+    )
+    return [problem for problem in results if problem]
+
+
+async def _load_chunk(path: str, table: str, columns: List[str]) -> int:
+    async with _Connection() as conn:
+        status = await conn.copy_to_table(table, source=_read_chunk(path), columns=columns, format="binary")
+    return _row_count(status)
+
+
+async def _deferrable_ddl(conn, tables: List[str]) -> dict:
+    """Secondary indexes and foreign keys of the tables (constraint indexes stay)."""
+    indexes = await conn.fetch(
+        """
+        SELECT i.indexrelid::regclass::text AS name, pg_get_indexdef(i.indexrelid) AS ddl
+        FROM pg_index i
+        WHERE i.indrelid = ANY($1::regclass[])
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid AND c.contype IN ('p', 'u', 'x')
+          )
+        """,
+        tables,
+    )
+    foreign_keys = await conn.fetch(
+        """
+        SELECT conrelid::regclass::text AS "table", conname AS name, pg_get_constraintdef(oid) AS ddl
+        FROM pg_constraint
+        WHERE contype = 'f' AND (conrelid = ANY($1::regclass[]) OR confrelid = ANY($1::regclass[]))
+        """,
+        tables,
+    )
+    return {
+        "indexes": [dict(row) for row in indexes],
+        "foreign_keys": [dict(row) for row in foreign_keys],
+    }
+
+
+async def _restore_full(directory: str, manifest: dict, workers: int, replace: bool) -> int:
+    tables = list(manifest["tables"])
+    state_path = os.path.join(directory, RESTORE_DDL)
+
+    async with _Connection() as conn:
+        if os.path.exists(state_path):
+            # Resuming: the interrupted run already emptied the tables and dropped these
+            with open(state_path, encoding="utf-8") as f:
+                ddl = json.load(f)
+            logger.info(f"Resuming restore; {len(ddl['indexes'])} indexes still to rebuild")
+        else:
+            non_empty = [
+                table for table in tables
+                if await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {_quote(table)})")
+            ]
+            if non_empty and not replace:
+                raise ValueError(f"Tables are not empty ({', '.join(non_empty)}); use --replace to overwrite them")
+            ddl = await _deferrable_ddl(conn, tables)
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump(ddl, f, indent=2)
+
+        async with conn.transaction():
+            for fk in ddl["foreign_keys"]:
+                await conn.execute(f"ALTER TABLE {fk['table']} DROP CONSTRAINT IF EXISTS {_quote(fk['name'])}")
+            for index in ddl["indexes"]:
+                await conn.execute(f"DROP INDEX IF EXISTS {index['name']}")
+            await conn.execute(f"TRUNCATE {', '.join(_quote(table) for table in tables)}")
+
+    jobs = [
+        lambda p=os.path.join(directory, name, chunk["file"]), t=name, c=table["columns"]: _load_chunk(p, t, c)
+        for name, table in manifest["tables"].items()
+        for chunk in table["chunks"]
+    ]
+    rows = sum(await _run_parallel(jobs, workers))
+    logger.info(f"Loaded {rows} rows; rebuilding {len(ddl['indexes'])} indexes")
+
+    async def build(statement):
+        async with _Connection() as conn:
+            await conn.execute(statement)
+
+    await _run_parallel([lambda s=index["ddl"]: build(s) for index in ddl["indexes"]], workers)
+    # Foreign keys are validated as they are added
+    await _run_parallel(
+        [
+            lambda s=f"ALTER TABLE {fk['table']} ADD CONSTRAINT {_quote(fk['name'])} {fk['ddl']}": build(s)
+            for fk in ddl["foreign_keys"]
+        ],
+        1,
+    )
+    os.remove(state_path)
+    return rows
+
+
+async def _restore_incremental(directory: str, manifest: dict, workers: int) -> int:
+    specs = {spec.name: spec for spec in SNAPSHOT_TABLES}
+    staging = {name: STAGING_PREFIX + name for name in manifest["tables"]}
+
+    async with _Connection() as conn:
+        for name, stage in staging.items():
+            await conn.execute(f"DROP TABLE IF EXISTS {_quote(stage)}")
+            await conn.execute(f"CREATE UNLOGGED TABLE {_quote(stage)} (LIKE {_quote(name)} INCLUDING DEFAULTS)")
+        live_ids = STAGING_PREFIX + LIVE_IDS
+        await conn.execute(f"DROP TABLE IF EXISTS {_quote(live_ids)}")
+        await conn.execute(f"CREATE UNLOGGED TABLE {_quote(live_ids)} (id uuid PRIMARY KEY)")
+
+    try:
+        jobs = [
+            lambda p=os.path.join(directory, name, chunk["file"]), t=staging[name], c=table["columns"]: _load_chunk(p, t, c)
+            for name, table in manifest["tables"].items()
+            for chunk in table["chunks"]
+        ]
+        if LIVE_IDS in manifest:
+            jobs.append(lambda p=os.path.join(directory, manifest[LIVE_IDS]["file"]): _load_chunk(p, live_ids, ["id"]))
+        await _run_parallel(jobs, workers)
+
+        rows = 0
+        async with _Connection() as conn:
+            async with conn.transaction():
+                for name, table in manifest["tables"].items():
+                    spec, stage, columns = specs[name], _quote(staging[name]), table["columns"]
+                    if spec.changed is None:
+                        # Dumped in full every time
+                        await conn.execute(f"DELETE FROM {_quote(name)}")
+                    elif name == "proposal_lsh_buckets":
+                        # Bucket sets are replaced per proposal
+                        await conn.execute(
+                            f"DELETE FROM {_quote(name)} WHERE proposal_id IN (SELECT proposal_id FROM {stage})"
+                        )
+                    updates = [column for column in columns if column not in spec.conflict]
+                    action = (
+                        "DO UPDATE SET " + ", ".join(f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in updates)
+                        if updates else "DO NOTHING"
+                    )
+                    status = await conn.execute(
+                        f"INSERT INTO {_quote(name)} ({_column_list(columns)}) "
+                        f"SELECT {_column_list(columns)} FROM {stage} "
+                        f"ON CONFLICT ({_column_list(spec.conflict)}) {action}"
+                    )
+                    rows += _row_count(status)
+                if LIVE_IDS in manifest:
+                    # Children follow through ON DELETE CASCADE
+                    status = await conn.execute(
+                        f"DELETE FROM proposals p WHERE NOT EXISTS (SELECT 1 FROM {_quote(live_ids)} l WHERE l.id = p.id)"
+                    )
+                    logger.info(f"Removed {_row_count(status)} deleted proposals")
+    finally:
+        async with _Connection() as conn:
+            for stage in [*staging.values(), live_ids]:
+                await conn.execute(f"DROP TABLE IF EXISTS {_quote(stage)}")
+    return rows
+
+
+async def restore(directory: str, workers: int, replace: bool = False, check: bool = True) -> int:
+    """
+    Restore a snapshot into the database (at the snapshot's Alembic revision).
+
+    Full snapshots replace the restored tables; incremental ones are applied
+    on top of their base (and any earlier incrementals), in order.
+
+    Returns:
+        Rows loaded (full) or upserted (incremental).
+    """
+    manifest = read_manifest(directory)
+    if check:
+        problems = await verify(directory, workers)
+        if problems:
+            raise ValueError("Snapshot is damaged:\n" + "\n".join(problems))
+
+    async with _Connection() as conn:
+        revision = await _revision(conn)
+    if revision != manifest["revision"]:
+        raise ValueError(
+            f"Snapshot is at revision {manifest['revision']}, the database at {revision}; "
+            f"migrate the database to the snapshot's revision first"
+        )
+
+    if manifest["kind"] == "full":
+        rows = await _restore_full(directory, manifest, workers, replace)
+    else:
+        rows = await _restore_incremental(directory, manifest, workers)
+
+    async with _Connection() as conn:
+        for name in manifest["tables"]:
+            await conn.execute(f"ANALYZE {_quote(name)}")
+    logger.info(f"Restored snapshot {manifest['id']} ({manifest['kind']}): {rows} rows")
+    return rows
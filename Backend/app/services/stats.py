@@ -0,0 +1,76 @@
+"""
+Aggregate statistics and facet counts over the proposal collection.
+
+Both are cached in Redis per collection version (see ``core.cache``) and
+preloaded by the cache warmer.
+"""
+from typing import Dict, List
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.cache import get_or_set_json, versioned_key
+from ..models.proposal import Proposal
+from .tags import top_tags
+
+
+async def proposal_overview(db: AsyncSession) -> dict:
+    """Total count and counts by status and top categories."""
+    # Total count
+    total_result = await db.execute(select(func.count(Proposal.id)))
+    total_count = total_result.scalar()
+    
+    # Count by status
+    status_result = await db.execute(
+        select(Proposal.status, func.count(Proposal.id))
+        .group_by(Proposal.status)
+    )
+    status_counts = dict(status_result.all())
+    
+    # Count by category
+    category_result = await db.execute(
+        select(Proposal.category, func.count(Proposal.id))
+        .where(Proposal.category.isnot(None))
+        .group_by(Proposal.category)
+        .order_by(func.count(Proposal.id).desc())
+        .limit(10)
+    )
+    category_counts = dict(category_result.all())
+    
+    return {
+        "total_proposals": total_count,
+        "by_status": status_counts,
+        "by_category": category_counts,
+    }
+
+
+async def _top_values(db: AsyncSession, column, limit: int) -> List[Dict]:
+    result = await db.execute(
+        select(column, func.count())
+        .where(column.isnot(None))
+        .group_by(column)
+        .order_by(func.count().desc(), column)
+        .limit(limit)
+    )
+    return [{"value": value, "count": count} for value, count in result.all()]
+
+
+async def proposal_facets(db: AsyncSession, limit: int = 20) -> dict:
+    """Most frequent categories, submitting organizations and tags."""
+    return {
+        "categories": await _top_values(db, Proposal.category, limit),
+        "organizations": await _top_values(db, Proposal.submitting_organization, limit),
+        "tags": [{"value": entry["tag"], "count": entry["count"]} for entry in await top_tags(db, limit)],
+    }
+
+
+async def cached_overview(db: AsyncSession) -> dict:
+    """Overview statistics, cached per collection version."""
+    key = await versioned_key(db, "stats:overview")
+    return await get_or_set_json(key, lambda: proposal_overview(db))
+
+
+async def cached_facets(db: AsyncSession, limit: int = 20) -> dict:
+    """Facet counts, cached per collection version and limit."""
+    key = await versioned_key(db, f"stats:facets:{limit}")
+    return await get_or_set_json(key, lambda: proposal_facets(db, limit))
@@ -0,0 +1,264 @@
+"""
+Background summary precomputation.
+
+Summaries are generated only by Celery workers, never on the request path.
+``run_summary_batch`` loads a batch of proposals, skips those whose content
+hash matches the hash their summary was generated from (or whose summary
+was written by hand), summarizes the rest with bounded concurrency and
+writes ``summary``, ``summary_preview`` and ``summary_source_hash``.
+
+A failed or empty summary increments ``summary_attempts`` and sets
+``summary_retry_at`` with exponential backoff (``SUMMARY_RETRY_DELAY``,
+doubled per failure); ``pending_summary_ids`` skips proposals until then
+and gives up after ``SUMMARY_MAX_ATTEMPTS`` until the content is edited.
+
+Providers follow ``AI_PROVIDER``: Gemini behind the shared LLM circuit
+breaker, or a local extractive summarizer (leading sentences) for ``fake``.
+
+Throughput counters are kept in a Redis hash so every worker contributes to
+the same metrics (``summary_metrics``).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+import asyncio
+import hashlib
+import logging
+import re
+import time
+
+from sqlalchemy import func, select
+
+from ..config import settings
+from ..core.fieldsets import SUMMARY_PREVIEW_LENGTH
+from ..core.redis_client import get_redis, get_sync_redis
+from ..core.resilience import CircuitOpenError, llm_breaker
+from ..database import TaskSessionLocal
+from ..models.proposal import Proposal, proposal_updates
+from .changes import STALE_HASH
+from .embeddings import genai_client, inject_faults
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt changes to regenerate all generated summaries
+PROMPT_VERSION = "1"
+
+METRICS_KEY = "metrics:summaries"
+
+# Content sent to the model per proposal (characters)
+MAX_INPUT_CHARS = 12000
+
+SUMMARY_PROMPT = """Fasse den folgenden Antrag in zwei bis drei sachlichen Sätzen auf Deutsch zusammen.
+Nenne Antragsteller, Kernforderung und Begründung, sofern angegeben. Antworte nur mit der Zusammenfassung.
+
+Titel: {title}
+
+{text}"""
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class BatchResult(NamedTuple):
+    summarized: int
+    skipped: int
+    failed: int
+
+
+def content_hash(title: str, text: str) -> str:
+    """Hash of the inputs a summary is generated from."""
+    return hashlib.sha256(f"{PROMPT_VERSION}\x00{title}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def make_preview(summary: Optional[str]) -> Optional[str]:
+    """Shorten a summary for result cards, cutting at a word boundary."""
+    if not summary:
+        return None
+    summary = " ".join(summary.split())
+    if len(summary) <= SUMMARY_PREVIEW_LENGTH:
+        return summary
+    cut = summary[:SUMMARY_PREVIEW_LENGTH].rsplit(" ", 1)[0]
+    return cut.rstrip(",;:-") + "..."
+
+
+def retry_at(attempts: int, now: datetime) -> datetime:
+    """When a proposal whose summary failed ``attempts`` times may be retried."""
+    return now + timedelta(seconds=settings.SUMMARY_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _extractive_summary(text: str, sentences: int = 3) -> str:
+    inject_faults()
+    parts = _SENTENCE_END.split(" ".join(text.split()))
+    return " ".join(parts[:sentences])
+
+
+def _gemini_summary(title: str, text: str) -> str:
+    if not llm_breaker.allow_sync():
+        raise CircuitOpenError(llm_breaker.name)
+    try:
+        model = genai_client().GenerativeModel(settings.GEMINI_MODEL)
+        response = model.generate_content(SUMMARY_PROMPT.format(title=title, text=text[:MAX_INPUT_CHARS]))
+        summary = response.text.strip()
+    except Exception:
+        llm_breaker.record_sync(False)
+        raise
+    llm_breaker.record_sync(True)
+    return summary
+
+
+def summarize(title: str, text: str) -> str:
+    """Summarize one proposal with the configured provider (blocking)."""
+    if settings.AI_PROVIDER == "fake":
+        return _extractive_summary(text)
+    return _gemini_summary(title, text)
+
+
+async def _load(proposal_ids: List[str]) -> list:
+    async with TaskSessionLocal() as session:
+        result = await session.execute(
+            select(
+                Proposal.id,
+                Proposal.title,
+                Proposal.full_content_text,
+                Proposal.summary,
+                Proposal.summary_preview,
+                Proposal.summary_source_hash,
+                Proposal.summary_attempts,
+            ).where(Proposal.id.in_(proposal_ids))
+        )
+        return result.all()
+
+
+async def _store(values: Dict[str, dict], failures: Dict[str, dict]) -> None:
+    async with TaskSessionLocal() as session:
+        for proposal_id, row in values.items():
+            for statement in proposal_updates(proposal_id, **row):
+                await session.execute(statement)
+        # Failure bookkeeping is invisible to readers: keep updated_at
+        for proposal_id, row in failures.items():
+            for statement in proposal_updates(proposal_id, touch=False, **row):
+                await session.execute(statement)
+        await session.commit()
+
+
+def _record_metrics(result: BatchResult, busy_seconds: float) -> None:
+    try:
+        with get_sync_redis().pipeline(transaction=False) as pipe:
+            pipe.hincrby(METRICS_KEY, "summarized", result.summarized)
+            pipe.hincrby(METRICS_KEY, "skipped", result.skipped)
+            pipe.hincrby(METRICS_KEY, "failed", result.failed)
+            pipe.hincrby(METRICS_KEY, "batches", 1)
+            pipe.hincrbyfloat(METRICS_KEY, "busy_seconds", busy_seconds)
+            pipe.hset(METRICS_KEY, "last_batch_at", time.time())
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record summary metrics: {e}")
+
+
+def run_summary_batch(proposal_ids: List[str]) -> BatchResult:
+    """
+    Summarize a batch of proposals (blocking; for Celery workers).
+
+    Raises:
+        CircuitOpenError: If the LLM breaker is open (nothing is written for
+            proposals that were not summarized)
+    """
+    start = time.perf_counter()
+    rows = asyncio.run(_load(proposal_ids))
+
+    updates: Dict[str, dict] = {}
+    failures: Dict[str, dict] = {}
+    pending = []
+    skipped = 0
+    for row in rows:
+        if row.summary and row.summary_source_hash is None:
+            # Hand-written summary: only backfill the preview
+            if not row.summary_preview:
+                updates[row.id] = {"summary_preview": make_preview(row.summary)}
+            else:
+                skipped += 1
+            continue
+        digest = content_hash(row.title, row.full_content_text)
+        if digest == row.summary_source_hash:
+            skipped += 1
+            continue
+        pending.append((row, digest))
+
+    def run(item):
+        row, digest = item
+        try:
+            return row, digest, summarize(row.title, row.full_content_text)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Summary failed for proposal {row.id}: {e}")
+            return row, digest, None
+
+    summarized = failed = 0
+    try:
+        if pending:
+            with ThreadPoolExecutor(max_workers=settings.SUMMARY_CONCURRENCY) as executor:
+                for row, digest, summary in executor.map(run, pending):
+                    if not summary:
+                        attempts = row.summary_attempts + 1
+                        failures[row.id] = {
+                            "summary_attempts": attempts,
+                            "summary_retry_at": retry_at(attempts, datetime.now(timezone.utc)),
+                        }
+                        failed += 1
+                        continue
+                    updates[row.id] = {
+                        "summary": summary,
+                        "summary_preview": make_preview(summary),
+                        "summary_source_hash": digest,
+                        "summary_attempts": 0,
+                        "summary_retry_at": None,
+                    }
+                    summarized += 1
+    finally:
+        # Keep what was summarized before a breaker trip
+        if updates or failures:
+            asyncio.run(_store(updates, failures))
+
+    result = BatchResult(summarized=summarized, skipped=skipped, failed=failed)
+    _record_metrics(result, time.perf_counter() - start)
+    logger.info(f"Summary batch: {result.summarized} summarized, {result.skipped} skipped, {result.failed} failed")
+    return result
+
+
+async def pending_summary_ids(limit: int) -> List[str]:
+    """
+    IDs of proposals without a summary or preview, or whose generated summary is stale.
+
+    Proposals in failure backoff or out of attempts are left out.
+    """
+    async with TaskSessionLocal() as session:
+        result = await session.execute(
+            select(Proposal.id)
+            .where(
+                (Proposal.summary.is_(None))
+                | (Proposal.summary == "")
+                | (Proposal.summary_preview.is_(None))
+                | (Proposal.summary_source_hash == STALE_HASH)
+            )
+            .where(Proposal.summary_attempts < settings.SUMMARY_MAX_ATTEMPTS)
+            .where((Proposal.summary_retry_at.is_(None)) | (Proposal.summary_retry_at <= func.now()))
+            .order_by(Proposal.created_at)
+            .limit(limit)
+        )
+        return [str(proposal_id) for proposal_id in result.scalars().all()]
+
+
+async def summary_metrics() -> dict:
+    """Pipeline throughput counters for monitoring."""
+    raw = await get_redis().hgetall(METRICS_KEY)
+    summarized = int(raw.get("summarized", 0))
+    busy_seconds = float(raw.get("busy_seconds", 0.0))
+    return {
+        "summarized": summarized,
+        "skipped": int(raw.get("skipped", 0)),
+        "failed": int(raw.get("failed", 0)),
+        "batches": int(raw.get("batches", 0)),
+        "busy_seconds": round(busy_seconds, 3),
+        "throughput_per_second": round(summarized / busy_seconds, 3) if busy_seconds else None,
+        "last_batch_at": float(raw["last_batch_at"]) if "last_batch_at" in raw else None,
+    }
@@ -0,0 +1,61 @@
+"""
+Tag dictionary queries.
+
+``tag_dictionary`` holds one row per normalized tag (case- and
+diacritic-folded, see ``models.tag.normalize_tag``) with its display label
+and usage count. Counts are maintained by the ``Proposal`` write hooks;
+``rebuild_tag_dictionary`` recomputes them from ``proposals.tag_keys``.
+"""
+from typing import Dict, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.proposal import Proposal
+from ..models.tag import TagDictionary, normalize_tag
+
+
+def _entries(rows) -> List[Dict]:
+    return [{"tag": label, "key": key, "count": count} for key, label, count in rows]
+
+
+async def top_tags(db: AsyncSession, limit: int = 50) -> List[Dict]:
+    """Most used tags."""
+    result = await db.execute(
+        select(TagDictionary.key, TagDictionary.label, TagDictionary.usage_count)
+        .where(TagDictionary.usage_count > 0)
+        .order_by(TagDictionary.usage_count.desc(), TagDictionary.key)
+        .limit(limit)
+    )
+    return _entries(result.all())
+
+
+async def suggest_tags(db: AsyncSession, prefix: str, limit: int = 10) -> List[Dict]:
+    """Tags starting with a prefix (folded like the tags), most used first."""
+    key = normalize_tag(prefix)
+    if not key:
+        return []
+    pattern = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    result = await db.execute(
+        select(TagDictionary.key, TagDictionary.label, TagDictionary.usage_count)
+        .where(TagDictionary.key.like(pattern), TagDictionary.usage_count > 0)
+        .order_by(TagDictionary.usage_count.desc(), TagDictionary.key)
+        .limit(limit)
+    )
+    return _entries(result.all())
+
+
+async def rebuild_tag_dictionary(session: AsyncSession) -> int:
+    """Recompute all usage counts from the proposals; returns the number of tags in use."""
+    keys = select(func.unnest(Proposal.tag_keys).label("key")).subquery()
+    # Labels of tags missing from the dictionary fall back to the key
+    used = select(keys.c.key, keys.c.key, func.count()).group_by(keys.c.key)
+    await session.execute(update(TagDictionary).values(usage_count=0))
+    stmt = pg_insert(TagDictionary).from_select(["key", "label", "usage_count"], used)
+    result = await session.execute(stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={"usage_count": stmt.excluded.usage_count},
+    ))
+    await session.commit()
+    return result.rowcount
@@ -0,0 +1,382 @@
+"""
+Streaming PDF uploads.
+
+Request bodies are written to disk in ``UPLOAD_CHUNK_SIZE`` chunks as they
+arrive, so API worker memory does not depend on file size or the number of
+concurrent uploads. While streaming, ``StreamingUpload``:
+
+- aborts as soon as the size limit is exceeded (413)
+- sniffs the PDF header in the first kilobyte (415)
+- computes the SHA-256 incrementally
+
+Completed files are stored content-addressed as ``UPLOAD_DIR/<sha256>.pdf``.
+A Redis marker, set when a stored file is queued for processing and cleared
+if processing fails for good, tells duplicate uploads apart from retries.
+
+Resumable uploads keep their state in ``UPLOAD_DIR/.partial``
+(``<id>.json`` metadata and ``<id>.part`` data). Each chunk is appended at
+the current offset under an exclusive ``flock`` on the data file; after an
+interrupted request the client reads the offset and continues from there.
+"""
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from ..config import settings
+from ..core.redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF-"
+
+# The PDF header may be preceded by up to 1024 bytes of garbage
+SNIFF_BYTES = 1024
+
+PARTIAL_DIR = ".partial"
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Stored uploads queued for (or done with) processing, by file name
+QUEUED_PREFIX = "upload:queued:"
+
+
+class StreamingUpload:
+    """Write a byte stream to a file with size limit, PDF sniffing and hashing."""
+
+    def __init__(self, path: str, max_size: int, offset: int = 0):
+        self.path = path
+        self.max_size = max_size
+        self.offset = offset
+        self.size = offset
+        self.sha256 = hashlib.sha256()
+        self._sniff: Optional[bytearray] = bytearray() if offset == 0 else None
+        self._buffer = bytearray()
+        self._file = None
+
+    async def open(self) -> None:
+        def _open():
+            handle = open(self.path, "r+b" if self.offset else "wb")
+            handle.seek(self.offset)
+            handle.truncate()
+            return handle
+
+        self._file = await asyncio.to_thread(_open)
+
+    def check_magic(self, final: bool = False) -> None:
+        """Raise 415 once the sniffed header rules out a PDF."""
+        if self._sniff is None:
+            return
+        if PDF_MAGIC in self._sniff:
+            self._sniff = None
+        elif final or len(self._sniff) >= SNIFF_BYTES:
+            raise HTTPException(status_code=415, detail="File is not a PDF")
+
+    async def write(self, data: bytes) -> None:
+        """Append data; raises 413/415 as soon as the stream is known to be invalid."""
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds the maximum size of {self.max_size} bytes",
+            )
+        if self._sniff is not None:
+            self._sniff += data[:SNIFF_BYTES - len(self._sniff)]
+            self.check_magic()
+        self._buffer += data
+        if len(self._buffer) >= settings.UPLOAD_CHUNK_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the buffered chunk (hashing happens off the event loop as well)."""
+        if not self._buffer:
+            return
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+
+        def _write():
+            self.sha256.update(chunk)
+            self._file.write(chunk)
+
+        await asyncio.to_thread(_write)
+
+    async def close(self) -> None:
+        """Flush and close; validates the PDF header of short files."""
+        try:
+            await self.flush()
+            if self.size == 0:
+                raise HTTPException(status_code=400, detail="Empty upload")
+            self.check_magic(final=True)
+        finally:
+            await self.release()
+
+    async def release(self) -> None:
+        """Close the file without validating (data written so far is kept)."""
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+    async def abort(self) -> None:
+        """Close and delete the file."""
+        await self.release()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _partial_dir() -> str:
+    path = os.path.join(settings.UPLOAD_DIR, PARTIAL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temp_path() -> str:
+    """Path for a new in-flight upload."""
+    return os.path.join(_partial_dir(), f"{uuid.uuid4().hex}.tmp")
+
+
+def store_upload(path: str, sha256: str, keep: bool = False) -> str:
+    """
+    Move a completed upload to its content-addressed location.
+
+    Storing the same content again is a no-op. With ``keep`` the upload is
+    linked instead of moved, so it stays in place until its session ends.
+
+    Returns:
+        The final path
+    """
+    final_path = os.path.join(settings.UPLOAD_DIR, f"{sha256}.pdf")
+    if os.path.exists(final_path):
+        if not keep:
+            os.remove(path)
+        return final_path
+    if not keep:
+        os.replace(path, final_path)
+        return final_path
+    try:
+        os.link(path, final_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        tmp_path = f"{final_path}.tmp"
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, final_path)
+    return final_path
+
+
+def _queued_key(path: str) -> str:
+    return QUEUED_PREFIX + os.path.basename(path)
+
+
+async def claim_processing(path: str) -> bool:
+    """
+    Mark a stored upload as queued for processing.
+
+    Returns:
+        False if the same file was queued or processed before (a duplicate).
+        Without Redis, every upload counts as new.
+    """
+    try:
+        return bool(await get_redis().set(_queued_key(path), 1, nx=True))
+    except Exception as e:
+        logger.warning(f"Could not check for duplicate upload {path}: {e}")
+        return True
+
+
+async def release_processing(path: str) -> None:
+    """Forget a claim whose task could not be queued, so a retry queues it."""
+    try:
+        await get_redis().delete(_queued_key(path))
+    except Exception as e:
+        logger.warning(f"Could not release upload {path}: {e}")
+
+
+def release_processing_sync(path: str) -> None:
+    """Forget a stored upload whose processing failed for good (blocking; for tasks)."""
+    try:
+        get_sync_redis().delete(_queued_key(path))
+    except Exception as e:
+        logger.warning(f"Could not release upload {path}: {e}")
+
+
+def check_extension(filename: str) -> None:
+    """Reject filenames with an extension other than .pdf."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension != ".pdf" or extension not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=415, detail="Only PDF files can be uploaded")
+
+
+# Resumable uploads
+
+def _session_paths(upload_id: str) -> Tuple[str, str]:
+    if not _UPLOAD_ID_RE.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    directory = _partial_dir()
+    return os.path.join(directory, f"{upload_id}.json"), os.path.join(directory, f"{upload_id}.part")
+
+
+def _write_session(meta_path: str, session: dict) -> None:
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(session, f)
+    os.replace(tmp_path, meta_path)
+
+
+def cleanup_stale_sessions() -> int:
+    """Delete resumable uploads not touched within UPLOAD_SESSION_TTL."""
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+    removed = 0
+    directory = _partial_dir()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += name.endswith(".json")
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def create_session(filename: str, size: int, meeting_info: dict) -> dict:
+    """Start a resumable upload."""
+    check_extension(filename)
+    if size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE} bytes",
+        )
+    cleanup_stale_sessions()
+
+    session = {
+        "upload_id": uuid.uuid4().hex,
+        "filename": os.path.basename(filename),
+        "size": size,
+        "offset": 0,
+        "meeting_info": meeting_info,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    meta_path, data_path = _session_paths(session["upload_id"])
+    open(data_path, "wb").close()
+    _write_session(meta_path, session)
+    return session
+
+
+def load_session(upload_id: str) -> dict:
+    """Read the state of a resumable upload."""
+    meta_path, data_path = _session_paths(upload_id)
+    try:
+        with open(meta_path) as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    # The data file is the source of truth after an interrupted request
+    try:
+        session["offset"] = os.path.getsize(data_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def append_chunk(upload_id: str, offset: int, stream) -> dict:
+    """
+    Append a chunk to a resumable upload.
+
+    Returns:
+        The session, with ``path`` and ``sha256`` set once the upload is
+        complete. The session stays until ``finish_session``, so a
+        completion whose processing could not be queued can be retried by
+        sending an empty chunk at the final offset.
+
+    Raises:
+        HTTPException: 404 unknown upload, 409 offset mismatch or concurrent
+            chunk, 413 chunk beyond the declared size, 415 not a PDF
+    """
+    meta_path, data_path = _session_paths(upload_id)
+    await asyncio.to_thread(load_session, upload_id)
+
+    # Lock the data file: the metadata file is replaced on every update
+    try:
+        lock = await asyncio.to_thread(open, data_path, "rb")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=409, detail="Another chunk is being written")
+
+        session = await asyncio.to_thread(load_session, upload_id)
+        if offset != session["offset"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset mismatch: upload is at {session['offset']}",
+                headers={"Upload-Offset": str(session["offset"])},
+            )
+
+        upload = StreamingUpload(data_path, max_size=session["size"], offset=offset)
+        await upload.open()
+        try:
+            async for data in stream:
+                await upload.write(data)
+            if offset == 0 and upload.size > 0:
+                # The first chunk must contain the PDF header
+                upload.check_magic(final=True)
+            await upload.flush()
+        except HTTPException as e:
+            await upload.release()
+            if e.status_code == 415:
+                # Not a PDF: drop the whole upload
+                await asyncio.to_thread(_remove_session, meta_path, data_path)
+            else:
+                # Discard this chunk only
+                await asyncio.to_thread(os.truncate, data_path, offset)
+            raise
+        except Exception:
+            # Client went away: keep what arrived so it can resume
+            await upload.release()
+            raise
+        await upload.release()
+
+        session["offset"] = await asyncio.to_thread(os.path.getsize, data_path)
+        if session["offset"] < session["size"]:
+            await asyncio.to_thread(_write_session, meta_path, session)
+            return session
+
+        session["sha256"] = await asyncio.to_thread(_file_sha256, data_path)
+        session["path"] = await asyncio.to_thread(store_upload, data_path, session["sha256"], True)
+        return session
+    finally:
+        lock.close()
+
+
+def _remove_session(meta_path: str, data_path: str) -> None:
+    for path in (data_path, meta_path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def finish_session(upload_id: str) -> None:
+    """Delete a completed resumable upload once its file is queued (or a known duplicate)."""
+    _remove_session(*_session_paths(upload_id))
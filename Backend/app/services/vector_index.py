@@ -0,0 +1,605 @@
+"""
+In-process exact vector index backed by memory-mapped NumPy arrays.
+
+For the archive's corpus size (tens of thousands of 768-dim vectors) an exact
+scan is a single BLAS matrix-vector product, which avoids a pgvector round
+trip for semantic search.
+
+Layout of ``VECTOR_INDEX_DIR``:
+
+- ``vectors-<n>.f32``: L2-normalized float32 matrix (capacity x dimension),
+  memory-mapped read-only by every worker, so the page cache holds one copy
+- ``codes-<n>.u8``: sign-bit codes of the vectors (capacity x dimension / 8)
+  for the binary-quantized first stage of two-stage search
+- ``meta-<generation>.npz``: ids, status/category codes, submission dates
+  and a validity mask, used to pre-filter rows as boolean masks
+- ``manifest.json``: current generation, row count and file names
+
+One worker at a time (guarded by an ``flock``) refreshes the index
+incrementally from ``Proposal.embedding`` changes; all workers pick up a new
+generation by checking the manifest before each search. Rows a generation
+has published are never rewritten: changed vectors are appended and the old
+row invalidated, and growing or compacting the index writes new files. The
+refresh watermark is the start of the oldest transaction open when the
+previous refresh read its changes, so late commits are not missed.
+
+With ``VECTOR_SEARCH_MODE = "two_stage"``, searches scan only the codes and
+rerank the best ``VECTOR_OVERSAMPLING * k`` rows exactly, so the float32
+pages of the other rows need not be resident.
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+from sqlalchemy import func, select
+
+from ..config import settings
+from ..models.proposal import Proposal
+from .changes import write_horizon
+from .quantization import binary_codes, candidate_count, hamming_distances
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+LOCK_FILE = "index.lock"
+
+# Sentinel for missing submission dates (never matches a date filter)
+NO_DATE = np.iinfo(np.int64).min
+
+MIN_CAPACITY = 1024
+
+
+def _epoch_seconds(value: Optional[datetime]) -> int:
+    if value is None:
+        return NO_DATE
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+class IndexSnapshot:
+    """One immutable generation of the index, swapped atomically on reload."""
+
+    def __init__(
+        self,
+        manifest: dict,
+        vectors: np.ndarray,
+        codes: Optional[np.ndarray],
+        meta: Dict[str, np.ndarray],
+    ):
+        self.generation: int = manifest["generation"]
+        self.count: int = manifest["count"]
+        self.capacity: int = manifest["capacity"]
+        self.vectors_file: str = manifest["vectors_file"]
+        self.codes_file: Optional[str] = manifest.get("codes_file")  # absent in indexes built before codes
+        self.statuses: List[str] = manifest["statuses"]
+        self.categories: List[str] = manifest["categories"]
+        self.watermark: Optional[str] = manifest.get("watermark")
+        self.vectors = vectors
+        self.codes = codes
+        self.ids: np.ndarray = meta["ids"]
+        self.status: np.ndarray = meta["status"]
+        self.category: np.ndarray = meta["category"]
+        self.dates: np.ndarray = meta["dates"]
+        self.valid: np.ndarray = meta["valid"]
+
+    @property
+    def size(self) -> int:
+        """Number of live vectors."""
+        return int(self.valid[:self.count].sum())
+
+
+class VectorIndex:
+    """Memory-mapped exact cosine-similarity index over proposal embeddings."""
+
+    def __init__(self, directory: str, dimension: int):
+        self.directory = directory
+        self.dimension = dimension
+        self.code_width = (dimension + 7) // 8
+
+        self._manifest_mtime: Optional[int] = None
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._reload_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def reload(self) -> Optional[IndexSnapshot]:
+        """
+        Map the current generation if the manifest changed.
+
+        Returns:
+            The current snapshot, or None if no index has been built yet.
+        """
+        manifest_path = self._path(MANIFEST)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._snapshot
+
+        if mtime == self._manifest_mtime:
+            return self._snapshot
+
+        with self._reload_lock:
+            if mtime == self._manifest_mtime:
+                return self._snapshot
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                current = self._snapshot
+                if current is None or manifest["generation"] != current.generation:
+                    self._snapshot = self._load(manifest)
+                self._manifest_mtime = mtime
+            except (FileNotFoundError, ValueError, KeyError) as e:
+                # A writer replaced files mid-load; retry on the next call
+                logger.warning(f"Vector index reload failed: {e}")
+
+        return self._snapshot
+
+    def _load(self, manifest: dict) -> IndexSnapshot:
+        if manifest["dimension"] != self.dimension:
+            raise ValueError(
+                f"Index dimension {manifest['dimension']} does not match {self.dimension}"
+            )
+
+        with np.load(self._path(manifest["meta_file"])) as npz:
+            meta = {name: npz[name] for name in ("ids", "status", "category", "dates", "valid")}
+
+        vectors = np.memmap(
+            self._path(manifest["vectors_file"]),
+            dtype=np.float32,
+            mode="r",
+            shape=(manifest["capacity"], self.dimension),
+        )
+
+        codes = None
+        if manifest.get("codes_file"):
+            codes = np.memmap(
+                self._path(manifest["codes_file"]),
+                dtype=np.uint8,
+                mode="r",
+                shape=(manifest["capacity"], self.code_width),
+            )
+
+        snapshot = IndexSnapshot(manifest, vectors, codes, meta)
+        logger.info(f"Loaded vector index generation {snapshot.generation} ({snapshot.count} rows)")
+        return snapshot
+
+    @property
+    def size(self) -> int:
+        """Number of live vectors."""
+        snapshot = self.reload()
+        return snapshot.size if snapshot else 0
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def filter_mask(
+        snapshot: IndexSnapshot,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """Build a boolean mask of rows matching the metadata filters."""
+        n = snapshot.count
+        mask = snapshot.valid[:n].copy()
+
+        if status is not None:
+            code = snapshot.statuses.index(status) if status in snapshot.statuses else -1
+            mask &= snapshot.status[:n] == code
+
+        if category is not None:
+            # Same substring, case-insensitive semantics as the SQL ILIKE filter
+            needle = category.lower()
+            codes = [i for i, name in enumerate(snapshot.categories) if needle in name.lower()]
+            mask &= np.isin(snapshot.category[:n], codes)
+
+        if date_from is not None:
+            mask &= snapshot.dates[:n] >= _epoch_seconds(date_from)
+
+        if date_to is not None:
+            mask &= (snapshot.dates[:n] <= _epoch_seconds(date_to)) & (snapshot.dates[:n] != NO_DATE)
+
+        return mask
+
+    @staticmethod
+    def default_oversampling() -> int:
+        """Configured oversampling factor, or 0 for exact search."""
+        return settings.VECTOR_OVERSAMPLING if settings.VECTOR_SEARCH_MODE == "two_stage" else 0
+
+    def _top_k(
+        self,
+        snapshot: IndexSnapshot,
+        queries: np.ndarray,
+        k: int,
+        mask: np.ndarray,
+        oversampling: int = 0,
+    ) -> List[List[Tuple[UUID, float]]]:
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        rows = np.flatnonzero(mask)
+        if rows.size == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        k = min(k, rows.size)
+        if oversampling and snapshot.codes is not None and rows.size > candidate_count(k, oversampling):
+            return self._two_stage(snapshot, queries, k, rows, candidate_count(k, oversampling))
+
+        n = snapshot.count
+        if rows.size < n // 2:
+            # Selective filter: only touch the matching rows
+            scores = snapshot.vectors[rows] @ queries.T
+        else:
+            # One pass over the whole matrix, masked afterwards
+            scores = np.asarray(snapshot.vectors[:n] @ queries.T)[rows]
+
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            results.append([
+                (UUID(bytes=snapshot.ids[rows[i]].tobytes()), float(column[i]))
+                for i in top
+            ])
+        return results
+
+    @staticmethod
+    def _two_stage(
+        snapshot: IndexSnapshot,
+        queries: np.ndarray,
+        k: int,
+        rows: np.ndarray,
+        candidates: int,
+    ) -> List[List[Tuple[UUID, float]]]:
+        """Hamming-distance prefilter on the codes, exact cosine rerank of the candidates."""
+        n = snapshot.count
+        if rows.size < n // 2:
+            codes = snapshot.codes[rows]
+        else:
+            codes = np.asarray(snapshot.codes[:n])[rows]
+
+        results = []
+        for query, query_code in zip(queries, binary_codes(queries)):
+            distances = hamming_distances(codes, query_code)
+            # Sorted rows keep the reads from the vector file sequential
+            shortlist = np.sort(rows[np.argpartition(distances, candidates - 1)[:candidates]])
+            scores = snapshot.vectors[shortlist] @ query
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results.append([
+                (UUID(bytes=snapshot.ids[shortlist[i]].tobytes()), float(scores[i]))
+                for i in top
+            ])
+        return results
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int,
+        oversampling: Optional[int] = None,
+    ) -> List[List[Tuple[UUID, float]]]:
+        """
+        Top-k cosine search for a batch of query vectors.
+
+        Args:
+            queries: Array of shape (m, dimension)
+            k: Number of results per query
+            oversampling: Two-stage candidate factor (0: exact; default from settings)
+
+        Returns:
+            For each query, a list of (proposal id, similarity) pairs
+        """
+        snapshot = self.reload()
+        if snapshot is None:
+            return [[] for _ in range(len(queries))]
+        if oversampling is None:
+            oversampling = self.default_oversampling()
+        return self._top_k(snapshot, queries, k, snapshot.valid[:snapshot.count], oversampling)
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        oversampling: Optional[int] = None,
+    ) -> Tuple[List[Tuple[UUID, float]], int]:
+        """
+        Top-k cosine search for a single query with metadata filters.
+
+        Exact, or two-stage when ``oversampling`` (default from settings) is set.
+
+        Returns:
+            Tuple of ((proposal id, similarity) pairs, number of rows matching the filters)
+        """
+        snapshot = self.reload()
+        if snapshot is None:
+            return [], 0
+        if oversampling is None:
+            oversampling = self.default_oversampling()
+
+        mask = self.filter_mask(snapshot, status, category, date_from, date_to)
+        hits = self._top_k(snapshot, np.asarray([query]), k, mask, oversampling)[0]
+        return hits, int(mask.sum())
+
+    # ------------------------------------------------------------------
+    # Refresh (single writer)
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _writer_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(LOCK_FILE), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    async def refresh(self, session) -> int:
+        """
+        Apply embedding changes since the last refresh.
+
+        Only one process writes at a time; others return immediately and
+        pick up the new generation on their next search.
+
+        Returns:
+            Number of rows written.
+        """
+        with self._writer_lock() as acquired:
+            if not acquired:
+                return 0
+            return await self._refresh_locked(session)
+
+    async def _refresh_locked(self, session) -> int:
+        snapshot = self.reload()
+        watermark = snapshot.watermark if snapshot else None
+
+        # Rows committed after the query below have updated_at >= horizon
+        horizon = await write_horizon(session)
+
+        query = select(
+            Proposal.id,
+            Proposal.embedding,
+            Proposal.status,
+            Proposal.category,
+            Proposal.submitted_date,
+            Proposal.updated_at,
+        ).order_by(Proposal.updated_at)
+        if watermark:
+            query = query.where(Proposal.updated_at >= datetime.fromisoformat(watermark))
+        else:
+            query = query.where(Proposal.embedding.isnot(None))
+
+        changed = (await session.execute(query)).all()
+
+        # Deletions do not bump updated_at; reconcile ids when the counts drift
+        live_ids = None
+        live_count = (await session.execute(
+            select(func.count(Proposal.id)).where(Proposal.embedding.isnot(None))
+        )).scalar()
+        if live_count != self.size:
+            live_ids = set((await session.execute(
+                select(Proposal.id).where(Proposal.embedding.isnot(None))
+            )).scalars().all())
+
+        if not changed and live_ids is None:
+            return 0
+        return await asyncio.to_thread(self._write, changed, live_ids, horizon)
+
+    def _write(self, changed: list, live_ids: Optional[set], horizon: Optional[datetime] = None) -> int:
+        """
+        Publish a new generation with ``changed`` applied.
+
+        Rows of published generations are never modified: changed vectors are
+        appended past the published count (invalidating their old row), and
+        growing or compacting writes new generation files. Readers switch over
+        with the atomic manifest replace.
+
+        Args:
+            changed: Rows with id, embedding, status, category, submitted_date
+            live_ids: All ids with an embedding (None: no reconciliation)
+            horizon: Watermark for the next refresh (None: keep the current one)
+        """
+        snapshot = self.reload()
+        if snapshot is None:
+            n, capacity, vectors_file, codes_file, generation = 0, 0, None, None, 0
+            ids = np.zeros((0, 16), dtype=np.uint8)
+            status = np.zeros(0, dtype=np.int16)
+            category = np.zeros(0, dtype=np.int32)
+            dates = np.zeros(0, dtype=np.int64)
+            valid = np.zeros(0, dtype=bool)
+            statuses, categories, watermark = [], [], None
+        else:
+            n = snapshot.count
+            capacity = snapshot.capacity
+            vectors_file = snapshot.vectors_file
+            codes_file = snapshot.codes_file
+            generation = snapshot.generation + 1
+            ids = snapshot.ids[:n].copy()
+            status = snapshot.status[:n].copy()
+            category = snapshot.category[:n].copy()
+            dates = snapshot.dates[:n].copy()
+            valid = snapshot.valid[:n].copy()
+            statuses = list(snapshot.statuses)
+            categories = list(snapshot.categories)
+            watermark = snapshot.watermark
+        if horizon is not None:
+            watermark = horizon.isoformat()
+
+        row_of: Dict[bytes, int] = {ids[i].tobytes(): i for i in np.flatnonzero(valid)}
+
+        def code(vocabulary: List[str], value: Optional[str]) -> int:
+            if value is None:
+                return -1
+            if value not in vocabulary:
+                vocabulary.append(value)
+            return vocabulary.index(value)
+
+        # Metadata changes are applied to the new meta file; vector changes are appended
+        written = 0
+        appended: List[Tuple[bytes, np.ndarray, tuple]] = []
+        for record in changed:
+            key = record.id.bytes
+            row = row_of.get(key)
+            meta = (
+                code(statuses, record.status),
+                code(categories, record.category),
+                _epoch_seconds(record.submitted_date),
+            )
+            if record.embedding is None:
+                if row is not None:
+                    valid[row] = False
+                    del row_of[key]
+                    written += 1
+                continue
+
+            vector = np.asarray(record.embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            if row is not None and np.array_equal(snapshot.vectors[row], vector):
+                status[row], category[row], dates[row] = meta
+            else:
+                if row is not None:
+                    valid[row] = False
+                row_of[key] = n + len(appended)
+                appended.append((key, vector, meta))
+            written += 1
+
+        if live_ids is not None:
+            live = {uuid_.bytes for uuid_ in live_ids}
+            for key, row in list(row_of.items()):
+                # Appended rows are filtered below; only published ones are invalidated
+                if key not in live and row < n:
+                    valid[row] = False
+                    del row_of[key]
+            appended = [entry for entry in appended if entry[0] in live]
+
+        def grow(array: np.ndarray, values) -> np.ndarray:
+            return np.concatenate([array, np.asarray(values, dtype=array.dtype).reshape((-1,) + array.shape[1:])])
+
+        ids = grow(ids, [np.frombuffer(key, dtype=np.uint8) for key, _, _ in appended])
+        status = grow(status, [meta[0] for _, _, meta in appended])
+        category = grow(category, [meta[1] for _, _, meta in appended])
+        dates = grow(dates, [meta[2] for _, _, meta in appended])
+        valid = grow(valid, [True] * len(appended))
+        new_vectors = np.asarray([vector for _, vector, _ in appended], dtype=np.float32).reshape(-1, self.dimension)
+        count = n + len(appended)
+
+        dead = count - int(valid.sum())
+        if vectors_file is None or codes_file is None or count > capacity or dead > max(MIN_CAPACITY, count // 4):
+            # New generation files holding only the live rows
+            keep = np.flatnonzero(valid[:n])
+            ids, status, category, dates = (
+                np.concatenate([array[keep], array[n:]]) for array in (ids, status, category, dates)
+            )
+            count = len(ids)
+            valid = np.ones(count, dtype=bool)
+            capacity = max(MIN_CAPACITY, count * 2)
+            vectors_file = f"vectors-{generation}.f32"
+            codes_file = f"codes-{generation}.u8"
+            vectors = np.memmap(
+                self._path(vectors_file), dtype=np.float32, mode="w+", shape=(capacity, self.dimension)
+            )
+            codes = np.memmap(self._path(codes_file), dtype=np.uint8, mode="w+", shape=(capacity, self.code_width))
+            start = len(keep)
+            if start:
+                vectors[:start] = snapshot.vectors[keep]
+                if snapshot.codes is not None:
+                    codes[:start] = snapshot.codes[keep]
+                else:
+                    codes[:start] = binary_codes(vectors[:start])
+        else:
+            # Rows past the published count are invisible to readers of older generations
+            vectors = np.memmap(
+                self._path(vectors_file), dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+            )
+            codes = np.memmap(self._path(codes_file), dtype=np.uint8, mode="r+", shape=(capacity, self.code_width))
+            start = n
+
+        if len(new_vectors):
+            vectors[start:count] = new_vectors
+            codes[start:count] = binary_codes(new_vectors)
+        vectors.flush()
+        codes.flush()
+        del vectors, codes
+
+        meta_file = f"meta-{generation}.npz"
+        tmp_meta = self._path(meta_file + ".tmp")
+        with open(tmp_meta, "wb") as f:
+            np.savez(f, ids=ids, status=status, category=category, dates=dates, valid=valid)
+        os.replace(tmp_meta, self._path(meta_file))
+
+        manifest = {
+            "generation": generation,
+            "dimension": self.dimension,
+            "count": count,
+            "capacity": capacity,
+            "vectors_file": vectors_file,
+            "codes_file": codes_file,
+            "meta_file": meta_file,
+            "statuses": statuses,
+            "categories": categories,
+            "watermark": watermark,
+        }
+        tmp_manifest = self._path(MANIFEST + ".tmp")
+        with open(tmp_manifest, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, self._path(MANIFEST))
+
+        self._cleanup(keep={vectors_file, codes_file, meta_file, f"meta-{generation - 1}.npz"})
+        self.reload()
+
+        logger.info(f"Vector index refreshed: {written} rows written, generation {generation}")
+        return written
+
+    def _cleanup(self, keep: set) -> None:
+        """Remove files of older generations (mapped readers keep their view)."""
+        for name in os.listdir(self.directory):
+            if name.startswith(("vectors-", "codes-", "meta-")) and name not in keep and not name.endswith(".tmp"):
+                try:
+                    os.remove(self._path(name))
+                except FileNotFoundError:
+                    pass
+
+
+async def run_refresh_loop(interval: float) -> None:
+    """Periodically refresh the shared index (one writer across workers)."""
+    from ..database import AsyncSessionLocal
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await vector_index.refresh(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Vector index refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+# Global index instance
+vector_index = VectorIndex(settings.VECTOR_INDEX_DIR, settings.EMBEDDING_DIMENSION)
@@ -0,0 +1,145 @@
+"""
+Cache warming after deploys and ingestion.
+
+Preloads, with at most ``WARMUP_CONCURRENCY`` database sessions in flight:
+
+- hot proposals: the most viewed of the last week (view counts from
+  ``services.analytics``), topped up with the most recently created or
+  edited ones; their full responses go into the Redis response cache and
+  their rows, including the TOASTed text and the embedding, into the
+  Postgres buffers
+- the stats overview and facet counts (Redis, see ``services.stats``)
+- the most frequent queries of the last week per search type, from the
+  search analytics rollups: first result page with default parameters in
+  the Redis response cache (keys match requests for the normalized,
+  lower-cased query; degraded outcomes are not cached)
+
+Run at API startup (in the background, so it never delays readiness) and
+by the ``warm_caches`` Celery task after an ingestion completes. In a
+Celery worker only Redis and Postgres are warmed; in-process caches belong
+to the API workers.
+"""
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
+
+from ..api.v1.endpoints.search import cached_search
+from ..config import settings
+from ..core.cache import proposal_key, proposal_payload, set_json
+from ..core.conditional import collection_version
+from ..database import AsyncSessionLocal
+from ..models.analytics import SearchQueryDaily
+from ..models.proposal import Proposal
+from ..schemas.proposal import SearchType, TagMatch
+from .analytics import most_viewed_proposal_ids
+from .query_parser import parse_query
+from .stats import cached_facets, cached_overview
+
+logger = logging.getLogger(__name__)
+
+# Proposals loaded per query when warming rows
+PROPOSAL_CHUNK = 50
+
+# First result page as requested by the search UI (the endpoint's defaults)
+SEARCH_PAGE = 20
+
+
+async def _hot_proposal_ids(session, limit: int) -> List:
+    try:
+        viewed = [UUID(proposal_id) for proposal_id in await most_viewed_proposal_ids(limit)]
+    except Exception as e:
+        logger.warning(f"Could not read proposal views: {e}")
+        viewed = []
+    recent = await _recent_proposal_ids(session, limit) if len(viewed) < limit else []
+    return list(dict.fromkeys(viewed + list(recent)))[:limit]
+
+
+async def _recent_proposal_ids(session, limit: int) -> List:
+    result = await session.execute(
+        select(Proposal.id)
+        .order_by(func.greatest(Proposal.created_at, Proposal.updated_at).desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def _frequent_queries(session, limit: int) -> List:
+    searches = func.sum(SearchQueryDaily.searches)
+    result = await session.execute(
+        select(SearchQueryDaily.query, SearchQueryDaily.search_type)
+        .where(SearchQueryDaily.day >= date.today() - timedelta(days=7))
+        .group_by(SearchQueryDaily.query, SearchQueryDaily.search_type)
+        .order_by(searches.desc())
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def warm_caches(session_factory=AsyncSessionLocal) -> Dict[str, int]:
+    """
+    Warm caches and return how many items of each kind were loaded.
+
+    Failures of individual steps are logged and do not stop the others.
+    """
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(settings.WARMUP_CONCURRENCY)
+    counts = {"proposals": 0, "stats": 0, "queries": 0, "failed": 0}
+
+    async def run(kind: str, step: Callable[..., Awaitable[int]], *args) -> None:
+        async with semaphore:
+            try:
+                async with session_factory() as session:
+                    counts[kind] += await step(session, *args)
+            except Exception as e:
+                counts["failed"] += 1
+                logger.warning(f"Cache warmup step {kind} failed: {e}")
+
+    async def load_proposals(session, ids) -> int:
+        result = await session.execute(
+            select(Proposal).options(undefer(Proposal.embedding)).where(Proposal.id.in_(ids))
+        )
+        proposals = result.scalars().all()
+        for proposal in proposals:
+            await set_json(proposal_key(proposal.id, proposal.updated_at), proposal_payload(proposal))
+        return len(proposals)
+
+    async def load_stats(session) -> int:
+        await cached_overview(session)
+        await cached_facets(session)
+        return 2
+
+    async def load_query(session, query: str, search_type: str) -> int:
+        # Parsed-query cache of this process, also when the outcome is cached
+        parse_query(query)
+        await cached_search(
+            session, *version,
+            query, SearchType(search_type), SEARCH_PAGE, 0, None, None, None,
+            [], TagMatch.ANY, None, None, None,
+        )
+        return 1
+
+    try:
+        async with session_factory() as session:
+            proposal_ids = await _hot_proposal_ids(session, settings.WARMUP_PROPOSALS)
+            queries = await _frequent_queries(session, settings.WARMUP_QUERIES)
+            version = await collection_version(session)
+    except Exception as e:
+        logger.warning(f"Cache warmup skipped: {e}")
+        return counts
+
+    steps = [run("stats", load_stats)]
+    steps += [
+        run("proposals", load_proposals, proposal_ids[i:i + PROPOSAL_CHUNK])
+        for i in range(0, len(proposal_ids), PROPOSAL_CHUNK)
+    ]
+    steps += [run("queries", load_query, query, search_type) for query, search_type in queries]
+    await asyncio.gather(*steps)
+
+    logger.info(f"Cache warmup finished in {time.perf_counter() - start:.2f}s: {counts}")
+    return counts
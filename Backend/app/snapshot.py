@@ -0,0 +1,91 @@
+"""
+Dump and restore the proposal archive with binary COPY.
+
+Usage:
+    python -m app.snapshot dump backups/2026-10-19
+    python -m app.snapshot dump backups/2026-10-20 --incremental-from backups/2026-10-19
+    python -m app.snapshot verify backups/2026-10-19
+    python -m app.snapshot restore backups/2026-10-19 [--replace] [--workers 8]
+    python -m app.snapshot restore backups/2026-10-20
+
+Snapshots hold proposals with their contents, embeddings, near-duplicate
+signatures and the tag dictionary. Restore a full snapshot first, then its
+incrementals in order; the database must be at the snapshot's Alembic
+revision.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from .config import settings
+from .database import engine
+from .services.snapshot import dump, read_manifest, restore, verify
+
+
+async def _dump(args) -> int:
+    manifest = await dump(args.directory, args.workers, args.chunk_rows, base=args.incremental_from, level=args.level)
+    print(json.dumps({
+        "id": manifest["id"],
+        "kind": manifest["kind"],
+        "high_water": manifest["high_water"],
+        "rows": {name: sum(chunk["rows"] for chunk in table["chunks"]) for name, table in manifest["tables"].items()},
+    }, indent=2))
+    return 0
+
+
+async def _verify(args) -> int:
+    problems = await verify(args.directory, args.workers)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if not problems:
+        print(f"Snapshot {read_manifest(args.directory)['id']} is intact")
+    return 1 if problems else 0
+
+
+async def _restore(args) -> int:
+    rows = await restore(args.directory, args.workers, replace=args.replace, check=not args.skip_verify)
+    print(f"Restored {rows} rows")
+    return 0
+
+
+async def _main(args) -> int:
+    try:
+        return await args.handler(args)
+    except (ValueError, FileNotFoundError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = commands.add_parser("dump", help="write a snapshot to a new directory")
+    dump_parser.add_argument("directory")
+    dump_parser.add_argument("--incremental-from", metavar="DIRECTORY", help="only rows changed since this snapshot")
+    dump_parser.add_argument("--chunk-rows", type=int, default=settings.SNAPSHOT_CHUNK_ROWS, help="proposals per chunk")
+    dump_parser.add_argument("--level", type=int, default=None, help="gzip level (default: SNAPSHOT_COMPRESSION_LEVEL)")
+    dump_parser.set_defaults(handler=_dump)
+
+    verify_parser = commands.add_parser("verify", help="check the chunk checksums of a snapshot")
+    verify_parser.add_argument("directory")
+    verify_parser.set_defaults(handler=_verify)
+
+    restore_parser = commands.add_parser("restore", help="load a snapshot into the database")
+    restore_parser.add_argument("directory")
+    restore_parser.add_argument("--replace", action="store_true", help="overwrite non-empty tables (full snapshots)")
+    restore_parser.add_argument("--skip-verify", action="store_true", help="do not check checksums first")
+    restore_parser.set_defaults(handler=_restore)
+
+    for command in (dump_parser, verify_parser, restore_parser):
+        command.add_argument("--workers", type=int, default=settings.SNAPSHOT_WORKERS, help="parallel connections")
+
+    args = parser.parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,108 @@
 """
 Celery background tasks.
 """
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+import asyncio
 import logging
-from .celery import celery_app
+
+from sqlalchemy import func, select
+
+from .celery import BULK, INTERACTIVE, LANE_PRIORITY, LANE_QUEUES, celery_app
+from .config import settings
+from .core.queueing import claim_debounce_sync, clear_debounce, queue_room_sync
+from .core.redis_client import close_redis
+from .core.resilience import CircuitOpenError, backoff_delay, embedding_breaker
+from .database import TaskSessionLocal
+from .models.proposal import Proposal, proposal_updates
+from .services.embeddings import embed_texts, embedding_text
+from .services.analytics import rollup_search_events
+from .services.changes import STALE_HASH, text_hash
+from .services.extraction import Page, extract_proposals
+from .services.near_duplicates import index_missing, link_versions
+from .services.page_store import PageRecord, document_hash, page_store, read_pdf_pages
+from .services.query_parser import search_vector
+from .services.tags import rebuild_tag_dictionary
+from .services.uploads import release_processing_sync
+from .services.summaries import pending_summary_ids, run_summary_batch
+from .services.warmup import warm_caches as run_warmup
 
 logger = logging.getLogger(__name__)
 
+MAX_RETRIES = 5
+
+
+async def _store_extracted(proposals: List[dict], meeting_info: dict, file_path: str) -> List[str]:
+    """Insert extracted proposals, updating existing ones with the same proposal number."""
+    meeting_date = meeting_info.get("meeting_date")
+    if isinstance(meeting_date, str):
+        meeting_date = datetime.fromisoformat(meeting_date)
+    
+    ids = []
+    async with TaskSessionLocal() as session:
+        for extracted in proposals:
+            proposal = None
+            if extracted["proposal_number"]:
+                result = await session.execute(
+                    select(Proposal).where(Proposal.proposal_number == extracted["proposal_number"])
+                )
+                proposal = result.scalar_one_or_none()
+            if proposal is None:
+                proposal = Proposal(proposal_number=extracted["proposal_number"])
+                session.add(proposal)
+            
+            proposal.title = extracted["title"][:500]
+            proposal.proposal_type = extracted["proposal_type"]
+            proposal.full_content_text = extracted["full_content_text"]
+            proposal.search_vector = search_vector(extracted["full_content_text"])
+            proposal.source_document_path = file_path
+            proposal.source_document_page = extracted["source_document_page"]
+            proposal.meeting_name = meeting_info.get("meeting_name")
+            proposal.meeting_date = meeting_date
+            proposal.submitting_organization = meeting_info.get("organization")
+            proposal.processing_status = "processing"
+            await session.flush()
+            await link_versions(session, proposal)
+            ids.append(str(proposal.id))
+        await session.commit()
+    return ids
+
+
+def _current_lane(task) -> str:
+    routing_key = (task.request.delivery_info or {}).get("routing_key") or ""
+    return BULK if routing_key.endswith(".bulk") else INTERACTIVE
+
+
+def _ingest_pages(records: List[PageRecord], meeting_info: dict, file_path: str, lane: str) -> dict:
+    """Segment stored pages into proposals, save them and queue follow-up work."""
+    extraction = extract_proposals([Page(number=record.number, text=record.text) for record in records])
+    proposal_ids = asyncio.run(_store_extracted(extraction.proposals, meeting_info, file_path))
+    
+    # Embeddings follow in the same lane as the PDF
+    for proposal_id in proposal_ids:
+        generate_embeddings.apply_async(
+            args=(proposal_id,),
+            queue=LANE_QUEUES[lane][generate_embeddings.name],
+            priority=LANE_PRIORITY[lane],
+        )
+    enqueue_summaries(proposal_ids)
+    warm_caches.delay()
+    
+    return {
+        "proposals_extracted": len(proposal_ids),
+        "pages_cached": extraction.pages_cached,
+        "batches": extraction.batches,
+    }
+
 
 @celery_app.task(bind=True)
 def process_pdf(self, file_path: str, meeting_info: dict):
     """
     Process uploaded PDF file to extract proposals.
     
+    Page text (text layer or OCR) is read once per document and kept in the
+    page store; retries and reprocessing start from the stored pages.
+    
     Args:
         file_path: Path to the uploaded PDF file
         meeting_info: Dictionary containing meeting metadata
@@ -19,24 +110,111 @@ def process_pdf(self, file_path: str, meeting_info: dict):
     try:
         logger.info(f"Processing PDF: {file_path}")
         
-        # TODO: Implement PDF processing logic
-        # 1. Extract text from PDF using pdfplumber/pytesseract
-        # 2. Parse proposals using AI (Google Gemini)
-        # 3. Create embeddings for semantic search
-        # 4. Store in database
+        doc_hash = document_hash(file_path)
+        records = page_store.load(doc_hash)
+        if records is None:
+            records = read_pdf_pages(file_path)
+            page_store.save(doc_hash, records, {"source_path": file_path, "meeting_info": meeting_info})
+        
+        result = _ingest_pages(records, meeting_info, file_path, _current_lane(self))
         
-        # For now, just log the task
-        logger.info(f"PDF processing completed for: {file_path}")
+        logger.info(
+            f"PDF processing completed for: {file_path} "
+            f"({result['proposals_extracted']} proposals, {result['pages_cached']}/{len(records)} pages cached)"
+        )
         
         return {
             "status": "completed",
             "file_path": file_path,
-            "proposals_extracted": 0,  # TODO: Return actual count
+            "document_hash": doc_hash,
+            **result,
         }
-        
+    
+    except CircuitOpenError as e:
+        logger.warning(f"PDF processing for {file_path} postponed: {e}")
+        if self.request.retries >= MAX_RETRIES:
+            # Out of retries: uploading the file again queues it again
+            release_processing_sync(file_path)
+        countdown = settings.CIRCUIT_RESET_TIMEOUT + backoff_delay(self.request.retries, base=60)
+        raise self.retry(exc=e, countdown=countdown, max_retries=MAX_RETRIES)
     except Exception as e:
         logger.error(f"PDF processing failed for {file_path}: {e}")
-        self.retry(countdown=60, max_retries=3)
+        if self.request.retries >= MAX_RETRIES:
+            release_processing_sync(file_path)
+        raise self.retry(exc=e, countdown=backoff_delay(self.request.retries, base=60), max_retries=MAX_RETRIES)
+
+
+@celery_app.task(bind=True)
+def reprocess_document(self, doc_hash: str):
+    """
+    Re-run segmentation and parsing for a document from the page store.
+    
+    The PDF is not read again (no text extraction, no OCR).
+    
+    Args:
+        doc_hash: SHA-256 of the source document
+    """
+    metadata = page_store.metadata(doc_hash)
+    if metadata is None:
+        logger.warning(f"Document {doc_hash} is not in the page store")
+        return {"status": "missing", "document_hash": doc_hash}
+    
+    try:
+        result = _ingest_pages(
+            page_store.load(doc_hash),
+            metadata.get("meeting_info") or {},
+            metadata.get("source_path"),
+            _current_lane(self),
+        )
+        logger.info(f"Reprocessed document {doc_hash}: {result['proposals_extracted']} proposals")
+        return {"status": "completed", "document_hash": doc_hash, **result}
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Reprocessing of {doc_hash} postponed: {e}")
+        countdown = settings.CIRCUIT_RESET_TIMEOUT + backoff_delay(self.request.retries, base=60)
+        raise self.retry(exc=e, countdown=countdown, max_retries=MAX_RETRIES)
+    except Exception as e:
+        logger.error(f"Reprocessing failed for {doc_hash}: {e}")
+        raise self.retry(exc=e, countdown=backoff_delay(self.request.retries, base=60), max_retries=MAX_RETRIES)
+
+
+async def _load_embedding_text(proposal_id: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Embedding text of a proposal and the source hash of its stored embedding (None if missing)."""
+    async with TaskSessionLocal() as session:
+        result = await session.execute(
+            select(
+                Proposal.title,
+                Proposal.summary,
+                Proposal.full_content_text,
+                Proposal.embedding_source_hash,
+                Proposal.embedding.isnot(None),
+            ).where(Proposal.id == proposal_id)
+        )
+        row = result.first()
+    if row is None:
+        return None
+    title, summary, content, source_hash, has_embedding = row
+    return embedding_text(title, summary, content), source_hash if has_embedding else None
+
+
+async def _store_embedding(proposal_id: str, embedding: Optional[List[float]], source_hash: str) -> None:
+    """Store a new embedding, or only mark the proposal completed if ``embedding`` is None (unchanged)."""
+    values = {"processing_status": "completed", "processing_error": None}
+    if embedding is not None:
+        values.update(embedding=embedding, embedding_source_hash=source_hash)
+    async with TaskSessionLocal() as session:
+        if embedding is None:
+            # Nothing to write for a completed proposal, so updated_at (ETags,
+            # response caches, vector index) only moves on a status change
+            result = await session.execute(
+                select(Proposal.processing_status, Proposal.processing_error).where(Proposal.id == proposal_id)
+            )
+            row = result.first()
+            if row is None or (row.processing_status == "completed" and row.processing_error is None):
+                return
+        for statement in proposal_updates(proposal_id, **values):
+            await session.execute(statement)
+        await session.commit()
 
 
 @celery_app.task(bind=True)
@@ -44,16 +222,39 @@ def generate_embeddings(self, proposal_id: str):
     """
     Generate embeddings for semantic search.
     
+    Calls go through the shared embedding circuit breaker; while it is open
+    the task backs off without touching the provider. Proposals whose
+    embedding text is unchanged since the last run are skipped.
+    
     Args:
         proposal_id: ID of the proposal to generate embeddings for
     """
     try:
         logger.info(f"Generating embeddings for proposal: {proposal_id}")
+        clear_debounce(f"embedding:{proposal_id}")
         
-        # TODO: Implement embedding generation
-        # 1. Get proposal text from database
-        # 2. Generate embeddings using Google Gemini
-        # 3. Update proposal with embedding vector
+        loaded = asyncio.run(_load_embedding_text(proposal_id))
+        if loaded is None:
+            logger.warning(f"Proposal {proposal_id} not found, skipping embeddings")
+            return {"status": "skipped", "proposal_id": proposal_id}
+        
+        text, stored_hash = loaded
+        source_hash = text_hash(text)
+        if source_hash == stored_hash:
+            logger.info(f"Embedding text of {proposal_id} unchanged, skipping")
+            asyncio.run(_store_embedding(proposal_id, None, source_hash))
+            return {"status": "unchanged", "proposal_id": proposal_id}
+        
+        if not embedding_breaker.allow_sync():
+            raise CircuitOpenError(embedding_breaker.name)
+        try:
+            embedding = embed_texts([text])[0]
+        except Exception:
+            embedding_breaker.record_sync(False)
+            raise
+        embedding_breaker.record_sync(True)
+        
+        asyncio.run(_store_embedding(proposal_id, embedding, source_hash))
         
         logger.info(f"Embeddings generated for proposal: {proposal_id}")
         
@@ -61,13 +262,162 @@ def generate_embeddings(self, proposal_id: str):
             "status": "completed",
             "proposal_id": proposal_id,
         }
-        
+    
+    except CircuitOpenError as e:
+        # Wait at least until the breaker may admit a trial call
+        logger.warning(f"Embedding generation for {proposal_id} postponed: {e}")
+        countdown = settings.CIRCUIT_RESET_TIMEOUT + backoff_delay(self.request.retries, base=30)
+        raise self.retry(exc=e, countdown=countdown, max_retries=MAX_RETRIES)
     except Exception as e:
         logger.error(f"Embedding generation failed for {proposal_id}: {e}")
-        self.retry(countdown=30, max_retries=3)
+        raise self.retry(exc=e, countdown=backoff_delay(self.request.retries, base=30), max_retries=MAX_RETRIES)
+
+
+async def _stale_embedding_ids(limit: int) -> List[str]:
+    """IDs of proposals without an up-to-date embedding, untouched for EMBEDDING_SWEEP_MIN_AGE."""
+    cutoff = func.now() - timedelta(seconds=settings.EMBEDDING_SWEEP_MIN_AGE)
+    async with TaskSessionLocal() as session:
+        result = await session.execute(
+            select(Proposal.id)
+            .where(
+                (Proposal.embedding.is_(None)) | (Proposal.embedding_source_hash == STALE_HASH),
+                Proposal.updated_at < cutoff,
+            )
+            .order_by(Proposal.updated_at)
+            .limit(limit)
+        )
+        return [str(proposal_id) for proposal_id in result.scalars().all()]
+
+
+@celery_app.task
+def sweep_embeddings(limit: int = 1000):
+    """
+    Queue embeddings for proposals that have none or whose text was edited since.
+    
+    Picks up work deferred by full queues or lost with the broker. Fills the
+    bulk lane only up to its depth limit; the rest waits for the next sweep.
+    """
+    room = min(limit, queue_room_sync(generate_embeddings, BULK))
+    proposal_ids = asyncio.run(_stale_embedding_ids(room)) if room else []
+    
+    queued = 0
+    for proposal_id in proposal_ids:
+        # Skip proposals with a debounced run still pending
+        if not claim_debounce_sync(f"embedding:{proposal_id}", 0):
+            continue
+        generate_embeddings.apply_async(
+            args=(proposal_id,),
+            queue=LANE_QUEUES[BULK][generate_embeddings.name],
+            priority=LANE_PRIORITY[BULK],
+        )
+        queued += 1
+    logger.info(f"Embedding sweep queued {queued} proposals")
+    return {"status": "queued", "proposals": queued}
+
+
+def enqueue_summaries(proposal_ids: List[str]) -> None:
+    """Queue summary batches for the given proposals in the bulk lane."""
+    for start in range(0, len(proposal_ids), settings.SUMMARY_BATCH_SIZE):
+        summarize_proposals.apply_async(
+            args=(proposal_ids[start:start + settings.SUMMARY_BATCH_SIZE],),
+            queue=LANE_QUEUES[BULK][summarize_proposals.name],
+            priority=LANE_PRIORITY[BULK],
+        )
+
+
+@celery_app.task(bind=True)
+def summarize_proposals(self, proposal_ids: List[str]):
+    """
+    Precompute summaries and previews for a batch of proposals.
+    
+    Proposals whose content is unchanged since their summary was generated
+    are skipped.
+    
+    Args:
+        proposal_ids: IDs of the proposals to summarize
+    """
+    try:
+        result = run_summary_batch(proposal_ids)
+        return {"status": "completed", **result._asdict()}
+    
+    except CircuitOpenError as e:
+        logger.warning(f"Summaries for {len(proposal_ids)} proposals postponed: {e}")
+        countdown = settings.CIRCUIT_RESET_TIMEOUT + backoff_delay(self.request.retries, base=60)
+        raise self.retry(exc=e, countdown=countdown, max_retries=MAX_RETRIES)
+    except Exception as e:
+        logger.error(f"Summary batch failed: {e}")
+        raise self.retry(exc=e, countdown=backoff_delay(self.request.retries, base=60), max_retries=MAX_RETRIES)
+
+
+@celery_app.task
+def summarize_pending(limit: int = 1000):
+    """Queue summary batches for proposals that have no summary yet (up to the bulk lane's depth limit)."""
+    batches = queue_room_sync(summarize_proposals, BULK)
+    limit = min(limit, batches * settings.SUMMARY_BATCH_SIZE)
+    proposal_ids = asyncio.run(pending_summary_ids(limit)) if limit else []
+    enqueue_summaries(proposal_ids)
+    return {"status": "queued", "proposals": len(proposal_ids)}
+
+
+async def _index_near_duplicates(limit: int) -> int:
+    async with TaskSessionLocal() as session:
+        return await index_missing(session, limit)
+
+
+@celery_app.task
+def index_near_duplicates(limit: int = 1000):
+    """Compute MinHash signatures for proposals that have none (backfill)."""
+    indexed = asyncio.run(_index_near_duplicates(limit))
+    logger.info(f"Indexed {indexed} proposals for near-duplicate detection")
+    return {"status": "completed", "indexed": indexed}
+
+
+async def _rebuild_tag_dictionary() -> int:
+    async with TaskSessionLocal() as session:
+        return await rebuild_tag_dictionary(session)
+
+
+@celery_app.task
+def rebuild_tags():
+    """Recompute tag dictionary usage counts (repairs drift from out-of-band writes)."""
+    tags = asyncio.run(_rebuild_tag_dictionary())
+    logger.info(f"Tag dictionary rebuilt: {tags} tags in use")
+    return {"status": "completed", "tags": tags}
+
+
+async def _rollup_search_analytics(days: int) -> None:
+    async with TaskSessionLocal() as session:
+        for offset in range(days):
+            await rollup_search_events(session, date.today() - timedelta(days=offset))
+
+
+@celery_app.task
+def rollup_search_analytics(days: int = 2):
+    """
+    Recompute the daily search analytics rollups.
+    
+    Args:
+        days: Number of days to recompute, counting back from today
+    """
+    asyncio.run(_rollup_search_analytics(days))
+    return {"status": "completed", "days": days}
+
+
+async def _warm_caches() -> dict:
+    try:
+        return await run_warmup(TaskSessionLocal)
+    finally:
+        # The shared async Redis client is bound to this task's event loop
+        await close_redis()
+
+
+@celery_app.task
+def warm_caches():
+    """Preload hot proposals, stats and facets after an ingestion."""
+    return {"status": "completed", **asyncio.run(_warm_caches())}
 
 
 @celery_app.task
 def health_check():
     """Simple health check task for Celery."""
-    return {"status": "healthy", "message": "Celery is running"}
\ No newline at end of file
+    return {"status": "healthy", "message": "Celery is running"}
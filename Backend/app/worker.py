@@ -0,0 +1,38 @@
+"""
+Start a Celery worker for one lane profile, or the beat scheduler.
+
+Usage:
+    python -m app.worker interactive
+    python -m app.worker bulk [extra celery worker options]
+    python -m app.worker beat [extra celery beat options]
+
+Run exactly one beat process per deployment.
+"""
+import sys
+
+from .celery import celery_app, WORKER_PROFILES
+
+
+def worker_argv(profile_name: str) -> list:
+    """Build the celery worker arguments for a profile."""
+    profile = WORKER_PROFILES[profile_name]
+    return [
+        "worker",
+        "--loglevel=info",
+        f"--hostname={profile_name}@%h",
+        f"--queues={','.join(profile['queues'])}",
+        f"--concurrency={profile['concurrency']}",
+        f"--prefetch-multiplier={profile['prefetch_multiplier']}",
+    ]
+
+
+BEAT = "beat"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in (*WORKER_PROFILES, BEAT):
+        sys.exit(f"Usage: python -m app.worker {{{'|'.join((*WORKER_PROFILES, BEAT))}}} [celery options]")
+    if sys.argv[1] == BEAT:
+        celery_app.start(argv=["beat", "--loglevel=info"] + sys.argv[2:])
+    else:
+        celery_app.worker_main(argv=worker_argv(sys.argv[1]) + sys.argv[2:])
@@ -0,0 +1,2 @@
+# Backend/benchmarks/__init__.py
+"""Benchmarks"""
\ No newline at end of file
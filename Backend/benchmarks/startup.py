@@ -0,0 +1,125 @@
+"""
+Import-time and startup benchmark for the API.
+
+Measures, in fresh interpreter processes:
+
+1. Wall time of ``import app.main`` (what every uvicorn worker pays on boot)
+2. The slowest modules from ``python -X importtime``
+3. Whether heavy AI/PDF libraries were pulled in at import time (they must be
+   imported lazily on first use)
+4. Optionally (``--lifespan``), the time to run the application lifespan
+   startup against the configured database in the configured STARTUP_MODE
+
+Usage (from Backend/):
+    python -m benchmarks.startup [--runs 5] [--top 15] [--lifespan]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    "google.generativeai",
+    "langchain",
+    "langchain_google_genai",
+    "pdfplumber",
+    "pypdf",
+    "pytesseract",
+]
+
+_IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed:.6f}}|{{','.join(heavy)}}")
+"""
+
+_LIFESPAN_SNIPPET = """
+import asyncio, time
+from app.main import app, lifespan
+
+async def main():
+    start = time.perf_counter()
+    async with lifespan(app):
+        print(f"{time.perf_counter() - start:.6f}")
+
+asyncio.run(main())
+"""
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_import(runs: int):
+    """Import app.main in fresh processes and return timings and heavy modules."""
+    timings, heavy = [], set()
+    for _ in range(runs):
+        output = _run(_IMPORT_SNIPPET.format(heavy=HEAVY_MODULES)).stdout.strip().splitlines()[-1]
+        elapsed, loaded = output.split("|")
+        timings.append(float(elapsed))
+        heavy.update(filter(None, loaded.split(",")))
+    return timings, sorted(heavy)
+
+
+def slowest_imports(top: int):
+    """Return the modules with the highest cumulative import time (microseconds)."""
+    stderr = _run("import app.main", "-X", "importtime").stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        entries.append((int(cumulative_us), int(self_us), name.strip()))
+    entries.sort(reverse=True)
+    return entries[:top]
+
+
+def measure_lifespan(runs: int):
+    """Run the lifespan startup in fresh processes and return timings."""
+    return [float(_run(_LIFESPAN_SNIPPET).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    parser.add_argument("--lifespan", action="store_true", help="Also time lifespan startup (needs a database)")
+    args = parser.parse_args()
+
+    timings, heavy = measure_import(args.runs)
+    print(f"import app.main ({args.runs} runs): "
+          f"median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms")
+
+    print("\nSlowest imports (cumulative):")
+    for cumulative_us, self_us, name in slowest_imports(args.top):
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    if heavy:
+        print(f"\nFAIL: heavy modules imported at startup: {', '.join(heavy)}")
+    else:
+        print("\nOK: no heavy AI/PDF modules imported at startup")
+
+    if args.lifespan:
+        lifespan_timings = measure_lifespan(args.runs)
+        print(f"\nlifespan startup ({args.runs} runs): "
+              f"median {statistics.median(lifespan_timings) * 1000:.1f} ms, "
+              f"max {max(lifespan_timings) * 1000:.1f} ms")
+
+    sys.exit(1 if heavy else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Recall and latency of two-stage (binary-quantized) vector search against exact search.
+
+For each oversampling factor, reports recall@k of the two-stage results
+against the exact top-k, and per-query latency of both.
+
+Backends:
+
+- ``numpy`` (default): the in-process index. Uses a synthetic clustered corpus
+  built in a temporary directory, or an existing index with ``--index-dir``.
+- ``pgvector`` (``--database``): the configured database; queries are stored
+  embeddings with noise added. Run ``alembic upgrade head`` first so the
+  binary-code HNSW index exists.
+
+Usage (from Backend/):
+    python -m benchmarks.vector_search [--rows 50000] [--queries 200] [--k 20] [--oversampling 2 5 10 20]
+    python -m benchmarks.vector_search --index-dir vector_index
+    python -m benchmarks.vector_search --database --queries 50
+"""
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from app.config import settings
+
+
+class _Record(NamedTuple):
+    id: uuid.UUID
+    embedding: list
+    status: Optional[str]
+    category: Optional[str]
+    submitted_date: Optional[datetime]
+    updated_at: datetime
+
+
+def _synthetic_corpus(rows: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    # Topic clusters with per-document spread, like embeddings of a proposal archive
+    centers = rng.standard_normal((max(1, rows // 200), dimension)).astype(np.float32)
+    assignment = rng.integers(0, len(centers), rows)
+    return centers[assignment] + 0.8 * rng.standard_normal((rows, dimension)).astype(np.float32)
+
+
+def _percentiles(samples: List[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50 {statistics.median(samples) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+
+
+def _recall(exact: List[list], approximate: List[list]) -> float:
+    hits = sum(len({i for i, _ in a} & {i for i, _ in e}) for e, a in zip(exact, approximate))
+    return hits / max(1, sum(len(e) for e in exact))
+
+
+def _timed(search, queries: np.ndarray) -> tuple:
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        timings.append(time.perf_counter() - start)
+    return results, timings
+
+
+def bench_numpy(args) -> None:
+    from app.services.vector_index import VectorIndex
+
+    rng = np.random.default_rng(args.seed)
+    dimension = settings.EMBEDDING_DIMENSION
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(args.index_dir or tmp, dimension)
+        if args.index_dir is None:
+            print(f"Building synthetic index: {args.rows} x {dimension}")
+            corpus = _synthetic_corpus(args.rows, dimension, rng)
+            now = datetime.now(timezone.utc)
+            index._write([_Record(uuid.uuid4(), vector, None, None, None, now) for vector in corpus], None)
+
+        snapshot = index.reload()
+        if snapshot is None or snapshot.codes is None:
+            raise SystemExit("Index is empty or has no binary codes; refresh it first")
+        rows = np.flatnonzero(snapshot.valid[:snapshot.count])
+        sample = np.asarray(snapshot.vectors[rng.choice(rows, args.queries)])
+        queries = sample + 0.3 * rng.standard_normal(sample.shape).astype(np.float32) / np.sqrt(dimension)
+
+        print(
+            f"{len(rows)} vectors; float32 {snapshot.count * dimension * 4 / 2**20:.1f} MiB, "
+            f"codes {snapshot.count * index.code_width / 2**20:.1f} MiB"
+        )
+        exact, exact_timings = _timed(lambda q: index.search(q, args.k, oversampling=0)[0], queries)
+        print(f"exact            recall 1.000  {_percentiles(exact_timings)}")
+        for oversampling in args.oversampling:
+            results, timings = _timed(lambda q: index.search(q, args.k, oversampling=oversampling)[0], queries)
+            print(f"two-stage x{oversampling:<4}  recall {_recall(exact, results):.3f}  {_percentiles(timings)}")
+
+
+async def bench_pgvector(args) -> None:
+    from sqlalchemy import func, select, text
+
+    from app.database import AsyncSessionLocal, engine
+    from app.models.proposal import Proposal
+    from app.services.quantization import candidate_count, hamming_distance
+
+    rng = np.random.default_rng(args.seed)
+    async with AsyncSessionLocal() as session:
+        stored = (await session.execute(
+            select(Proposal.embedding).where(Proposal.embedding.isnot(None)).order_by(func.random()).limit(args.queries)
+        )).scalars().all()
+        if not stored:
+            raise SystemExit("No embeddings in the database")
+        sample = np.asarray([np.asarray(vector, dtype=np.float32) for vector in stored])
+        queries = sample + 0.3 * rng.standard_normal(sample.shape).astype(np.float32) / np.sqrt(sample.shape[1])
+
+        async def exact_search(query):
+            distance = Proposal.embedding.cosine_distance(query.tolist())
+            result = await session.execute(
+                select(Proposal.id, distance).where(Proposal.embedding.isnot(None)).order_by(distance).limit(args.k)
+            )
+            return [tuple(row) for row in result.all()]
+
+        async def two_stage_search(query, oversampling):
+            candidates = candidate_count(args.k, oversampling)
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {min(max(candidates, 40), 1000)}"))
+            shortlist = (
+                select(Proposal.id)
+                .where(Proposal.embedding.isnot(None))
+                .order_by(hamming_distance(Proposal.embedding, query.tolist()))
+                .limit(candidates)
+            )
+            distance = Proposal.embedding.cosine_distance(query.tolist())
+            result = await session.execute(
+                select(Proposal.id, distance).where(Proposal.id.in_(shortlist)).order_by(distance).limit(args.k)
+            )
+            return [tuple(row) for row in result.all()]
+
+        async def timed(search):
+            results, timings = [], []
+            for query in queries:
+                start = time.perf_counter()
+                results.append(await search(query))
+                timings.append(time.perf_counter() - start)
+            return results, timings
+
+        exact, exact_timings = await timed(exact_search)
+        print(f"exact            recall 1.000  {_percentiles(exact_timings)}")
+        for oversampling in args.oversampling:
+            results, timings = await timed(lambda q, o=oversampling: two_stage_search(q, o))
+            print(f"two-stage x{oversampling:<4}  recall {_recall(exact, results):.3f}  {_percentiles(timings)}")
+    await engine.dispose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Two-stage vs exact vector search benchmark")
+    parser.add_argument("--rows", type=int, default=50000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--oversampling", type=int, nargs="+", default=[2, 5, 10, 20])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--index-dir", help="benchmark an existing in-process index")
+    parser.add_argument("--database", action="store_true", help="benchmark pgvector on the configured database")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        asyncio.run(bench_pgvector(args))
+    else:
+        bench_numpy(args)
+
+
+if __name__ == "__main__":
+    main()
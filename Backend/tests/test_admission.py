@@ -0,0 +1,114 @@
+"""
+Tests for admission control and load shedding.
+"""
+import asyncio
+
+import pytest
+
+from app.core.admission import CRUD, INGEST, SEARCH, AdmissionController, RouteClassLimiter
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slots_are_handed_to_waiters_in_arrival_order():
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=5, queue_timeout=5.0)
+    assert await limiter.acquire()
+
+    order = []
+
+    async def request(number):
+        assert await limiter.acquire()
+        order.append(number)
+
+    waiters = [asyncio.create_task(request(number)) for number in range(3)]
+    await _settle()
+    assert limiter.queued == 3
+
+    for _ in range(3):
+        limiter.release()
+        await _settle()
+    await asyncio.gather(*waiters)
+    assert order == [0, 1, 2]
+    # The last waiter still holds the handed-over slot
+    assert limiter.active == 1
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_new_request_does_not_overtake_queue():
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=5, queue_timeout=5.0)
+    assert await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await _settle()
+
+    # The handover keeps the slot taken, so a newcomer has to queue behind
+    limiter.release()
+    late = asyncio.create_task(limiter.acquire())
+    await _settle()
+    assert waiter.done() and waiter.result()
+    assert not late.done()
+    limiter.release()
+    assert await late
+
+
+@pytest.mark.asyncio
+async def test_full_queue_and_deadline_are_shed():
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=1, queue_timeout=5.0)
+    assert await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await _settle()
+    assert not await limiter.acquire()
+    assert limiter.rejected_queue_full == 1
+
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=10, queue_timeout=0.5)
+    assert await limiter.acquire()
+    limiter.release(service_time=10.0)
+    assert await limiter.acquire()
+    assert not await limiter.acquire()
+    assert limiter.rejected_deadline == 1
+    assert limiter.retry_after() >= 1
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_waiter_times_out_and_leaves_queue():
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=5, queue_timeout=0.1)
+    assert await limiter.acquire()
+    assert not await limiter.acquire()
+    assert limiter.rejected_timeout == 1
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped_on_release():
+    limiter = RouteClassLimiter("test", max_concurrency=1, max_queue=5, queue_timeout=5.0)
+    assert await limiter.acquire()
+    gone = asyncio.create_task(limiter.acquire())
+    staying = asyncio.create_task(limiter.acquire())
+    await _settle()
+
+    gone.cancel()
+    await _settle()
+    limiter.release()
+    await _settle()
+    assert await staying
+    assert limiter.active == 1
+
+
+def test_requests_are_classified_by_route():
+    controller = AdmissionController(api_prefix="/api/v1")
+    assert controller.classify("GET", "/api/v1/search?q=x") == SEARCH
+    assert controller.classify("POST", "/api/v1/uploads") == INGEST
+    assert controller.classify("POST", "/api/v1/ingest/pdf") == INGEST
+    assert controller.classify("GET", "/api/v1/proposals") == CRUD
+    assert controller.classify("OPTIONS", "/api/v1/search") is None
+    assert controller.classify("GET", "/api/v1/docs") is None
+    assert controller.classify("GET", "/health") is None
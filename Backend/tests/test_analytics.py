@@ -0,0 +1,105 @@
+"""
+Tests for the search analytics sink and the daily rollup.
+"""
+from datetime import date
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import analytics
+
+
+class FakeSession:
+    def __init__(self, batches, fail=False):
+        self.batches = batches
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows=None):
+        if self.fail:
+            raise ConnectionError("database down")
+        self.batches.append(rows if rows is not None else statement)
+
+    async def commit(self):
+        pass
+
+
+def _sink(batch_size=2, max_buffer=5):
+    return analytics.SearchAnalyticsSink(batch_size=batch_size, flush_interval=0.01, max_buffer=max_buffer)
+
+
+def _record(sink, query="Klima", result_count=3):
+    sink.record(query, "hybrid", {"status": "open"}, result_count=result_count, latency=0.25)
+
+
+def test_record_buffers_events_and_drops_beyond_limit():
+    sink = _sink(max_buffer=2)
+    _record(sink, result_count=0)
+    _record(sink)
+    _record(sink)
+    assert sink.snapshot()["buffered"] == 2
+    assert (sink.recorded, sink.dropped) == (2, 1)
+
+    event = sink._buffer[0]
+    assert event["zero_result"] and event["latency_ms"] == 250.0
+    assert event["filters"] == {"status": "open"}
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_in_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(analytics, "AsyncSessionLocal", lambda: FakeSession(batches))
+    sink = _sink(batch_size=2)
+    for _ in range(5):
+        _record(sink)
+
+    assert await sink.flush() == 5
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert sink.written == 5 and sink.snapshot()["buffered"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_dropped_and_counted(monkeypatch):
+    monkeypatch.setattr(analytics, "AsyncSessionLocal", lambda: FakeSession([], fail=True))
+    sink = _sink(batch_size=2)
+    for _ in range(3):
+        _record(sink)
+
+    assert await sink.flush() == 0
+    assert sink.failed == 2
+    # The rest waits for the next flush
+    assert sink.snapshot()["buffered"] == 1
+
+
+@pytest.mark.asyncio
+async def test_run_flushes_on_interval_and_on_cancel(monkeypatch):
+    batches = []
+    monkeypatch.setattr(analytics, "AsyncSessionLocal", lambda: FakeSession(batches))
+    sink = _sink(batch_size=100)
+    task = asyncio.create_task(sink.run())
+    _record(sink)
+    await asyncio.sleep(0.05)
+    assert sink.written == 1
+
+    _record(sink)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert sink.written == 2
+
+
+@pytest.mark.asyncio
+async def test_rollup_upserts_normalized_queries():
+    statements = []
+    await analytics.rollup_search_events(FakeSession(statements), date(2026, 1, 1))
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO search_query_daily" in sql
+    assert "lower(regexp_replace(btrim(search_events.query), '\\s+', ' ', 'g'))" in sql
+    assert "GROUP BY lower(" in sql
+    assert "ON CONFLICT (day, query, search_type) DO UPDATE" in sql
@@ -0,0 +1,90 @@
+"""
+Tests for ETag / Last-Modified conditional request handling.
+"""
+from datetime import datetime, timedelta, timezone
+
+from starlette.requests import Request
+
+from app.core.conditional import (
+    CACHE_CONTROL,
+    has_conditional_headers,
+    http_date,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    query_fingerprint,
+)
+
+MODIFIED = datetime(2024, 3, 1, 12, 30, 15, 500000, tzinfo=timezone.utc)
+
+
+def _request(headers=None, query: str = "") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/proposals",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+def test_etag_is_weak_and_deterministic():
+    etag = make_etag("proposal", 1, MODIFIED)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == make_etag("proposal", 1, MODIFIED)
+    assert etag != make_etag("proposal", 2, MODIFIED)
+
+
+def test_http_date():
+    assert http_date(MODIFIED) == "Fri, 01 Mar 2024 12:30:15 GMT"
+    # Naive datetimes are taken as UTC
+    assert http_date(MODIFIED.replace(tzinfo=None)) == "Fri, 01 Mar 2024 12:30:15 GMT"
+
+
+def test_has_conditional_headers():
+    assert not has_conditional_headers(_request())
+    assert has_conditional_headers(_request({"If-None-Match": '"x"'}))
+    assert has_conditional_headers(_request({"If-Modified-Since": http_date(MODIFIED)}))
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("a")
+    strong = etag.removeprefix("W/")
+    assert is_not_modified(_request({"If-None-Match": etag}), etag)
+    assert is_not_modified(_request({"If-None-Match": strong}), etag)
+    assert is_not_modified(_request({"If-None-Match": f'"other", {etag}'}), etag)
+    assert is_not_modified(_request({"If-None-Match": "*"}), etag)
+    assert not is_not_modified(_request({"If-None-Match": make_etag("b")}), etag)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    headers = {"If-None-Match": make_etag("old"), "If-Modified-Since": http_date(MODIFIED)}
+    assert not is_not_modified(_request(headers), make_etag("new"), MODIFIED)
+
+
+def test_if_modified_since_has_second_resolution():
+    etag = make_etag("a")
+    assert is_not_modified(_request({"If-Modified-Since": http_date(MODIFIED)}), etag, MODIFIED)
+    later = MODIFIED + timedelta(seconds=1)
+    assert not is_not_modified(_request({"If-Modified-Since": http_date(MODIFIED)}), etag, later)
+
+
+def test_if_modified_since_is_ignored_without_last_modified_or_when_invalid():
+    etag = make_etag("a")
+    assert not is_not_modified(_request({"If-Modified-Since": http_date(MODIFIED)}), etag)
+    assert not is_not_modified(_request({"If-Modified-Since": "gestern"}), etag, MODIFIED)
+
+
+def test_not_modified_response_carries_validators():
+    etag = make_etag("a")
+    response = not_modified(etag, MODIFIED)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == CACHE_CONTROL
+    assert response.headers["Last-Modified"] == http_date(MODIFIED)
+
+
+def test_query_fingerprint_ignores_parameter_order():
+    assert query_fingerprint(_request(query="a=1&b=2")) == query_fingerprint(_request(query="b=2&a=1"))
+    assert query_fingerprint(_request(query="a=1")) != query_fingerprint(_request(query="a=2"))
@@ -0,0 +1,100 @@
+"""
+Tests for batched, cached proposal extraction.
+"""
+import json
+
+import fakeredis
+import pytest
+
+from app.config import settings
+from app.services import extraction
+from app.services.extraction import ExtractionError, GeminiExtractor, Page, RuleBasedExtractor
+
+PAGES = [
+    Page(1, "Protokoll der Sitzung\nAntrag A1: Klimaschutz im Quartier\nDer Rat möge beschließen,"),
+    Page(2, "dass Dächer begrünt werden.\nA2: Radwege ausbauen\nDie Radwege werden verbreitert."),
+    Page(3, "Fortsetzung der Begründung zu A2."),
+]
+
+
+class CountingExtractor(RuleBasedExtractor):
+    def __init__(self):
+        self.batches = []
+
+    def extract_batch(self, pages):
+        self.batches.append([page.number for page in pages])
+        return super().extract_batch(pages)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(extraction, "get_sync_redis", lambda: redis)
+    return redis
+
+
+def test_pack_batches_respects_budget_and_order():
+    pages = [Page(number, "x" * 40) for number in range(1, 6)]  # 11 tokens each
+    batches = extraction.pack_batches(pages, budget=25)
+    assert [[page.number for page in batch] for batch in batches] == [[1, 2], [3, 4], [5]]
+
+    oversized = [Page(1, "x" * 400), Page(2, "y")]
+    assert [len(batch) for batch in extraction.pack_batches(oversized, budget=25)] == [1, 1]
+    assert extraction.pack_batches([], budget=25) == []
+
+
+def test_rule_extractor_merges_continued_pages(cache):
+    result = extraction.extract_proposals(PAGES, RuleBasedExtractor())
+    assert [proposal["proposal_number"] for proposal in result.proposals] == ["A1", "A2"]
+    first, second = result.proposals
+    assert first["title"] == "Klimaschutz im Quartier"
+    assert first["proposal_type"] == "Antrag"
+    assert first["full_content_text"] == "Der Rat möge beschließen,\ndass Dächer begrünt werden."
+    assert second["source_document_page"] == 2
+    assert second["full_content_text"].endswith("Fortsetzung der Begründung zu A2.")
+
+
+def test_only_changed_pages_are_extracted_again(cache, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_BATCH_TOKENS", 10_000)
+    backend = CountingExtractor()
+    first = extraction.extract_proposals(PAGES, backend)
+    assert (first.pages_cached, first.batches) == (0, 1)
+
+    corrected = PAGES[:2] + [Page(3, "Korrigierte Begründung zu A2.")]
+    second = extraction.extract_proposals(corrected, backend)
+    assert (second.pages_cached, second.batches) == (2, 1)
+    assert backend.batches == [[1, 2, 3], [3]]
+    assert second.proposals[1]["full_content_text"].endswith("Korrigierte Begründung zu A2.")
+
+
+def test_cache_keys_depend_on_backend_and_text():
+    rules, gemini = RuleBasedExtractor(), GeminiExtractor()
+    assert extraction.cache_key(rules, "a") == extraction.cache_key(rules, "a")
+    assert extraction.cache_key(rules, "a") != extraction.cache_key(rules, "b")
+    assert extraction.cache_key(rules, "a") != extraction.cache_key(gemini, "a")
+
+
+def test_extraction_works_without_cache(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(extraction, "get_sync_redis", unavailable)
+    result = extraction.extract_proposals(PAGES, RuleBasedExtractor())
+    assert len(result.proposals) == 2
+
+
+def test_gemini_output_is_parsed_per_page():
+    output = json.dumps({"pages": [
+        {"page": 1, "proposals": [{"proposal_number": "A1", "title": "T", "text": "x", "continued": False}]},
+        {"page": 2, "proposals": []},
+    ]})
+    parsed = GeminiExtractor()._parse(f"```json\n{output}\n```", PAGES[:2])
+    assert parsed[1][0] == {
+        "proposal_number": "A1", "title": "T", "proposal_type": None, "text": "x", "continued": False,
+    }
+    assert parsed[2] == []
+
+    with pytest.raises(ExtractionError):
+        GeminiExtractor()._parse(output, PAGES)
+    with pytest.raises(ExtractionError):
+        GeminiExtractor()._parse("not json", PAGES[:1])
@@ -0,0 +1,92 @@
+"""
+Tests for sparse fieldsets.
+"""
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.core.fieldsets import (
+    PROPOSAL_FIELD_COLUMNS,
+    SUMMARY_FIELDS,
+    SUMMARY_PREVIEW_LENGTH,
+    card_summary,
+    load_options,
+    parse_fields,
+    serialize_fields,
+    truncate_summary,
+)
+from app.models.proposal import Proposal
+
+
+def _sql(fields) -> str:
+    stmt = select(Proposal).options(*load_options(fields))
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_no_fieldset():
+    assert parse_fields(None, SUMMARY_FIELDS) is None
+    assert parse_fields(" ", SUMMARY_FIELDS) is None
+
+
+def test_fields_are_deduplicated_and_id_is_added():
+    assert parse_fields("title, status,title,,", SUMMARY_FIELDS) == ["id", "title", "status"]
+    assert parse_fields("status,id", SUMMARY_FIELDS) == ["status", "id"]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as error:
+        parse_fields("title,embedding,nope", SUMMARY_FIELDS)
+    assert error.value.status_code == 400
+    assert "embedding, nope" in error.value.detail
+
+
+def test_every_field_maps_to_model_columns():
+    for columns in PROPOSAL_FIELD_COLUMNS.values():
+        for column in columns:
+            assert hasattr(Proposal, column)
+
+
+def test_select_list_is_narrowed():
+    sql = _sql(["id", "title"])
+    assert "title" in sql
+    assert "full_content_text" not in sql
+    assert "embedding" not in sql
+
+
+def test_computed_fields_load_their_columns():
+    sql = _sql(["id", "total_votes"])
+    for column in ("votes_for", "votes_against", "votes_abstention"):
+        assert column in sql
+
+
+def test_embedding_is_only_loaded_on_request():
+    assert "embedding" in _sql(["id", "embedding"])
+
+
+def test_truncate_summary():
+    assert truncate_summary(None) is None
+    assert truncate_summary("kurz") == "kurz"
+    long = "x" * (SUMMARY_PREVIEW_LENGTH + 1)
+    assert truncate_summary(long) == "x" * SUMMARY_PREVIEW_LENGTH + "..."
+
+
+def test_card_summary_prefers_the_preview():
+    long = "y" * (SUMMARY_PREVIEW_LENGTH + 10)
+    assert card_summary(Proposal(summary=long, summary_preview="Vorschau")) == "Vorschau"
+    assert card_summary(Proposal(summary=long, summary_preview=None)) == truncate_summary(long)
+
+
+def test_serialize_fields():
+    proposal_id = uuid.uuid4()
+    proposal = Proposal(id=proposal_id, title="Radwege", tags=None, embedding=[0.5, 1.0])
+    data = serialize_fields(proposal, ["id", "title", "tags", "embedding", "score"], title="Gekürzt", score=0.9)
+    assert data == {
+        "id": str(proposal_id),
+        "title": "Gekürzt",
+        "tags": [],
+        "embedding": [0.5, 1.0],
+        "score": 0.9,
+    }
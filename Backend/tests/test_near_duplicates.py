@@ -0,0 +1,73 @@
+"""
+Tests for MinHash signatures and LSH banding.
+"""
+import numpy as np
+
+from app.services import near_duplicates
+from app.services.near_duplicates import (
+    BANDS,
+    NUM_PERM,
+    band_buckets,
+    minhash,
+    proposal_signature,
+    shingle_hashes,
+    similarity,
+)
+
+TEXT = (
+    "Der Stadtrat möge beschließen, dass entlang der Hauptstraße ein durchgehender "
+    "Radweg angelegt wird und die Ampelschaltungen an den Kreuzungen für den "
+    "Radverkehr optimiert werden. Die Verwaltung legt bis zum Herbst einen Plan vor."
+)
+
+
+def test_shingles_are_case_insensitive_and_distinct():
+    assert np.array_equal(np.sort(shingle_hashes("A b c d e")), np.sort(shingle_hashes("a B c d e")))
+    assert shingle_hashes("a b c d e a b c d e").size == 5
+    assert shingle_hashes("zu kurz").size == 1
+    assert shingle_hashes("").size == 0
+
+
+def test_minhash_matches_the_documented_arithmetic():
+    hashes = shingle_hashes(TEXT)
+    p = (1 << 61) - 1
+    expected = [
+        min((((int(a) * int(x)) % p + int(b)) % p) & 0xFFFFFFFF for x in hashes)
+        for a, b in zip(near_duplicates._PERM_A, near_duplicates._PERM_B)
+    ]
+    signature = minhash(hashes)
+    assert signature.dtype == np.uint32
+    assert signature.shape == (NUM_PERM,)
+    assert signature.tolist() == expected
+
+
+def test_empty_text_has_a_maximal_signature():
+    signature, shingles = proposal_signature(None, None)
+    assert shingles == 0
+    assert (signature == 0xFFFFFFFF).all()
+
+
+def test_similarity_tracks_jaccard():
+    original, _ = proposal_signature("Radweg Hauptstraße", TEXT)
+    amended, _ = proposal_signature("Radweg Hauptstraße", TEXT.replace("bis zum Herbst", "bis Jahresende"))
+    unrelated, _ = proposal_signature("Haushalt", "Der Haushaltsplan für das kommende Jahr wird wie folgt geändert.")
+    assert similarity(original, original) == 1.0
+    assert similarity(original, amended) > 0.6
+    assert similarity(original, unrelated) < 0.1
+
+
+def test_band_buckets():
+    signature, _ = proposal_signature("Radweg", TEXT)
+    buckets = band_buckets(signature)
+    assert [band for band, _ in buckets] == list(range(BANDS))
+    assert all(-(1 << 63) <= bucket < (1 << 63) for _, bucket in buckets)
+    assert buckets == band_buckets(signature.copy())
+
+
+def test_changed_band_changes_only_its_bucket():
+    signature, _ = proposal_signature("Radweg", TEXT)
+    changed = signature.copy()
+    changed[0] ^= 1
+    before, after = band_buckets(signature), band_buckets(changed)
+    assert before[0] != after[0]
+    assert before[1:] == after[1:]
@@ -0,0 +1,122 @@
+"""
+Tests for the per-page extraction store and reprocessing from it.
+"""
+import hashlib
+import os
+
+import pytest
+
+from app import reprocess
+from app.services.page_store import PageRecord, PageStore, document_hash
+
+PAGES = [
+    PageRecord(number=1, text="Antrag A1: Klimaschutz", method="text", words=[[10.0, 20.0, 50.0, 30.0, "Antrag"]]),
+    PageRecord(number=2, text="Gescannte Seite", method="ocr", words=[]),
+]
+DOC_HASH = "ab" + "0" * 62
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PageStore(str(tmp_path))
+
+
+def test_document_hash(tmp_path):
+    path = tmp_path / "protocol.pdf"
+    path.write_bytes(b"%PDF-1.4 protocol")
+    assert document_hash(str(path)) == hashlib.sha256(b"%PDF-1.4 protocol").hexdigest()
+
+
+def test_pages_round_trip(store):
+    assert store.load(DOC_HASH) is None
+    assert store.metadata(DOC_HASH) is None
+    store.save(DOC_HASH, PAGES, {"source_path": "/uploads/protocol.pdf"})
+
+    assert store.exists(DOC_HASH)
+    assert store.path(DOC_HASH).endswith(os.path.join("ab", f"{DOC_HASH}.zip"))
+    assert store.load(DOC_HASH) == PAGES
+    assert store.load_page(DOC_HASH, 2) == PAGES[1]
+    assert store.load_page(DOC_HASH, 3) is None
+
+    metadata = store.metadata(DOC_HASH)
+    assert (metadata["page_count"], metadata["ocr_pages"]) == (2, 1)
+    assert metadata["source_path"] == "/uploads/protocol.pdf"
+    assert list(store.documents()) == [DOC_HASH]
+
+
+def test_save_is_write_once(store):
+    store.save(DOC_HASH, PAGES)
+    store.save(DOC_HASH, PAGES[:1])
+    assert store.load(DOC_HASH) == PAGES
+
+
+def test_failed_save_leaves_no_partial_archive(store):
+    class Unserializable(PageRecord):
+        def _asdict(self):
+            raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        store.save(DOC_HASH, [Unserializable(*PAGES[0])])
+    assert not store.exists(DOC_HASH)
+    assert os.listdir(os.path.dirname(store.path(DOC_HASH))) == []
+    assert list(store.documents()) == []
+
+
+class FakeOutcome:
+    def __init__(self, result, successful=True):
+        self.result = result
+        self._successful = successful
+
+    def get(self, propagate=True):
+        return self.result
+
+    def successful(self):
+        return self._successful
+
+
+class FakeTask:
+    name = "app.tasks.reprocess_document"
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.queued = []
+
+    def apply(self, args):
+        return self.outcomes[args[0]]
+
+    def apply_async(self, **options):
+        self.queued.append(options)
+
+
+@pytest.fixture
+def stored(store, monkeypatch):
+    store.save(DOC_HASH, PAGES)
+    monkeypatch.setattr(reprocess, "page_store", store)
+    return store
+
+
+def test_reprocess_inline_reports_failures(stored, monkeypatch, capsys):
+    task = FakeTask({DOC_HASH: FakeOutcome({"status": "completed", "proposals_extracted": 3})})
+    monkeypatch.setattr(reprocess, "reprocess_document", task)
+    assert reprocess.main(["--inline", DOC_HASH]) == 0
+    assert "3 proposals" in capsys.readouterr().out
+
+    task.outcomes[DOC_HASH] = FakeOutcome(RuntimeError("boom"), successful=False)
+    assert reprocess.main(["--inline", "--all"]) == 1
+    assert "failed" in capsys.readouterr().err
+
+
+def test_reprocess_queues_on_bulk_lane(stored, monkeypatch):
+    task = FakeTask({})
+    monkeypatch.setattr(reprocess, "reprocess_document", task)
+    assert reprocess.main(["--all"]) == 0
+    assert task.queued == [{
+        "args": (DOC_HASH,),
+        "queue": "pdf_processing.bulk",
+        "priority": reprocess.LANE_PRIORITY[reprocess.BULK],
+    }]
+
+
+def test_reprocess_rejects_unknown_documents(stored, monkeypatch):
+    monkeypatch.setattr(reprocess, "reprocess_document", FakeTask({}))
+    assert reprocess.main(["cd" + "0" * 62]) == 1
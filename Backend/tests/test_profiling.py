@@ -0,0 +1,131 @@
+"""
+Tests for opt-in request profiling and stored profiles.
+"""
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import profiles
+from app.config import settings
+from app.core import profiling
+from app.core.profiling import ProfilingMiddleware
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _request(middleware, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/search", "headers": list(headers)}
+    await middleware(scope, receive, send)
+    return messages
+
+
+def _headers(messages):
+    return {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+
+
+def test_token_valid(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", None)
+    assert not profiling.token_valid(TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    assert profiling.token_valid(TOKEN)
+    assert not profiling.token_valid("wrong")
+    assert not profiling.token_valid(None)
+
+
+@pytest.mark.asyncio
+async def test_unprofiled_requests_pass_through(enabled):
+    messages = await _request(ProfilingMiddleware(app))
+    assert messages[0]["status"] == 201
+    assert "x-profile-id" not in _headers(messages)
+
+    rejected = await _request(ProfilingMiddleware(app), [(b"x-profile", b"return"), (b"x-profile-token", b"wrong")])
+    assert rejected[0]["status"] == 201
+    assert profiling.list_profiles() == []
+
+
+@pytest.mark.asyncio
+async def test_return_mode_replaces_response_with_profile(enabled):
+    messages = await _request(ProfilingMiddleware(app), [(b"x-profile", b"return"), (b"x-profile-token", TOKEN.encode())])
+    headers = _headers(messages)
+    assert messages[0]["status"] == 200
+    assert headers["content-type"].startswith("text/html")
+    assert headers["x-profiled-status"] == "201"
+    assert b"<html" in messages[1]["body"].lower()
+    assert profiling.list_profiles() == []
+
+
+@pytest.mark.asyncio
+async def test_store_mode_keeps_response_and_stores_profile(enabled):
+    messages = await _request(ProfilingMiddleware(app), [(b"x-profile", b"store"), (b"x-profile-token", TOKEN.encode())])
+    assert messages[0]["status"] == 201
+    assert messages[1]["body"] == b"{}"
+    profile_id = _headers(messages)["x-profile-id"]
+    assert [profile["id"] for profile in profiling.list_profiles()] == [profile_id]
+    assert profiling.profile_path(profile_id) == os.path.join(str(enabled), profile_id + ".html")
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_stored(enabled, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    messages = await _request(ProfilingMiddleware(app))
+    assert "x-profile-id" in _headers(messages)
+    assert len(profiling.list_profiles()) == 1
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_off_without_token(enabled, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", None)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    messages = await _request(ProfilingMiddleware(app), [(b"x-profile", b"return")])
+    assert messages[0]["status"] == 201
+    assert profiling.list_profiles() == []
+
+
+def test_store_keeps_newest_profiles(enabled, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_KEEP", 2)
+    for index, profile_id in enumerate(["a", "b", "c"]):
+        profiling._store(profile_id, "<html></html>")
+        path = os.path.join(str(enabled), profile_id + ".html")
+        os.utime(path, (index, index))
+    assert [profile["id"] for profile in profiling.list_profiles()] == ["c", "b"]
+
+
+def test_profile_path_rejects_traversal(enabled):
+    profiling._store("a", "<html></html>")
+    assert profiling.profile_path("a") is not None
+    assert profiling.profile_path("../a") is None
+    assert profiling.profile_path("missing") is None
+    assert profiling.profile_path("") is None
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoints_hide_without_token(enabled):
+    with pytest.raises(HTTPException) as error:
+        await profiles.require_profiling_token("wrong")
+    assert error.value.status_code == 404
+    await profiles.require_profiling_token(TOKEN)
+
+    with pytest.raises(HTTPException):
+        await profiles.get_profile("missing")
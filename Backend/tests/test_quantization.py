@@ -0,0 +1,74 @@
+"""
+Tests for binary quantization and Hamming distances.
+"""
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.proposal import Proposal
+from app.services.quantization import (
+    BIT_INDEX,
+    binary_codes,
+    bit_index_ddl,
+    candidate_count,
+    hamming_distance,
+    hamming_distances,
+)
+
+
+def _naive_distances(codes: np.ndarray, query_code: np.ndarray) -> list:
+    return [int(np.unpackbits(row ^ query_code).sum()) for row in codes]
+
+
+def test_binary_codes_keep_sign_bits():
+    vectors = np.array([[1.0, -1.0, 0.0, 2.0, -0.5, 3.0, 1e-6, -1e-6, 4.0]])
+    codes = binary_codes(vectors)
+    assert codes.dtype == np.uint8
+    assert codes.shape == (1, 2)
+    # Zero counts as negative; the last byte is padded with zero bits
+    assert codes.tolist() == [[0b10010110, 0b10000000]]
+
+
+@pytest.mark.parametrize("dimension", [768, 80, 24])  # uint64, uint16 and uint8 words
+def test_hamming_distances_match_bit_counts(dimension):
+    rng = np.random.default_rng(dimension)
+    codes = binary_codes(rng.standard_normal((50, dimension)))
+    query_code = binary_codes(rng.standard_normal(dimension))
+    expected = _naive_distances(codes, query_code)
+    assert hamming_distances(codes, query_code).tolist() == expected
+    assert hamming_distances(codes, codes[3])[3] == 0
+
+
+def test_hamming_distances_without_bitwise_count(monkeypatch):
+    rng = np.random.default_rng(0)
+    codes = binary_codes(rng.standard_normal((20, 768)))
+    query_code = binary_codes(rng.standard_normal(768))
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    assert hamming_distances(codes, query_code).tolist() == _naive_distances(codes, query_code)
+
+
+def test_hamming_distance_tracks_cosine_similarity():
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(768)
+    near = query + 0.3 * rng.standard_normal(768)
+    far = rng.standard_normal(768)
+    distances = hamming_distances(binary_codes(np.stack([near, far])), binary_codes(query))
+    assert distances[0] < distances[1]
+
+
+def test_candidate_count():
+    assert candidate_count(20, 10) == 200
+    assert candidate_count(20, 0) == 20
+
+
+def test_bit_index_ddl():
+    ddl = bit_index_ddl(1536)
+    assert BIT_INDEX in ddl
+    assert "USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)" in ddl
+
+
+def test_sql_hamming_distance_matches_the_index_expression():
+    expression = hamming_distance(Proposal.embedding, [0.1, -0.2])
+    sql = str(expression.compile(dialect=postgresql.dialect()))
+    assert "CAST(binary_quantize(proposal_vectors.embedding) AS BIT(" in sql
+    assert "<~> binary_quantize(" in sql
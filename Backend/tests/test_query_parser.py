@@ -0,0 +1,75 @@
+"""
+Tests for the search query parser.
+"""
+from app.services.query_parser import And, Not, Or, Phrase, Term, parse_query, to_tsquery
+
+
+def test_implicit_and_between_terms():
+    parsed = parse_query("Radweg Ausbau")
+    assert parsed.ast == And((Term("radweg"), Term("ausbau")))
+    assert parsed.tsquery == "(radweg & ausbau)"
+
+
+def test_word_and_symbol_operators():
+    assert parse_query("klima ODER umwelt").tsquery == "(klima | umwelt)"
+    assert parse_query("klima | umwelt").tsquery == "(klima | umwelt)"
+    assert parse_query("klima UND umwelt").tsquery == "(klima & umwelt)"
+
+
+def test_lowercase_operator_words_are_terms():
+    assert parse_query("klima or umwelt").ast == And((Term("klima"), Term("or"), Term("umwelt")))
+
+
+def test_and_binds_tighter_than_or():
+    assert parse_query("a b OR c").ast == Or((And((Term("a"), Term("b"))), Term("c")))
+
+
+def test_negation_forms():
+    expected = And((Term("steuer"), Not(Term("erhöhung"))))
+    for query in ("steuer -erhöhung", "steuer !erhöhung", "steuer NOT erhöhung", "steuer NICHT erhöhung"):
+        assert parse_query(query).ast == expected
+    assert parse_query("steuer -erhöhung").tsquery == "(steuer & !erhöhung)"
+
+
+def test_hyphen_inside_word_is_not_negation():
+    # Split into words like PostgreSQL's parser, not a NOT operator
+    assert parse_query("e-mobilität").ast == Phrase(("e", "mobilität"))
+
+
+def test_phrase_and_prefix():
+    parsed = parse_query('"soziale Marktwirtschaft" steuer*')
+    assert parsed.ast == And((Phrase(("soziale", "marktwirtschaft")), Term("steuer", prefix=True)))
+    assert parsed.tsquery == "((soziale <-> marktwirtschaft) & steuer:*)"
+
+
+def test_grouping():
+    assert parse_query("(a OR b) c").tsquery == "((a | b) & c)"
+
+
+def test_unbalanced_input_is_lenient():
+    assert parse_query('"offene phrase').ast == Phrase(("offene", "phrase"))
+    assert parse_query("(a OR b").tsquery == "(a | b)"
+    assert parse_query("a ) OR").tsquery == "a"
+
+
+def test_empty_and_operator_only_queries():
+    for query in ("", "   ", "AND OR", "-", "()", '""', "*"):
+        parsed = parse_query(query)
+        assert parsed.is_empty
+        assert parsed.tsquery == ""
+
+
+def test_duplicates_are_removed():
+    assert parse_query("a a AND a").ast == Term("a")
+
+
+def test_positive_terms_skip_negated_words():
+    assert parse_query('klima -"fossile energie" NOT NOT wind').terms == ("klima", "wind")
+
+
+def test_whitespace_normalized_queries_share_cache_entry():
+    assert parse_query("a   b") is parse_query(" a b ")
+
+
+def test_to_tsquery_of_none():
+    assert to_tsquery(None) == ""
@@ -0,0 +1,105 @@
+"""
+Tests for task lanes, backpressure and debounced enqueueing.
+"""
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app.celery import BULK, INTERACTIVE, LANE_PRIORITY, LANE_QUEUES, WORKER_PROFILES
+from app.core import queueing
+
+
+class FakeTask:
+    def __init__(self, name="app.tasks.generate_embeddings"):
+        self.name = name
+        self.sent = []
+
+    def apply_async(self, **options):
+        self.sent.append(options)
+        return "result"
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(queueing, "get_redis", lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(queueing, "get_sync_redis", lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setitem(queueing.LANE_MAX_DEPTH, INTERACTIVE, 3)
+    monkeypatch.setitem(queueing.LANE_MAX_DEPTH, BULK, 10)
+    return fakeredis.FakeRedis(server=server, decode_responses=True)
+
+
+def test_lanes_have_separate_queues_and_workers():
+    assert LANE_QUEUES[INTERACTIVE].keys() == LANE_QUEUES[BULK].keys()
+    for task, queue in LANE_QUEUES[BULK].items():
+        assert queue != LANE_QUEUES[INTERACTIVE][task]
+        assert queue in WORKER_PROFILES[BULK]["queues"]
+        assert queue not in WORKER_PROFILES[INTERACTIVE]["queues"]
+    assert LANE_PRIORITY[INTERACTIVE] < LANE_PRIORITY[BULK]
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_counts_all_priority_levels(broker):
+    broker.rpush("ai_processing", "a")
+    broker.rpush("ai_processing:6", "b", "c")
+    assert await queueing.queue_depth("ai_processing") == 3
+
+
+@pytest.mark.asyncio
+async def test_enqueue_routes_by_lane(broker):
+    task = FakeTask()
+    assert await queueing.enqueue(task, "id", lane=BULK, countdown=5) == "result"
+    assert task.sent == [{
+        "args": ("id",),
+        "kwargs": {},
+        "queue": "ai_processing.bulk",
+        "priority": LANE_PRIORITY[BULK],
+        "countdown": 5,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure(broker):
+    broker.rpush("ai_processing", "a", "b", "c")
+    task = FakeTask()
+    with pytest.raises(queueing.QueueFullError):
+        await queueing.enqueue(task, "id")
+
+    with pytest.raises(HTTPException) as error:
+        await queueing.enqueue_or_429(task, "id")
+    assert error.value.status_code == 429
+    assert "Retry-After" in error.value.headers
+
+    assert await queueing.enqueue_or_defer(task, "id") is None
+    # The bulk lane has its own limit
+    assert await queueing.enqueue_or_defer(task, "id", lane=BULK) == "result"
+    assert len(task.sent) == 1
+
+
+def test_queue_room_sync(broker):
+    broker.rpush("ai_processing.bulk:6", *range(4))
+    assert queueing.queue_room_sync(FakeTask(), BULK) == 6
+    broker.rpush("ai_processing.bulk", *range(20))
+    assert queueing.queue_room_sync(FakeTask(), BULK) == 0
+
+
+@pytest.mark.asyncio
+async def test_debounced_enqueue_runs_once_per_key(broker):
+    task = FakeTask()
+    assert await queueing.enqueue_debounced(task, "id", key="embed:id", delay=30)
+    assert not await queueing.enqueue_debounced(task, "id", key="embed:id", delay=30)
+    assert len(task.sent) == 1
+    assert task.sent[0]["countdown"] == 30
+    assert broker.ttl("debounce:embed:id") > 30
+
+    queueing.clear_debounce("embed:id")
+    assert await queueing.enqueue_debounced(task, "id", key="embed:id", delay=30)
+    assert not queueing.claim_debounce_sync("embed:id", 30)
+
+
+@pytest.mark.asyncio
+async def test_deferred_debounce_releases_key(broker):
+    broker.rpush("ai_processing", "a", "b", "c")
+    task = FakeTask()
+    assert not await queueing.enqueue_debounced(task, "id", key="embed:id", delay=30)
+    assert not broker.exists("debounce:embed:id")
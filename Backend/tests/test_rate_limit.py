@@ -0,0 +1,80 @@
+"""
+Tests for rate limit configuration, route classification and client keys.
+"""
+import hashlib
+
+import pytest
+
+from app.config import settings
+from app.core.rate_limit import INGEST, READ, SEARCH, WRITE, RateLimiter, RateLimitResult, parse_rate
+
+
+def _scope(headers=None, client=("10.0.0.1", 5000)) -> dict:
+    return {
+        "type": "http",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": client,
+    }
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_API_KEYS", "partner-key, other-key")
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", False)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 1)
+    return RateLimiter(api_prefix="/api/v1")
+
+
+def test_parse_rate():
+    assert parse_rate("30/minute") == (30, 0.5)
+    assert parse_rate("10/seconds") == (10, 10.0)
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+
+def test_classify(limiter):
+    assert limiter.classify("GET", "/api/v1/search/semantic") == SEARCH
+    assert limiter.classify("POST", "/api/v1/ingest/pdf") == INGEST
+    assert limiter.classify("GET", "/api/v1/proposals") == READ
+    assert limiter.classify("PUT", "/api/v1/proposals/1") == WRITE
+    assert limiter.classify("OPTIONS", "/api/v1/proposals") is None
+    assert limiter.classify("GET", "/api/v1/docs") is None
+    assert limiter.classify("GET", "/health") is None
+
+
+def test_configured_api_key_gets_its_own_bucket(limiter):
+    digest = hashlib.sha256(b"partner-key").hexdigest()
+    assert limiter.client_key(_scope({"X-API-Key": "partner-key"})) == "key:" + digest[:16]
+    assert limiter.client_key(_scope({"X-API-Key": "other-key"})) != limiter.client_key(_scope({"X-API-Key": "partner-key"}))
+
+
+def test_unknown_api_key_falls_back_to_the_address(limiter):
+    assert limiter.client_key(_scope({"X-API-Key": "made-up"})) == "ip:10.0.0.1"
+
+
+def test_forwarded_header_ignored_unless_trusted(limiter):
+    assert limiter.client_key(_scope({"X-Forwarded-For": "1.2.3.4"})) == "ip:10.0.0.1"
+
+
+def test_forwarded_address_from_the_trusted_proxy_hop(limiter, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    # The client controls everything left of the entry the proxy appended
+    assert limiter.client_key(_scope({"X-Forwarded-For": "6.6.6.6, 1.2.3.4"})) == "ip:1.2.3.4"
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 2)
+    assert limiter.client_key(_scope({"X-Forwarded-For": "6.6.6.6, 1.2.3.4, 10.1.1.1"})) == "ip:1.2.3.4"
+    # Fewer hops than trusted proxies: the header was not set by them
+    assert limiter.client_key(_scope({"X-Forwarded-For": "1.2.3.4"})) == "ip:10.0.0.1"
+
+
+def test_missing_client_address(limiter):
+    assert limiter.client_key(_scope(client=None)) == "ip:unknown"
+
+
+def test_result_headers():
+    allowed = RateLimitResult(allowed=True, limit=30, remaining=12.7, retry_after=0, reset=35.2)
+    assert allowed.headers() == {"X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "12", "X-RateLimit-Reset": "36"}
+
+    denied = RateLimitResult(allowed=False, limit=30, remaining=0.4, retry_after=0.2, reset=59.2)
+    assert denied.headers()["Retry-After"] == "1"
+    assert denied.headers()["X-RateLimit-Remaining"] == "0"
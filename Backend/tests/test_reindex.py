@@ -0,0 +1,182 @@
+"""
+Tests for reindex partitioning, checkpoint resume and the swap's staleness check.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import operator
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Delete, Insert, Select, TextClause, Update
+
+from app.models.reindex import ReindexPartition, ReindexRun
+from app.services import reindex
+
+HORIZON = datetime(2026, 1, 1, tzinfo=timezone.utc)
+IDS = sorted(uuid.uuid4() for _ in range(10))
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar(self):
+        return self.rows
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+class FakeSession:
+    """Keyset selects run against ``IDS``; other statements are recorded."""
+
+    def __init__(self, partition=None, selected=None):
+        self.partition = partition
+        self.selected = selected
+        self.log = []
+        self.added = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, model, key):
+        return self.partition
+
+    def add(self, instance):
+        self.added.append(instance)
+
+    async def flush(self):
+        for instance in self.added:
+            if isinstance(instance, ReindexRun):
+                instance.id = 1
+
+    async def commit(self):
+        self.log.append("commit")
+        self.commits += 1
+
+    async def execute(self, statement):
+        if isinstance(statement, TextClause):
+            self.log.append("horizon")
+            return FakeResult(HORIZON)
+        if isinstance(statement, (Insert, Delete, Update)):
+            self.log.append(statement)
+            return FakeResult(None)
+        if self.selected is not None:
+            self.log.append(statement)
+            return FakeResult(self.selected.pop(0))
+        ids = IDS
+        for criterion in statement._where_criteria:
+            # id > lower / id <= upper
+            assert criterion.operator in (operator.gt, operator.le)
+            ids = [proposal_id for proposal_id in ids if criterion.operator(proposal_id, criterion.right.value)]
+        return FakeResult(ids[:statement._limit])
+
+
+def _target(session_log):
+    async def compute(session, ids):
+        session_log.append(("compute", list(ids)))
+        return {proposal_id: [1.0] for proposal_id in ids}
+
+    return reindex.Target("embeddings", reindex.proposal_vectors_table, "embedding", compute, True)
+
+
+def _inserted(log):
+    rows = []
+    for entry in log:
+        if isinstance(entry, Insert):
+            rows.extend(entry.compile(dialect=postgresql.dialect()).params.items())
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_create_run_splits_ids_into_keyset_partitions():
+    session = FakeSession(selected=[10, [IDS[3], IDS[7]]])
+    run = await reindex.create_run(session, reindex.TARGETS["embeddings"], partitions=3, batch_size=50)
+
+    boundary_query = session.log[1]
+    assert isinstance(boundary_query, Select)
+    assert 4 in boundary_query.compile(dialect=postgresql.dialect()).params.values()
+    partitions = [instance for instance in session.added if isinstance(instance, ReindexPartition)]
+    assert [(p.partition, p.lower_id, p.upper_id) for p in partitions] == [
+        (0, None, IDS[3]),
+        (1, IDS[3], IDS[7]),
+        (2, IDS[7], None),
+    ]
+    assert run.rows_total == 10
+    assert run.options["batch_size"] == 50
+    assert session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_partition_resumes_from_checkpoint():
+    partition = ReindexPartition(
+        run_id=1, partition=0, lower_id=IDS[1], upper_id=IDS[8], last_id=IDS[3], rows_done=2, done=False,
+    )
+    session = FakeSession(partition)
+    target = _target(session.log)
+
+    written = await reindex._process_partition(
+        lambda: session, 1, 0, target, batch_size=2, throttle=reindex.BatchThrottle(0),
+    )
+
+    computed = [entry[1] for entry in session.log if isinstance(entry, tuple)]
+    assert computed == [IDS[4:6], IDS[6:8], IDS[8:9]]
+    assert written == 5
+    assert (partition.last_id, partition.rows_done, partition.done) == (IDS[8], 7, True)
+    # Every batch commits its shadow rows with the checkpoint
+    assert session.commits == 3
+
+
+@pytest.mark.asyncio
+async def test_shadow_values_record_horizon_taken_before_the_read():
+    session = FakeSession()
+    await reindex._compute_shadow(session, 1, _target(session.log), IDS[:2])
+
+    assert session.log[0] == "horizon"
+    assert session.log[1][0] == "compute"
+    params = dict(_inserted(session.log))
+    assert params["computed_at_m0"] == HORIZON
+    assert "computed_at = excluded.computed_at" in _sql(session.log[2])
+
+
+def test_stale_ids_compare_updated_at_with_horizon():
+    sql = _sql(reindex._stale_ids_query(1))
+    assert "proposals.updated_at >= reindex_shadow.computed_at" in sql
+    assert "reindex_shadow.proposal_id IS NULL" in sql
+    assert "INTERVAL" not in sql.upper()
+
+
+@pytest.mark.asyncio
+async def test_catch_up_commits_each_batch():
+    session = FakeSession(selected=[IDS[:5]])
+    caught_up = await reindex._catch_up(session, 1, _target(session.log), batch_size=2)
+
+    assert caught_up == 5
+    computed = [entry[1] for entry in session.log if isinstance(entry, tuple)]
+    assert computed == [IDS[0:2], IDS[2:4], IDS[4:5]]
+    assert session.log.count("horizon") == 3
+    assert session.commits == 4
+
+
+@pytest.mark.asyncio
+async def test_skip_stale_drops_shadow_and_marks_live_value():
+    session = FakeSession(selected=[IDS[:2]])
+    assert await reindex._skip_stale(session, 1, reindex.TARGETS["embeddings"]) == 2
+
+    delete, update = session.log[1:]
+    assert isinstance(delete, Delete) and delete.table.name == "reindex_shadow"
+    assert isinstance(update, Update) and update.table.name == "proposal_vectors"
+    assert "embedding_source_hash" in _sql(update)
+
+    session = FakeSession(selected=[[]])
+    assert await reindex._skip_stale(session, 1, reindex.TARGETS["embeddings"]) == 0
+    assert len(session.log) == 1
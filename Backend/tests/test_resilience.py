@@ -0,0 +1,135 @@
+"""
+Tests for the circuit breaker, retry backoff and degraded search.
+"""
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import search
+from app.config import settings
+from app.core import resilience
+from app.core.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, backoff_delay
+from app.schemas.proposal import SearchType, TagMatch
+from app.services import embeddings
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(resilience, "get_redis", lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(resilience, "get_sync_redis", lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+    return fakeredis.FakeRedis(server=server, decode_responses=True)
+
+
+@pytest.fixture
+def breaker(redis_server, monkeypatch):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60.0)
+    monkeypatch.setattr(embeddings, "embedding_breaker", breaker)
+    return breaker
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_half_opens_and_closes(breaker, redis_server):
+    assert await breaker.allow()
+    for _ in range(2):
+        await breaker.record_failure()
+    assert await breaker.state() == CLOSED
+    await breaker.record_failure()
+    assert await breaker.state() == OPEN
+    assert not await breaker.allow()
+    assert not breaker.allow_sync()
+
+    # Reset timeout elapsed: exactly one trial call is admitted
+    breaker.reset_timeout = 0
+    assert await breaker.allow()
+    assert await breaker.state() == HALF_OPEN
+    await breaker.record_success()
+    assert await breaker.state() == CLOSED
+    assert redis_server.hget(breaker.key, "failures") == "0"
+
+
+@pytest.mark.asyncio
+async def test_failed_trial_reopens_breaker(breaker):
+    for _ in range(3):
+        breaker.record_sync(False)
+    breaker.reset_timeout = 0
+    assert breaker.allow_sync()
+    breaker.record_sync(False)
+    assert await breaker.state() == OPEN
+
+
+@pytest.mark.asyncio
+async def test_success_resets_failure_count(breaker):
+    await breaker.record_failure()
+    await breaker.record_failure()
+    await breaker.record_success()
+    await breaker.record_failure()
+    await breaker.record_failure()
+    assert await breaker.state() == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_stays_closed_without_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    monkeypatch.setattr(resilience, "get_redis", lambda: fakeredis.FakeAsyncRedis(server=server))
+    monkeypatch.setattr(resilience, "get_sync_redis", lambda: fakeredis.FakeRedis(server=server))
+    breaker = CircuitBreaker("down", failure_threshold=1, reset_timeout=60.0)
+    await breaker.record_failure()
+    assert await breaker.allow()
+    assert breaker.allow_sync()
+    assert await breaker.state() is None
+
+
+def test_backoff_delay_is_bounded_and_jittered():
+    for retries in range(6):
+        delays = [backoff_delay(retries, base=2.0, cap=20.0) for _ in range(200)]
+        assert all(0 <= delay <= min(20.0, 2.0 * 2 ** retries) for delay in delays)
+        assert len(set(delays)) > 1
+    assert max(backoff_delay(30, base=2.0, cap=20.0) for _ in range(200)) <= 20.0
+
+
+class FakeResult:
+    def scalar(self):
+        return 0
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: [])
+
+    def all(self):
+        return []
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return FakeResult()
+
+
+@pytest.mark.asyncio
+async def test_injected_faults_open_breaker_and_degrade_search(breaker, monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "FAKE_AI_FAILURE_RATE", 1.0)
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_REDIS", False)
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(embeddings.AIUnavailableError) as error:
+            await embeddings.embed_query("klimaschutz")
+        assert error.value.reason == "embedding provider failed"
+    assert await breaker.state() == OPEN
+
+    # Open breaker: the provider is skipped even once it would succeed
+    monkeypatch.setattr(settings, "FAKE_AI_FAILURE_RATE", 0.0)
+    session = RecordingSession()
+    outcome = await search._execute_search(
+        session, "klimaschutz", SearchType.SEMANTIC, 20, 0, None, None, None,
+        [], TagMatch.ANY, None, None, None,
+    )
+    assert outcome["degraded_reason"] == "embedding provider circuit open"
+    assert all("to_tsvector" in sql for sql in session.statements)
+    assert not any("<=>" in sql for sql in session.statements)
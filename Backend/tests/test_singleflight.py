@@ -0,0 +1,172 @@
+"""
+Tests for single-flight coalescing within a process and across workers.
+"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.config import settings
+from app.core import singleflight
+from app.core.singleflight import SingleFlight
+
+
+class Loader:
+    """Counts calls and returns its value once released."""
+
+    def __init__(self, value="result", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+@pytest.fixture
+def local(monkeypatch):
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_ENABLED", True)
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_REDIS", False)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_ENABLED", True)
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_REDIS", True)
+    monkeypatch.setattr(singleflight, "get_redis", lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    return server
+
+
+async def _gather(flights, key, loader, callers=3, timeout=1.0):
+    tasks = [asyncio.create_task(flights.do(key, loader, timeout=timeout)) for _ in range(callers)]
+    await asyncio.sleep(0.01)
+    loader.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution(local):
+    flights, loader = SingleFlight("test"), Loader({"hits": [1]})
+    results = await _gather(flights, "q", loader)
+    assert loader.calls == 1
+    assert results[0] == {"hits": [1]}
+    assert all(result is results[0] for result in results)
+    assert flights.snapshot() == {"in_flight": 0, "executed": 1, "coalesced": 2, "remote_hits": 0, "timed_out": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately(local):
+    flights, loader = SingleFlight("test"), Loader()
+    loader.release.set()
+    await asyncio.gather(flights.do("a", loader), flights.do("b", loader))
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached(local):
+    flights, loader = SingleFlight("test"), Loader(error=ValueError("bad query"))
+    results = await _gather(flights, "q", loader)
+    assert loader.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # The next call runs again
+    loader.error = None
+    assert await flights.do("q", loader) == "result"
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_followers_run_locally_after_timeout(local):
+    flights, stuck = SingleFlight("test"), Loader("slow")
+    leader = asyncio.create_task(flights.do("q", stuck))
+    await asyncio.sleep(0)
+
+    fast = Loader("fast")
+    fast.release.set()
+    assert await flights.do("q", fast, timeout=0.01) == "fast"
+    assert flights.timed_out == 1
+
+    stuck.release.set()
+    assert await leader == "slow"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_releases_followers(local):
+    flights, loader = SingleFlight("test"), Loader()
+    leader = asyncio.create_task(flights.do("q", loader))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("q", loader))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await follower == "result"
+    assert loader.calls == 2
+    assert leader.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_disabled_runs_every_call(local, monkeypatch):
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_ENABLED", False)
+    flights, loader = SingleFlight("test"), Loader()
+    await _gather(flights, "q", loader)
+    assert loader.calls == 3
+    assert flights.snapshot()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_result_is_shared_across_workers(server):
+    first, second = SingleFlight("test"), SingleFlight("test")
+    loader = Loader([1, 2])
+    leader = asyncio.create_task(first.do("q", loader))
+    await asyncio.sleep(0.01)
+    remote = asyncio.create_task(second.do("q", loader))
+    await asyncio.sleep(0.01)
+    loader.release.set()
+
+    assert await leader == [1, 2]
+    assert await remote == [1, 2]
+    assert loader.calls == 1
+    assert second.remote_hits == 1
+
+    # The lock is released; the result stays readable for SINGLEFLIGHT_RESULT_TTL
+    redis = fakeredis.FakeRedis(server=server)
+    assert not any(key.endswith(b":lock") for key in redis.keys("singleflight:test:*"))
+    assert await SingleFlight("test").do("q", loader) == [1, 2]
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_remote_leader_lets_others_run(server):
+    first, second = SingleFlight("test"), SingleFlight("test")
+    failing = Loader(error=RuntimeError("provider down"))
+    leader = asyncio.create_task(first.do("q", failing))
+    await asyncio.sleep(0.01)
+
+    loader = Loader("local")
+    loader.release.set()
+    remote = asyncio.create_task(second.do("q", loader))
+    await asyncio.sleep(0.01)
+    failing.release.set()
+
+    with pytest.raises(RuntimeError):
+        await leader
+    # Errors are not shared across workers
+    assert await remote == "local"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_failure_falls_back_to_local(server):
+    server.connected = False
+    flights, loader = SingleFlight("test"), Loader()
+    loader.release.set()
+    assert await flights.do("q", loader) == "result"
+    assert loader.calls == 1
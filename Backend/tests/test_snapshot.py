@@ -0,0 +1,173 @@
+"""
+Tests for binary COPY snapshots: chunk files, manifests and the CLI.
+"""
+from datetime import datetime, timezone
+import asyncio
+import gzip
+import json
+import os
+
+import pytest
+
+from app import snapshot as snapshot_cli
+from app.services import snapshot
+from app.services.snapshot import SNAPSHOT_TABLES
+
+SPECS = {spec.name: spec for spec in SNAPSHOT_TABLES}
+
+
+def _write_chunk(directory, table, name, data):
+    os.makedirs(os.path.join(directory, table), exist_ok=True)
+    writer = snapshot._ChunkWriter(os.path.join(directory, table, name), level=6)
+    writer.write(data)
+    writer.close()
+    return {"file": name, "rows": 1, "bytes": writer.size, "sha256": writer.sha256.hexdigest()}
+
+
+def _write_snapshot(directory, data=b"PGCOPY\n\xff\r\n\x00rows"):
+    manifest = {
+        "format": snapshot.FORMAT_VERSION,
+        "kind": "full",
+        "id": "20261019T000000Z",
+        "revision": "013",
+        "tables": {"proposals": {"columns": ["id"], "chunks": [_write_chunk(directory, "proposals", "00000.copy.gz", data)]}},
+    }
+    with open(os.path.join(directory, snapshot.MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def test_snapshot_tables_are_ordered_parents_first():
+    assert list(SPECS)[0] == "proposals"
+    assert SPECS["proposal_lsh_buckets"].watermark == "proposal_signatures"
+    assert SPECS["tag_dictionary"].key is None and SPECS["tag_dictionary"].changed is None
+    assert SPECS["proposal_contents"].conflict == ["proposal_id"]
+
+
+def test_chunk_query_ranges_and_changes():
+    since = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    query, args = snapshot._chunk_query(SPECS["proposal_contents"], "a", "b", since)
+    assert query.endswith(
+        'WHERE "proposal_id" > $1 AND "proposal_id" <= $2 '
+        "AND proposal_id IN (SELECT id FROM proposals WHERE updated_at > $3)"
+    )
+    assert args == ["a", "b", since]
+
+    query, args = snapshot._chunk_query(SPECS["proposals"], None, "b", None)
+    assert query.endswith('FROM "proposals" WHERE "id" <= $1')
+    assert args == ["b"]
+
+    # Tables without a key or watermark are dumped whole
+    query, args = snapshot._chunk_query(SPECS["tag_dictionary"], "a", "b", since)
+    assert "WHERE" not in query and args == []
+
+
+def test_quoting_and_row_counts():
+    assert snapshot._quote('we"ird') == '"we""ird"'
+    assert snapshot._column_list(["id", "title"]) == '"id", "title"'
+    assert snapshot._row_count("COPY 1234") == 1234
+    assert snapshot._row_count("INSERT 0 17") == 17
+
+
+@pytest.mark.asyncio
+async def test_chunk_writer_round_trip(tmp_path):
+    data = os.urandom(3 * snapshot.READ_BLOCK // 2)
+    chunk = _write_chunk(str(tmp_path), "proposals", "00000.copy.gz", data)
+    path = tmp_path / "proposals" / "00000.copy.gz"
+
+    assert gzip.decompress(path.read_bytes()) == data
+    assert chunk["bytes"] == path.stat().st_size
+    assert chunk["sha256"] == snapshot._file_sha256(str(path))
+    assert b"".join([block async for block in snapshot._read_chunk(str(path))]) == data
+    assert not os.path.exists(str(path) + ".tmp")
+
+
+def test_aborted_chunk_leaves_nothing(tmp_path):
+    path = str(tmp_path / "00000.copy.gz")
+    writer = snapshot._ChunkWriter(path, level=1)
+    writer.write(b"partial")
+    writer.abort()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_run_parallel_limits_workers_and_keeps_order():
+    running, peak = 0, 0
+
+    async def job(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - value))
+        running -= 1
+        return value
+
+    results = await snapshot._run_parallel([lambda v=value: job(v) for value in range(5)], workers=2)
+    assert results == [0, 1, 2, 3, 4]
+    assert peak == 2
+    assert await snapshot._run_parallel([], workers=4) == []
+
+
+@pytest.mark.asyncio
+async def test_run_parallel_cancels_on_failure():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing():
+        raise RuntimeError("copy failed")
+
+    with pytest.raises(RuntimeError):
+        await snapshot._run_parallel([slow, failing], workers=2)
+    assert cancelled == [True]
+
+
+@pytest.mark.asyncio
+async def test_verify_reports_damaged_and_missing_files(tmp_path):
+    directory = str(tmp_path)
+    manifest = _write_snapshot(directory)
+    assert await snapshot.verify(directory, workers=2) == []
+
+    manifest[snapshot.LIVE_IDS] = {"file": "live_ids.copy.gz", "sha256": "0" * 64}
+    manifest["tables"]["proposals"]["chunks"][0]["sha256"] = "0" * 64
+    with open(os.path.join(directory, snapshot.MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    problems = await snapshot.verify(directory, workers=2)
+    assert [problem.split(": ")[1] for problem in problems] == ["checksum mismatch", "missing"]
+
+    # A damaged snapshot is rejected before the database is touched
+    with pytest.raises(ValueError, match="damaged"):
+        await snapshot.restore(directory, workers=2)
+
+
+def test_read_manifest_rejects_other_formats(tmp_path):
+    (tmp_path / snapshot.MANIFEST).write_text(json.dumps({"format": 99}))
+    with pytest.raises(ValueError, match="Unsupported snapshot format"):
+        snapshot.read_manifest(str(tmp_path))
+
+
+class FakeEngine:
+    async def dispose(self):
+        pass
+
+
+def test_cli_verify(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(snapshot_cli, "engine", FakeEngine())
+    _write_snapshot(str(tmp_path))
+    assert snapshot_cli.main(["verify", str(tmp_path)]) == 0
+    assert "20261019T000000Z is intact" in capsys.readouterr().out
+
+    assert snapshot_cli.main(["verify", str(tmp_path / "missing")]) == 1
+    assert "No such file" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_dump_refuses_existing_snapshot(tmp_path):
+    _write_snapshot(str(tmp_path))
+    with pytest.raises(ValueError, match="already holds a snapshot"):
+        await snapshot.dump(str(tmp_path), workers=1, chunk_rows=100)
@@ -0,0 +1,110 @@
+"""
+Tests for summary precomputation and failure backoff.
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.core.fieldsets import SUMMARY_PREVIEW_LENGTH
+from app.models.proposal import proposal_updates, proposals_table
+from app.services import summaries
+
+
+def _row(proposal_id, text="Der Rat möge beschließen. Begründung folgt.", attempts=0, **values):
+    fields = {
+        "id": proposal_id,
+        "title": "Antrag",
+        "full_content_text": text,
+        "summary": None,
+        "summary_preview": None,
+        "summary_source_hash": None,
+        "summary_attempts": attempts,
+    }
+    fields.update(values)
+    return SimpleNamespace(**fields)
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    stored = {}
+
+    def run(rows, summarize):
+        async def load(proposal_ids):
+            return rows
+
+        async def store(values, failures):
+            stored["values"] = values
+            stored["failures"] = failures
+
+        monkeypatch.setattr(summaries, "_load", load)
+        monkeypatch.setattr(summaries, "_store", store)
+        monkeypatch.setattr(summaries, "_record_metrics", lambda result, busy_seconds: None)
+        monkeypatch.setattr(summaries, "summarize", summarize)
+        return summaries.run_summary_batch([row.id for row in rows])
+
+    run.stored = stored
+    return run
+
+
+def test_make_preview_cuts_at_word_boundary():
+    assert summaries.make_preview(None) is None
+    assert summaries.make_preview("  kurz \n text ") == "kurz text"
+    preview = summaries.make_preview("wort " * SUMMARY_PREVIEW_LENGTH)
+    assert preview.endswith("...")
+    assert len(preview) <= SUMMARY_PREVIEW_LENGTH + 3
+    assert not preview[:-3].endswith(" ")
+
+
+def test_content_hash_depends_on_title_and_text():
+    assert summaries.content_hash("a", "b") == summaries.content_hash("a", "b")
+    assert summaries.content_hash("a", "b") != summaries.content_hash("ab", "")
+
+
+def test_retry_at_doubles_per_attempt(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_RETRY_DELAY", 60)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert summaries.retry_at(1, now) == now + timedelta(seconds=60)
+    assert summaries.retry_at(3, now) == now + timedelta(seconds=240)
+
+
+def test_failed_and_empty_summaries_are_recorded(batch):
+    def summarize(title, text):
+        if text == "boom":
+            raise RuntimeError("provider error")
+        return "" if text == "empty" else "Zusammenfassung."
+
+    rows = [_row("a", "boom", attempts=2), _row("b", "empty"), _row("c")]
+    result = batch(rows, summarize)
+
+    assert result == summaries.BatchResult(summarized=1, skipped=0, failed=2)
+    failures = batch.stored["failures"]
+    assert failures["a"]["summary_attempts"] == 3
+    assert failures["b"]["summary_attempts"] == 1
+    assert failures["a"]["summary_retry_at"] > failures["b"]["summary_retry_at"]
+    assert batch.stored["values"]["c"]["summary_attempts"] == 0
+    assert batch.stored["values"]["c"]["summary_retry_at"] is None
+
+
+def test_unchanged_and_hand_written_summaries_are_skipped(batch):
+    text = "Der Rat möge beschließen."
+    rows = [
+        _row("a", text, summary="alt", summary_source_hash=summaries.content_hash("Antrag", text)),
+        _row("b", text, summary="Von Hand.", summary_preview="Von Hand."),
+        _row("c", text, summary="Von Hand."),
+    ]
+    result = batch(rows, lambda title, text: pytest.fail("nothing to summarize"))
+
+    assert result == summaries.BatchResult(summarized=0, skipped=2, failed=0)
+    assert batch.stored["values"] == {"c": {"summary_preview": "Von Hand."}}
+    assert batch.stored["failures"] == {}
+
+
+def test_proposal_updates_touch():
+    statements = proposal_updates("a", summary_attempts=1)
+    assert "updated_at" in str(statements[-1])
+
+    statements = proposal_updates("a", touch=False, summary_attempts=1)
+    assert all(statement.table is not proposals_table for statement in statements)
+    assert "updated_at" not in " ".join(str(statement) for statement in statements)
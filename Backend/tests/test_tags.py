@@ -0,0 +1,100 @@
+"""
+Tests for tag normalization and tag dictionary upserts.
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Insert, Select
+
+from app.models import proposal as proposal_model
+from app.models.proposal import Proposal
+from app.models.tag import normalize_tag, tag_keys
+from app.services import tags
+
+
+class FakeConnection:
+    """Answers stored tag key lookups and records dictionary upserts."""
+
+    def __init__(self, stored=None):
+        self.stored = stored or []
+        self.upserts = []
+
+    def execute(self, statement):
+        if isinstance(statement, Select):
+            return SimpleNamespace(scalar=lambda: self.stored)
+        assert isinstance(statement, Insert)
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.upserts.append((str(compiled), compiled.params))
+
+
+def _counts(connection):
+    """Upserted key -> (label, inserted usage count), in statement order."""
+    params = connection.upserts[-1][1]
+    rows = []
+    index = 0
+    while f"key_m{index}" in params:
+        rows.append((params[f"key_m{index}"], (params[f"label_m{index}"], params[f"usage_count_m{index}"])))
+        index += 1
+    return rows
+
+
+def test_normalize_tag_folds_case_diacritics_and_spaces():
+    assert normalize_tag("  Klima  Schütz ") == "klima schutz"
+    assert normalize_tag("STRASSE") == normalize_tag("strasse")
+    assert tag_keys(["Klimaschutz", "klimaschütz", " ", "Verkehr"]) == ["klimaschutz", "verkehr"]
+    assert tag_keys(None) == []
+
+
+def test_new_proposal_counts_each_tag_once():
+    connection = FakeConnection()
+    target = Proposal(tags=["Verkehr", "Klimaschütz", "klimaschutz "])
+    proposal_model._index_new_tags(None, connection, target)
+
+    assert target.tag_keys == ["verkehr", "klimaschutz"]
+    # Sorted by key, so concurrent upserts lock rows in the same order
+    assert _counts(connection) == [("klimaschutz", ("Klimaschütz", 1)), ("verkehr", ("Verkehr", 1))]
+    assert "ON CONFLICT (key) DO UPDATE" in connection.upserts[-1][0]
+
+
+def test_tag_change_counts_only_the_difference():
+    connection = FakeConnection(stored=["klimaschutz", "verkehr"])
+    target = Proposal(tags=["Klimaschutz", "Wohnen"])
+    proposal_model._index_changed_tags(None, connection, target)
+
+    assert target.tag_keys == ["klimaschutz", "wohnen"]
+    # Added tags insert 1 (increment), removed ones 0 (decrement)
+    assert _counts(connection) == [("verkehr", ("verkehr", 0)), ("wohnen", ("Wohnen", 1))]
+
+
+def test_unchanged_tags_write_nothing():
+    connection = FakeConnection()
+    proposal_model._count_tags(connection, {}, [])
+    assert connection.upserts == []
+
+
+def test_deleted_proposal_releases_stored_tags():
+    connection = FakeConnection(stored=["verkehr"])
+    target = Proposal()
+    target.id = "a"
+    proposal_model._release_tags(None, connection, target)
+    assert _counts(connection) == [("verkehr", ("verkehr", 0))]
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return SimpleNamespace(all=lambda: [("klimaschutz", "Klimaschutz", 3)])
+
+
+@pytest.mark.asyncio
+async def test_suggestions_match_folded_prefix_literally():
+    session = RecordingSession()
+    assert await tags.suggest_tags(session, "Klimä_%") == [{"tag": "Klimaschutz", "key": "klimaschutz", "count": 3}]
+    assert "klima\\_\\%%" in session.statements[0].params.values()
+
+    assert await tags.suggest_tags(session, "  ") == []
+    assert len(session.statements) == 1
@@ -0,0 +1,87 @@
+"""
+Tests for task storage helpers.
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app import tasks
+from app.services.query_parser import search_vector
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.committed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.row)
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(row):
+        fake = FakeSession(row)
+        monkeypatch.setattr(tasks, "TaskSessionLocal", lambda: fake)
+        return fake
+
+    return install
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_unchanged_embedding_of_completed_proposal_writes_nothing(session):
+    fake = session(SimpleNamespace(processing_status="completed", processing_error=None))
+    await tasks._store_embedding("a", None, "hash")
+    assert len(fake.statements) == 1
+    assert _sql(fake.statements[0]).startswith("SELECT")
+    assert not fake.committed
+
+
+@pytest.mark.asyncio
+async def test_unchanged_embedding_completes_pending_proposal(session):
+    fake = session(SimpleNamespace(processing_status="processing", processing_error=None))
+    await tasks._store_embedding("a", None, "hash")
+    updates = [_sql(statement) for statement in fake.statements[1:]]
+    assert any("processing_status" in sql and "updated_at" in sql for sql in updates)
+    assert not any("embedding" in sql for sql in updates)
+    assert fake.committed
+
+
+@pytest.mark.asyncio
+async def test_new_embedding_is_stored_with_its_hash(session):
+    fake = session(None)
+    await tasks._store_embedding("a", [0.1, 0.2], "hash")
+    updates = [_sql(statement) for statement in fake.statements]
+    assert any("embedding_source_hash" in sql for sql in updates)
+    assert any("updated_at" in sql for sql in updates)
+    assert fake.committed
+
+
+def test_search_vector_matches_fulltext_config():
+    sql = str(search_vector("Antrag").compile(dialect=postgresql.dialect()))
+    assert "to_tsvector" in sql
+    assert "german" in sql
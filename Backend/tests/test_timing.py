@@ -0,0 +1,96 @@
+"""
+Tests for Server-Timing spans and the timing middleware.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import timing
+from app.core.timing import ServerTimingMiddleware, TimedJSONResponse, span
+
+
+async def _run(middleware, scope=None):
+    """Call an ASGI middleware with an empty request and return the sent messages."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope or {"type": "http", "method": "GET", "path": "/"}, receive, send)
+    return messages
+
+
+def _headers(messages):
+    return {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+
+
+def test_server_timing_format():
+    header = timing.server_timing({"db": [0.0124, 3], "embedding": [0.085, 1]}, 0.1013)
+    assert header == 'db;dur=12.4;desc="3 calls", embedding;dur=85.0, total;dur=101.3'
+    assert timing.server_timing({}, 0.002) == "total;dur=2.0"
+
+
+def test_spans_are_noops_outside_a_request():
+    timing.add_span(timing.DB, 1.0)
+    with span(timing.RANK):
+        pass
+    assert timing._spans.get() is None
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_summed_spans():
+    async def app(scope, receive, send):
+        timing.add_span(timing.DB, 0.010)
+        timing.add_span(timing.DB, 0.005)
+        with span(timing.RANK):
+            pass
+        await TimedJSONResponse({"ok": True})(scope, receive, send)
+
+    messages = await _run(ServerTimingMiddleware(app))
+    headers = _headers(messages)
+    metrics = headers["server-timing"].split(", ")
+    assert metrics[0] == 'db;dur=15.0;desc="2 calls"'
+    assert [metric.split(";")[0] for metric in metrics] == ["db", "rank", "encode", "total"]
+    assert float(headers["x-process-time"]) >= 0
+    assert messages[1]["body"] == b'{"ok":true}'
+    # Spans belong to the request only
+    assert timing._spans.get() is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_middleware_keeps_process_time_only():
+    async def app(scope, receive, send):
+        timing.add_span(timing.DB, 0.010)
+        await TimedJSONResponse({})(scope, receive, send)
+
+    headers = _headers(await _run(ServerTimingMiddleware(app, enabled=False)))
+    assert "server-timing" not in headers
+    assert "x-process-time" in headers
+
+
+@pytest.mark.asyncio
+async def test_non_http_scopes_pass_through():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(timing._spans.get())
+
+    assert await _run(ServerTimingMiddleware(app), {"type": "lifespan"}) == []
+    assert seen == [None]
+
+
+def test_engine_statements_are_timed_as_db_spans():
+    engine = create_engine("sqlite://")
+    timing.instrument_engine(engine)
+    spans = {}
+    token = timing._spans.set(spans)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+    finally:
+        timing._spans.reset(token)
+    assert spans[timing.DB][1] == 2
+    assert spans[timing.DB][0] >= 0
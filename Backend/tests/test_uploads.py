@@ -0,0 +1,155 @@
+"""
+Tests for streaming and resumable uploads.
+"""
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import ingest
+from app.config import settings
+from app.services import uploads
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_streaming_upload_hashes_and_limits(upload_dir):
+    upload = uploads.StreamingUpload(uploads.temp_path(), max_size=len(PDF))
+    await upload.open()
+    await upload.write(PDF[:100])
+    await upload.write(PDF[100:])
+    await upload.close()
+    assert upload.sha256.hexdigest() == hashlib.sha256(PDF).hexdigest()
+
+    upload = uploads.StreamingUpload(uploads.temp_path(), max_size=10)
+    await upload.open()
+    with pytest.raises(HTTPException) as error:
+        await upload.write(PDF)
+    assert error.value.status_code == 413
+    await upload.abort()
+
+
+@pytest.mark.asyncio
+async def test_non_pdf_is_rejected():
+    upload = uploads.StreamingUpload(uploads.temp_path(), max_size=10000)
+    await upload.open()
+    await upload.write(b"<html>" * 10)
+    with pytest.raises(HTTPException) as error:
+        await upload.close()
+    assert error.value.status_code == 415
+
+
+def test_store_upload_is_content_addressed(upload_dir):
+    sha256 = hashlib.sha256(PDF).hexdigest()
+    first, second = upload_dir / "a.tmp", upload_dir / "b.tmp"
+    first.write_bytes(PDF)
+    second.write_bytes(PDF)
+    assert uploads.store_upload(str(first), sha256) == str(upload_dir / f"{sha256}.pdf")
+    assert uploads.store_upload(str(second), sha256) == str(upload_dir / f"{sha256}.pdf")
+    assert not first.exists() and not second.exists()
+
+
+def test_store_upload_keep_links(upload_dir):
+    sha256 = hashlib.sha256(PDF).hexdigest()
+    part = upload_dir / "c.part"
+    part.write_bytes(PDF)
+    final = uploads.store_upload(str(part), sha256, keep=True)
+    assert part.exists()
+    assert open(final, "rb").read() == PDF
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_keeps_session_until_finished():
+    session = uploads.create_session("protokoll.pdf", len(PDF), {})
+    upload_id = session["upload_id"]
+
+    session = await uploads.append_chunk(upload_id, 0, _stream(PDF[:1000]))
+    assert session["offset"] == 1000 and "sha256" not in session
+
+    with pytest.raises(HTTPException) as error:
+        await uploads.append_chunk(upload_id, 500, _stream(PDF[500:]))
+    assert error.value.status_code == 409
+
+    session = await uploads.append_chunk(upload_id, 1000, _stream(PDF[1000:]))
+    assert session["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert open(session["path"], "rb").read() == PDF
+
+    # Completion can be repeated (e.g. after a 429) until the session is finished
+    again = await uploads.append_chunk(upload_id, len(PDF), _stream())
+    assert again["path"] == session["path"]
+
+    uploads.finish_session(upload_id)
+    with pytest.raises(HTTPException) as error:
+        uploads.load_session(upload_id)
+    assert error.value.status_code == 404
+    assert os.path.exists(session["path"])
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_must_be_a_pdf():
+    upload_id = uploads.create_session("protokoll.pdf", 1000, {})["upload_id"]
+    with pytest.raises(HTTPException) as error:
+        await uploads.append_chunk(upload_id, 0, _stream(b"GIF89a" + b"x" * 200))
+    assert error.value.status_code == 415
+    with pytest.raises(HTTPException):
+        uploads.load_session(upload_id)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """Redis markers and the task queue, in memory."""
+    state = SimpleNamespace(claimed=set(), queued=[], full=False)
+
+    async def claim(path):
+        if path in state.claimed:
+            return False
+        state.claimed.add(path)
+        return True
+
+    async def release(path):
+        state.claimed.discard(path)
+
+    async def enqueue(task, path, meeting_info):
+        if state.full:
+            raise HTTPException(status_code=429)
+        state.queued.append(path)
+        return SimpleNamespace(id=f"task-{len(state.queued)}")
+
+    monkeypatch.setattr(ingest, "claim_processing", claim)
+    monkeypatch.setattr(ingest, "release_processing", release)
+    monkeypatch.setattr(ingest, "enqueue_or_429", enqueue)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_duplicate_is_not_queued_again(queue):
+    first = await ingest._stored_upload_response("a.pdf", 10, "/u/x.pdf", "x", {})
+    second = await ingest._stored_upload_response("b.pdf", 10, "/u/x.pdf", "x", {})
+    assert (first.processing_status, first.duplicate, first.task_id) == ("queued", False, "task-1")
+    assert (second.processing_status, second.duplicate, second.task_id) == ("duplicate", True, None)
+    assert queue.queued == ["/u/x.pdf"]
+
+
+@pytest.mark.asyncio
+async def test_upload_rejected_by_a_full_queue_is_queued_on_retry(queue):
+    queue.full = True
+    with pytest.raises(HTTPException):
+        await ingest._stored_upload_response("a.pdf", 10, "/u/x.pdf", "x", {})
+    queue.full = False
+    result = await ingest._stored_upload_response("a.pdf", 10, "/u/x.pdf", "x", {})
+    assert result.processing_status == "queued"
+    assert queue.queued == ["/u/x.pdf"]
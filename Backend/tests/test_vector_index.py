@@ -0,0 +1,102 @@
+"""
+Tests for the memory-mapped vector index.
+"""
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+import uuid
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import VectorIndex
+
+DIMENSION = 32
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+class Record(NamedTuple):
+    id: uuid.UUID
+    embedding: Optional[list]
+    status: Optional[str] = None
+    category: Optional[str] = None
+    submitted_date: Optional[datetime] = None
+    updated_at: datetime = NOW
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return VectorIndex(str(tmp_path), DIMENSION)
+
+
+def _build(index, rng, rows=50):
+    ids = [uuid.uuid4() for _ in range(rows)]
+    vectors = rng.standard_normal((rows, DIMENSION)).astype(np.float32)
+    index._write([Record(i, v, status="eingereicht") for i, v in zip(ids, vectors)], None, NOW)
+    return ids, vectors
+
+
+def _top(index, query, **filters):
+    hits, total = index.search(query, 1, oversampling=0, **filters)
+    return hits[0][0] if hits else None, total
+
+
+def test_build_and_search(index, rng):
+    ids, vectors = _build(index, rng)
+    assert index.size == 50
+    assert _top(index, vectors[7]) == (ids[7], 50)
+    assert index.reload().watermark == NOW.isoformat()
+
+
+def test_published_rows_are_never_rewritten(index, rng):
+    ids, vectors = _build(index, rng)
+    before = index.reload()
+    published = np.array(before.vectors[:before.count])
+
+    changed = rng.standard_normal(DIMENSION).astype(np.float32)
+    index._write([Record(ids[3], changed), Record(ids[4], None)], None)
+
+    after = index.reload()
+    assert after.generation == before.generation + 1
+    assert np.array_equal(np.asarray(before.vectors[:before.count]), published)
+    assert after.count == before.count + 1
+    assert _top(index, changed)[0] == ids[3]
+    assert _top(index, vectors[4])[0] != ids[4]
+    assert index.size == 49
+
+
+def test_metadata_change_does_not_append(index, rng):
+    ids, vectors = _build(index, rng)
+    index._write([Record(ids[5], vectors[5], status="angenommen")], None)
+    snapshot = index.reload()
+    assert snapshot.count == 50
+    assert _top(index, vectors[5], status="angenommen") == (ids[5], 1)
+
+
+def test_rows_missing_from_live_ids_are_dropped(index, rng):
+    # A proposal deleted between the change query and the live id query
+    ids = [uuid.uuid4() for _ in range(3)]
+    vectors = rng.standard_normal((3, DIMENSION)).astype(np.float32)
+    index._write([Record(i, v) for i, v in zip(ids, vectors)], set(ids[:2]))
+    assert index.size == 2
+    assert _top(index, vectors[2])[0] != ids[2]
+
+    ids_more = [uuid.uuid4()]
+    index._write([Record(ids_more[0], vectors[2])], {ids[0]})
+    assert index.size == 1
+
+
+def test_compaction_writes_a_new_generation(index, rng):
+    ids, vectors = _build(index, rng, rows=2100)
+    first = index.reload().vectors_file
+    index._write([], set(ids[:900]))
+    snapshot = index.reload()
+    assert snapshot.vectors_file != first
+    assert snapshot.count == snapshot.size == 900
+    assert _top(index, vectors[100])[0] == ids[100]
+    hits, _ = index.search(vectors[200], 1, oversampling=5)
+    assert hits[0][0] == ids[200]
@@ -0,0 +1,150 @@
+"""
+Tests for proposal view counts, the response cache and the cache warmer.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.v1.endpoints import search
+from app.core import cache
+from app.schemas.proposal import SearchType, TagMatch
+from app.services import analytics, warmup
+
+
+class FakePipeline:
+    def __init__(self, results=None):
+        self.calls = []
+        self.results = results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, *args))
+
+    async def execute(self):
+        return self.results if self.results is not None else [None] * len(self.calls)
+
+
+class FakeRedis:
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+
+    def pipeline(self, transaction=True):
+        return self._pipeline
+
+
+def _sink(max_buffer=10):
+    return analytics.SearchAnalyticsSink(batch_size=10, flush_interval=1.0, max_buffer=max_buffer)
+
+
+@pytest.mark.asyncio
+async def test_views_are_counted_and_flushed_per_day(monkeypatch):
+    pipe = FakePipeline()
+    monkeypatch.setattr(analytics, "get_redis", lambda: FakeRedis(pipe))
+    sink = _sink(max_buffer=2)
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    for proposal_id in (a, a, b, c):
+        sink.record_view(proposal_id)
+    assert sink.snapshot()["buffered_views"] == 2
+    assert sink.dropped == 1
+
+    assert await sink.flush_views() == 3
+    key = analytics.VIEWS_KEY + datetime.now(timezone.utc).date().isoformat()
+    assert ("zincrby", key, 2, str(a)) in pipe.calls
+    assert ("zincrby", key, 1, str(b)) in pipe.calls
+    assert pipe.calls[-1] == ("expire", key, analytics.VIEWS_RETENTION)
+    assert sink.snapshot()["buffered_views"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_view_flush_is_counted(monkeypatch):
+    def broken():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(analytics, "get_redis", broken)
+    sink = _sink()
+    sink.record_view(uuid.uuid4())
+    sink.record_view(uuid.uuid4())
+    assert await sink.flush_views() == 0
+    assert sink.failed == 2
+    assert sink.snapshot()["buffered_views"] == 0
+
+
+@pytest.mark.asyncio
+async def test_most_viewed_ranks_over_recent_days(monkeypatch):
+    pipe = FakePipeline(results=[3, ["b", "a"], 1])
+    monkeypatch.setattr(analytics, "get_redis", lambda: FakeRedis(pipe))
+    assert await analytics.most_viewed_proposal_ids(2, days=3) == ["b", "a"]
+    name, ranking, keys = pipe.calls[0]
+    assert name == "zunionstore"
+    assert len(keys) == 3 and all(key.startswith(analytics.VIEWS_KEY) for key in keys)
+    assert pipe.calls[1] == ("zrevrange", ranking, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_hot_proposals_are_topped_up_with_recent(monkeypatch):
+    viewed, recent = uuid.uuid4(), uuid.uuid4()
+
+    async def most_viewed(limit):
+        return [str(viewed)]
+
+    async def recent_ids(session, limit):
+        return [viewed, recent]
+
+    monkeypatch.setattr(warmup, "most_viewed_proposal_ids", most_viewed)
+    monkeypatch.setattr(warmup, "_recent_proposal_ids", recent_ids)
+    assert await warmup._hot_proposal_ids(None, 3) == [viewed, recent]
+    assert await warmup._hot_proposal_ids(None, 1) == [viewed]
+
+    async def unavailable(limit):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(warmup, "most_viewed_proposal_ids", unavailable)
+    assert await warmup._hot_proposal_ids(None, 3) == [viewed, recent]
+
+
+def test_cache_keys_embed_versions():
+    proposal_id = uuid.uuid4()
+    first = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    second = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    assert cache.proposal_key(proposal_id, first) != cache.proposal_key(proposal_id, second)
+    assert cache.search_key(first, 10, ["klima"]) == cache.search_key(first, 10, ["klima"])
+    assert cache.search_key(first, 10, ["klima"]) != cache.search_key(first, 11, ["klima"])
+    assert cache.search_key(first, 10, ["klima"]) != cache.search_key(first, 10, ["energie"])
+
+
+@pytest.mark.asyncio
+async def test_cached_search_skips_degraded_outcomes(monkeypatch):
+    stored = {}
+    outcomes = iter([
+        {"total": 0, "results": [], "degraded_reason": "circuit_open"},
+        {"total": 1, "results": [{"id": "a"}], "degraded_reason": None},
+    ])
+
+    async def get_json(key):
+        return stored.get(key)
+
+    async def set_json(key, value, ttl=None):
+        stored[key] = value
+
+    async def execute(db, *params):
+        return next(outcomes)
+
+    monkeypatch.setattr(search, "get_json", get_json)
+    monkeypatch.setattr(search, "set_json", set_json)
+    monkeypatch.setattr(search, "_execute_search", execute)
+    params = ("klima", SearchType.HYBRID, 20, 0, None, None, None, [], TagMatch.ANY, None, None, None)
+
+    degraded = await search.cached_search(None, None, 5, *params)
+    assert degraded["degraded_reason"] == "circuit_open"
+    assert stored == {}
+
+    complete = await search.cached_search(None, None, 5, *params)
+    assert complete["total"] == 1
+    assert await search.cached_search(None, None, 5, *params) == complete
+    assert len(stored) == 1